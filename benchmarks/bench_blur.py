@@ -0,0 +1,95 @@
+"""Blur-mode benchmark: the margin-cropped GaussianBlur behind ``burn_boxes``.
+
+    python benchmarks/bench_blur.py [--megapixels 24] [--box 800x200]
+                                    [--radii 4,16,64,128,256] [--json out.json]
+                                    [--baseline base.json] [--threshold 1.2]
+
+For each radius one box is burned on a synthetic image three ways, all but
+the last reading the same crop of the box plus a margin of three radii:
+"burn" is :func:`redax_engine.burn_boxes`, which runs ``GaussianBlur`` on
+that crop; "box3_margin" runs three separate ``BoxBlur`` passes on it (the
+earlier implementation, same reach and a similar look); "gauss_image" filters
+the whole image and pastes the box back, the naive way to blur one region.
+Each reports the best wall time of ``--repeat`` runs and that time per pixel
+read, which stays flat as the radius grows. With ``--baseline`` the run is
+compared against an earlier ``--json`` file and the exit status is 1 if any
+case got slower than ``--threshold`` times its baseline.
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+import argparse
+from typing import Callable, List, Optional
+
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import add_report_args, by_label, csv, finish, logger, meta  # noqa: E402
+from bench_suite import synthetic_image  # noqa: E402
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from redax_engine import PendingBox, burn_boxes, BLUR_PASSES  # noqa: E402
+
+
+def best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(image: Image.Image, box_size: str, radii: List[int], repeat: int, log) -> List[dict]:
+    bw, bh = (int(v) for v in box_size.lower().split("x"))
+    x1 = (image.width - bw) // 2; y1 = (image.height - bh) // 2
+    rect = (x1, y1, x1 + bw, y1 + bh)
+    results = []
+    for radius in radii:
+        margin = radius * BLUR_PASSES
+        crop_box = (max(0, x1 - margin), max(0, y1 - margin),
+                    min(image.width, rect[2] + margin), min(image.height, rect[3] + margin))
+        work = image.copy()
+
+        def burn():
+            burn_boxes(work, [PendingBox(rect, "blur")], 12, radius)
+
+        def box3_margin():
+            blurred = image.crop(crop_box)
+            for _ in range(BLUR_PASSES):
+                blurred = blurred.filter(ImageFilter.BoxBlur(radius))
+            work.paste(blurred.crop((x1 - crop_box[0], y1 - crop_box[1], x1 - crop_box[0] + bw,
+                                     y1 - crop_box[1] + bh)), (x1, y1))
+
+        def gauss_image():
+            work.paste(image.filter(ImageFilter.GaussianBlur(radius)).crop(rect), (x1, y1))
+
+        margin_px = (crop_box[2] - crop_box[0]) * (crop_box[3] - crop_box[1])
+        cases = (("burn", burn, margin_px), ("box3_margin", box3_margin, margin_px),
+                 ("gauss_image", gauss_image, image.width * image.height))
+        for name, fn, pixels in cases:
+            ms = best_ms(fn, repeat)
+            results.append({"case": name, "radius": radius, "wall_ms": round(ms, 3)})
+            log(f"r={radius:<4} {name:<13} {ms:10.1f} ms | {ms * 1e6 / pixels:6.1f} ns/px read")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=24, help="size of the synthetic image")
+    parser.add_argument("--mode", default="RGB", choices=["L", "RGB", "RGBA"])
+    parser.add_argument("--box", default="800x200", help="blurred box, WxH")
+    parser.add_argument("--radii", type=csv(int), default=[4, 16, 64, 128, 256], help="blur radii, comma-separated")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (best is kept)")
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    log = logger(args)
+    image = synthetic_image(args.megapixels, args.mode)
+    results = run(image, args.box, args.radii, args.repeat, log)
+    return finish(args, meta(megapixels=args.megapixels, mode=args.mode, box=args.box, repeat=args.repeat),
+                  results, by_label(lambda r: f"{r['case']} r={r['radius']}"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
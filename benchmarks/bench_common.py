@@ -0,0 +1,95 @@
+"""Command line, report and baseline handling shared by the benchmarks.
+
+Every benchmark takes ``--json out.json`` to write its results, and
+``--baseline base.json`` to compare the run against an earlier ``--json``
+file; the exit status is then 1 if anything got slower than ``--threshold``
+times its baseline. A baseline is just a saved run on the same machine:
+
+    python benchmarks/bench_suite.py --json base.json     # before the change
+    python benchmarks/bench_suite.py --baseline base.json  # after it
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import argparse
+import platform
+from typing import Callable, Dict, List, Optional
+
+
+def csv(cast):
+    """argparse type for a comma-separated list of ``cast`` values."""
+    return lambda text: [cast(v) for v in text.split(",") if v.strip()]
+
+
+def add_report_args(parser: argparse.ArgumentParser) -> None:
+    """``--json``, ``--baseline``, ``--threshold`` and ``-q``."""
+    parser.add_argument("--json", dest="json_path", help="write results here")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="ratio over baseline that counts as a regression (default 1.2)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the comparison")
+
+
+def logger(args: argparse.Namespace) -> Callable[[str], None]:
+    return (lambda _msg: None) if args.quiet else print
+
+
+def meta(**extra) -> dict:
+    """When and where a run happened, plus the benchmark's own settings."""
+    info = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+    try:
+        import PIL
+        import numpy as np
+        info.update(pillow=PIL.__version__, numpy=np.__version__)
+    except ImportError:
+        pass
+    info.update(extra)
+    return info
+
+
+def compare(now: Dict[str, float], base: Dict[str, float], threshold: float, log) -> int:
+    """Print each time (ms) against the baseline; return how many regressed."""
+    regressions = 0
+    width = max([len(name) for name in now] + [20]) + 2
+    log("")
+    log(f"{'':<{width}} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for name, ms in now.items():
+        old = base.get(name)
+        if not old:
+            continue
+        ratio = ms / old
+        flag = ""
+        if ratio > threshold:
+            regressions += 1
+            flag = "  SLOWER"
+        log(f"{name:<{width}} {old:>8.1f}ms {ms:>8.1f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def finish(args: argparse.Namespace, info: dict, results, times: Callable[[object], Dict[str, float]]) -> int:
+    """Write the ``--json`` report and compare against ``--baseline``; returns the
+    exit status. ``times`` maps a ``results`` value (this run's or the
+    baseline's) to named times in ms, which is what gets compared."""
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"meta": info, "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(times(results), times(baseline.get("results") or {}), args.threshold, print)
+        if regressions:
+            print(f"\n{regressions} time(s) slower than {args.threshold:g}x baseline")
+            return 1
+    return 0
+
+
+def by_label(label: Callable[[dict], str]) -> Callable[[List[dict]], Dict[str, float]]:
+    """``times`` for results that are a list of dicts with a ``wall_ms``."""
+    return lambda rows: {label(r): r["wall_ms"] for r in rows if r.get("wall_ms")}
+
+
+def identity(results: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """``times`` for results that already are named times."""
+    return dict(results or {})
@@ -0,0 +1,95 @@
+"""Compare the NumPy block-average pixelation with the old crop/resize path.
+
+    python benchmarks/bench_pixelate.py [--boxes 40] [--pixel 12] [--repeat 5]
+                                        [--json out.json] [--baseline base.json]
+                                        [--threshold 1.2]
+
+"legacy" is the old NEAREST down/up path, which only reads one pixel per
+cell (and let others through unaveraged); "rects" averages each box on its
+own with :func:`redax_engine.pixelate_rects`; "burn" is what the editor
+runs, :func:`redax_engine.burn_boxes`, where overlapping boxes are merged
+and each group is averaged in one pass over its bounding box. With
+``--baseline`` the run is compared against an earlier ``--json`` file and
+the exit status is 1 if any case got slower than ``--threshold`` times its
+baseline.
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import add_report_args, by_label, finish, logger, meta  # noqa: E402
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from redax_engine import PendingBox, burn_boxes, pixelate_rects  # noqa: E402
+
+
+SIZES = {"4K": (3840, 2160), "8K": (7680, 4320)}
+
+
+def legacy_pixelate(image: Image.Image, rects, pixel_size: int) -> None:
+    """The per-box crop / NEAREST down-up / paste path Redax used before."""
+    for x1, y1, x2, y2 in rects:
+        region = image.crop((x1, y1, x2, y2))
+        w, h = region.size
+        k = max(1, int(min(w, h) // max(4, pixel_size)))
+        small = region.resize((max(1, w // k), max(1, h // k)), Image.NEAREST)
+        image.paste(small.resize((w, h), Image.NEAREST), (x1, y1))
+
+
+def burn_pixelate(image: Image.Image, rects, pixel_size: int) -> None:
+    burn_boxes(image, [PendingBox(rect, "pixelate") for rect in rects], pixel_size)
+
+
+def random_rects(size, count, rng):
+    w, h = size
+    rects = []
+    for _ in range(count):
+        bw = rng.randint(80, 900); bh = rng.randint(30, 400)
+        x = rng.randint(0, w - bw); y = rng.randint(0, h - bh)
+        rects.append((x, y, x + bw, y + bh))
+    return rects
+
+
+def best_of(fn, image, rects, pixel, repeat):
+    times = []
+    for _ in range(repeat):
+        img = image.copy()
+        start = time.perf_counter()
+        fn(img, rects, pixel)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=40, help="random boxes per image")
+    parser.add_argument("--pixel", type=int, default=12, help="pixel size")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (best is kept)")
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    log = logger(args)
+    rng = random.Random(1234)
+    results = []
+    for name, size in SIZES.items():
+        pixels = np.random.default_rng(1234).integers(0, 256, (size[1], size[0], 4), dtype=np.uint8)
+        image = Image.fromarray(pixels)
+        rects = random_rects(size, args.boxes, rng)
+        times = {case: best_of(fn, image, rects, args.pixel, args.repeat)
+                 for case, fn in (("legacy", legacy_pixelate), ("rects", pixelate_rects), ("burn", burn_pixelate))}
+        results += [{"size": name, "case": case, "wall_ms": round(ms, 3)} for case, ms in times.items()]
+        log(f"{name} {size[0]}x{size[1]} | {args.boxes} boxes | legacy {times['legacy']:7.1f} ms | "
+            f"rects {times['rects']:7.1f} ms | burn {times['burn']:7.1f} ms")
+    return finish(args, meta(boxes=args.boxes, pixel=args.pixel, repeat=args.repeat),
+                  results, by_label(lambda r: f"{r['case']} {r['size']}"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Cold-start benchmark: module import times and the editor's time-to-interactive.
+
+    python benchmarks/bench_startup.py [--runs 7] [--json out.json]
+                                       [--baseline base.json] [--threshold 1.2]
+
+Every run is a fresh interpreter, so nothing is cached in-process between
+runs (the OS file cache stays warm, as it does for a user relaunching the
+app). "import redax_engine" and "import redax" need no display.
+"interactive" launches ``redax.py --startup-report``, which prints JSON once
+the first idle of the Tk event loop is reached (window built, mapped and
+taking input) and quits; it is skipped when no display is available.
+"process" is the wall time of that whole launch, interpreter start included.
+Each metric reports the median of ``--runs``. With ``--baseline`` the run is
+compared against an earlier ``--json`` file and the exit status is 1 if any
+metric got slower than ``--threshold`` times its baseline.
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import add_report_args, finish, identity, logger, meta  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = ("import sys, time; sys.path.insert(0, {root!r}); t = time.perf_counter(); "
+                  "import {module}; print((time.perf_counter() - t) * 1000)")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("REDAX_PROFILE", None)  # profiling adds work to every span
+    return env
+
+
+def time_import(module: str, cwd: str) -> float:
+    """Milliseconds to import ``module`` in a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(root=ROOT, module=module)],
+                         cwd=cwd, env=_env(), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_launch(cwd: str, timeout: float) -> Optional[Dict[str, float]]:
+    """Timings printed by ``redax.py --startup-report``, or None without a display."""
+    start = time.perf_counter()
+    try:
+        out = subprocess.run([sys.executable, os.path.join(ROOT, "redax.py"), "--startup-report"],
+                             cwd=cwd, env=_env(), capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    elapsed = (time.perf_counter() - start) * 1000
+    for line in reversed(out.stdout.splitlines()):
+        if line.startswith("{"):
+            report = json.loads(line)
+            report["process_ms"] = round(elapsed, 1)
+            return report
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="launches per metric (median is kept)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a launch is abandoned")
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    log = logger(args)
+    samples: Dict[str, List[float]] = {}
+    # An empty working directory, so a settings.yml lying around doesn't change the work
+    with tempfile.TemporaryDirectory(prefix="redax-startup-") as cwd:
+        for _ in range(args.runs):
+            for module in ("redax_engine", "redax"):
+                samples.setdefault(f"import {module}", []).append(time_import(module, cwd))
+            report = time_launch(cwd, args.timeout)
+            if report is not None:
+                for key in ("import_ms", "window_ms", "interactive_ms", "process_ms"):
+                    samples.setdefault(key[:-3], []).append(report[key])
+
+    results = {name: round(statistics.median(values), 1) for name, values in samples.items()}
+    for name, value in results.items():
+        log(f"{name:<24} {value:10.1f} ms")
+    if "interactive" not in results:
+        log("interactive: skipped (the editor could not open a window here)")
+
+    return finish(args, meta(runs=args.runs), results, identity)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""Headless benchmarks for the open/render/fade/match/burn/undo/redo/save hot paths.
+
+    python benchmarks/bench_suite.py [--sizes 1,10,100] [--modes RGB,RGBA,L]
+                                     [--boxes 1,50,500] [--json out.json]
+                                     [--baseline base.json] [--threshold 1.2]
+
+Everything runs on the Tk-free engine the editor calls into, so no display is
+needed. "render" is the tile resampling behind ``RedaxApp._update_tiles`` for a
+1600×900 view (the Tk upload of each tile is not included); "fade" is the
+flattened frame plus the ten blends of the open fade-in; "open_disk" loads the
+same pixels from an uncompressed PGM/PPM/TIFF into a DiskImage and fails the
+run if that stops working; "preview_fit" live-previews pending boxes tile by
+tile at the fit scale and fails the run unless the tiles match one preview of
+the whole view; "burn_200x50" burns one small box and resamples
+only the view tiles it touches, which should cost the same at any image
+size. Each operation reports the best wall time of ``--repeat`` runs and the peak resident memory
+above the level before it started. With ``--baseline`` the run is compared
+against an earlier ``--json`` file and the exit status is 1 if any operation
+got slower than ``--threshold`` times its baseline.
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import add_report_args, by_label, csv, finish, logger, meta  # noqa: E402
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from redax_engine import (PendingBox, ImagePyramid, History, DiskImage, open_image, burn_boxes,  # noqa: E402
+                          affected_rects, save_image, display_frame, find_matches, rss_bytes,
+                          burn_groups, display_groups, groups_in, preview_margin, preview_region,
+                          tiles_touched)
+
+
+VIEW = (1600, 900)       # viewport the render/fade operations fill
+TILE = 256               # matches redax.TILE_SIZE
+BG = (43, 43, 43)        # Dark theme background, flattened under alpha
+RAW_EXT = {"L": "pgm", "RGB": "ppm", "RGBA": "tif"}  # uncompressed format per mode, for open_disk
+
+
+# ---------------------- Measurement ----------------------
+class PeakMemory:
+    """Sample RSS on a thread while the block runs; ``peak`` is the growth in bytes.
+
+    PIL allocates outside the Python allocator, so tracemalloc would miss most
+    of it; resident memory is what users actually feel.
+    """
+    INTERVAL = 0.002
+
+    def __enter__(self):
+        self.start = rss_bytes()
+        self.peak = 0
+        self._stop = threading.Event()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes() - self.start)
+            self._stop.wait(self.INTERVAL)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.start is not None:
+            self._thread.join()
+            self.peak = max(self.peak, rss_bytes() - self.start)
+        else:
+            self.peak = None
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None):
+    """Best wall time (ms) and largest peak memory (MB) of ``repeat`` runs of ``fn``."""
+    best, peak = float("inf"), None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with PeakMemory() as mem:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if mem.peak is not None:
+            peak = max(peak or 0.0, mem.peak / (1024 * 1024))
+    return best * 1000, peak
+
+
+# ----------------------- Workloads -----------------------
+def synthetic_image(megapixels: float, mode: str, seed: int = 1234) -> Image.Image:
+    """A 3:2 image with gradients and noisy blocks, so encoders have real work to do."""
+    w = int((megapixels * 1_000_000 * 1.5) ** 0.5)
+    h = int(megapixels * 1_000_000 // w)
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, w, dtype=np.float32)
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    base = ((x + y) / 2).astype(np.uint8)
+    # Coarse noise, upsampled: screenshot-like flat areas with detail between them
+    noise = rng.integers(0, 64, (h // 16 + 1, w // 16 + 1), dtype=np.uint8)
+    base = base + np.repeat(np.repeat(noise, 16, axis=0), 16, axis=1)[:h, :w]
+    if mode == "L":
+        return Image.fromarray(base)
+    rgb = np.stack([base, base[::-1], np.roll(base, w // 3, axis=1)], axis=-1)
+    if mode == "RGB":
+        return Image.fromarray(rgb)
+    alpha = np.full((h, w, 1), 255, np.uint8)
+    alpha[: h // 8] = 128  # a translucent band so alpha flattening isn't a no-op
+    return Image.fromarray(np.concatenate([rgb, alpha], axis=-1))
+
+
+def random_boxes(size: Tuple[int, int], count: int, seed: int = 1234) -> List[PendingBox]:
+    rng = random.Random(seed)
+    w, h = size
+    boxes = []
+    for i in range(count):
+        bw = rng.randint(min(w, 40), min(w, 600)); bh = rng.randint(min(h, 16), min(h, 200))
+        x = rng.randint(0, w - bw); y = rng.randint(0, h - bh)
+        boxes.append(PendingBox((x, y, x + bw - 1, y + bh - 1), "pixelate" if i % 2 else "black"))
+    return boxes
+
+
+def render_view(image, pyramid: ImagePyramid, scale: float) -> None:
+    """Resample every tile of a ``VIEW``-sized window at the image's top-left."""
+    w = max(1, int(image.width * scale)); h = max(1, int(image.height * scale))
+    for y0 in range(0, min(h, VIEW[1]), TILE):
+        for x0 in range(0, min(w, VIEW[0]), TILE):
+            pyramid.sample(image, scale, (x0, y0, min(x0 + TILE, w), min(y0 + TILE, h)))
+
+
+def preview_view(image, pyramid: ImagePyramid, scale: float, boxes, block: float, radius: int):
+    """Live-preview ``boxes`` in every tile of a ``VIEW``-sized window, as
+    ``RedaxApp._tile_pixels`` does; returns the window and its tiles."""
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    w, h = min(VIEW[0], size[0]), min(VIEW[1], size[1])
+    groups = display_groups(burn_groups(boxes, image.size), scale, size)
+    margin = preview_margin(block, radius)
+
+    def sample(rect):
+        return pyramid.sample(image, scale, rect)
+
+    tiles = {}
+    for y0 in range(0, h, TILE):
+        for x0 in range(0, w, TILE):
+            tile = (x0, y0, min(x0 + TILE, w), min(y0 + TILE, h))
+            tiles[tile] = preview_region(sample, tile, size, groups_in(groups, tile, margin), block, radius)
+    return (0, 0, w, h), tiles
+
+
+def patch_view(image, pyramid: ImagePyramid, scale: float, rects) -> int:
+    """Resample only the tiles of a ``VIEW``-sized window that show image ``rects``,
+    as ``RedaxApp._patch_tiles`` does after a burn; returns how many."""
+    w = min(VIEW[0], max(1, int(image.width * scale))); h = min(VIEW[1], max(1, int(image.height * scale)))
+    tiles = [(x0, y0, min(x0 + TILE, w), min(y0 + TILE, h)) for y0 in range(0, h, TILE) for x0 in range(0, w, TILE)]
+    touched = tiles_touched(tiles, rects, scale)
+    for tile in touched:
+        pyramid.sample(image, scale, tile)
+    return len(touched)
+
+
+def fade(image) -> None:
+    scale = min(VIEW[0] / image.width, VIEW[1] / image.height, 1.0)
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    base = Image.new("RGB", size, BG)
+    final = display_frame(image, size, BG)
+    for i in range(1, 11):
+        Image.blend(base, final, i / 10)
+
+
+def build_pyramid(image) -> ImagePyramid:
+    pyramid = ImagePyramid()
+    pyramid.build(image)
+    while not pyramid.ready:
+        time.sleep(0.001)
+    return pyramid
+
+
+# ------------------------- Suite -------------------------
+def run_case(megapixels: float, mode: str, box_counts: List[int], repeat: int,
+             workdir: str, preset: str, log: Callable[[str], None]) -> List[dict]:
+    results = []
+
+    def record(op: str, fn, boxes: int = 0, setup=None, runs: int = repeat):
+        wall, peak = measure(fn, runs, setup)
+        results.append({"op": op, "megapixels": megapixels, "mode": mode, "boxes": boxes,
+                         "wall_ms": round(wall, 3), "peak_mb": None if peak is None else round(peak, 2)})
+        mem = "" if peak is None else f" | peak {peak:8.1f} MB"
+        log(f"{megapixels:>6g} MP {mode:<4} {op:<13} {boxes:>4} boxes | {wall:10.1f} ms{mem}")
+
+    src_path = os.path.join(workdir, f"src-{megapixels:g}-{mode}.png")
+    save_image(synthetic_image(megapixels, mode), src_path, "fast")
+    state: Dict[str, object] = {}
+
+    def do_open():
+        state["image"] = open_image(src_path, out_of_core_pixels=None)
+    record("open", do_open)
+    image = state["image"]
+
+    # The same pixels as an uncompressed file, streamed into a DiskImage; the
+    # result is checked, so a format that stops loading out of core fails the run
+    raw_path = os.path.join(workdir, f"src-{megapixels:g}-{mode}.{RAW_EXT[mode]}")
+    image.save(raw_path)
+
+    def do_open_disk():
+        state["disk"] = open_image(raw_path, out_of_core_pixels=1)
+    record("open_disk", do_open_disk)
+    disk = state.pop("disk")
+    if not isinstance(disk, DiskImage) or not np.array_equal(
+            np.asarray(disk.crop((0, 0, disk.width, min(disk.height, 256)))),
+            np.asarray(image.crop((0, 0, image.width, min(image.height, 256))))):
+        raise RuntimeError(f"{os.path.basename(raw_path)} did not load out of core intact")
+    del disk
+
+    def do_pyramid():
+        state["pyramid"] = build_pyramid(image)
+    record("pyramid", do_pyramid)
+    pyramid = state["pyramid"]
+
+    fit = min(VIEW[0] / image.width, VIEW[1] / image.height, 1.0)
+    record("render_fit", lambda: render_view(image, pyramid, fit))
+    record("render_1to1", lambda: render_view(image, pyramid, 1.0))
+    record("fade", lambda: fade(image))
+    # One screenshot-sized template; the synthetic image only matches it at its source
+    tx, ty = image.width // 4, image.height // 4
+    template = (tx, ty, min(image.width, tx + 240), min(image.height, ty + 32))
+    record("find_matches", lambda: find_matches(image, template))
+
+    for count in box_counts:
+        boxes = random_boxes(image.size, count)
+        history = History()
+        work = {}
+
+        def fresh():
+            # Each burn starts from the clean image so repeats measure the same work
+            work["image"] = image.copy()
+            history.clear()
+
+        def burn():
+            target = work["image"]
+            rects = affected_rects(boxes, target.size)
+            history.record(target, rects)
+            burn_boxes(target, boxes, 12)
+            pyramid.patch(target, rects)
+
+        def undo():
+            pyramid.patch(work["image"], history.undo(work["image"]))
+
+        def redo():
+            pyramid.patch(work["image"], history.redo(work["image"]))
+
+        record("burn", burn, count, setup=fresh)
+        # Alternate undo/redo on the burnt image so each run has something to do
+        record("undo", undo, count, setup=lambda: history.can_undo or redo())
+        record("redo", redo, count, setup=lambda: history.can_redo or undo())
+
+    # Live preview of pending boxes at the fit scale, which is fractional for
+    # anything bigger than the view; the tiles must join up into exactly one
+    # preview of the whole window, or the run fails
+    pending = random_boxes(image.size, 24, seed=99) + [
+        PendingBox((image.width // 5, image.height // 2, image.width // 2, image.height * 3 // 4), "blur")]
+    block, radius = max(1.0, 12 * fit), max(1, round(8 * fit))
+    record("preview_fit", lambda: preview_view(image, pyramid, fit, pending, block, radius), len(pending))
+    window, tiles = preview_view(image, pyramid, fit, pending, block, radius)
+    size = (max(1, int(image.width * fit)), max(1, int(image.height * fit)))
+    whole = np.asarray(preview_region(lambda rect: pyramid.sample(image, fit, rect), window, size,
+                                      display_groups(burn_groups(pending, image.size), fit, size), block, radius))
+    if any(not np.array_equal(np.asarray(pixels), whole[y0:y1, x0:x1]) for (x0, y0, x1, y1), pixels in tiles.items()):
+        raise RuntimeError(f"previewed tiles at scale {fit:g} do not match a preview of the whole view")
+
+    # One 200×50 box end to end, as the editor burns it: record, burn, patch the
+    # pyramid and resample only the view tiles it touches. Should not grow with the image
+    x, y = image.width // 3, image.height // 3
+    small = [PendingBox((x, y, x + 200, y + 50), "pixelate")]
+    history = History()
+    work = {}
+
+    def fresh_small():
+        work["image"] = image.copy()
+        history.clear()
+
+    def burn_small():
+        target = work["image"]
+        rects = affected_rects(small, target.size)
+        history.record(target, rects)
+        burn_boxes(target, small, 12)
+        pyramid.patch(target, rects)
+        patch_view(target, pyramid, fit, rects)
+
+    record("burn_200x50", burn_small, 1, setup=fresh_small)
+
+    out_path = os.path.join(workdir, "out.png")
+    record("save", lambda: save_image(image, out_path, preset))
+    for path in (src_path, raw_path, out_path):
+        if os.path.exists(path):
+            os.remove(path)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=csv(float), default=[1, 10, 100], help="megapixels, comma-separated")
+    parser.add_argument("--modes", type=csv(str), default=["RGB", "RGBA", "L"])
+    parser.add_argument("--boxes", type=csv(int), default=[1, 50, 500], help="pending box counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation (best is kept)")
+    parser.add_argument("--preset", default="balanced", help="save preset for the save operation")
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    log = logger(args)
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory(prefix="redax-bench-") as workdir:
+        for megapixels in args.sizes:
+            for mode in args.modes:
+                results += run_case(megapixels, mode, args.boxes, args.repeat, workdir, args.preset, log)
+
+    return finish(args, meta(repeat=args.repeat, preset=args.preset), results,
+                  by_label(lambda r: f"{float(r['megapixels']):g} MP {r['mode']} {r['op']} ({r['boxes']})"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
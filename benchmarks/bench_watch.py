@@ -0,0 +1,86 @@
+"""Watch-mode benchmark: per-file latency while the daemon drains a backlog.
+
+    python benchmarks/bench_watch.py [--files 12] [--workers 2] [--max-inflight 4]
+                                     [--settle 0.5] [--slack 0.5] [--json out.json]
+                                     [--baseline base.json] [--threshold 1.2]
+
+``--files`` images are in the folder before the daemon starts, so all of them
+settle at once and most have to wait in the backlog. Latency is counted from
+when the daemon first saw a file to when its output was written, so the floor
+is ``--settle``. With enough workers for the work, draining the backlog adds
+little on top of that; the exit status is 1 if any file took longer than
+``--settle`` plus ``--slack`` seconds, which catches a daemon that idles for a
+poll interval between batches. With ``--baseline`` the p50 and max latency
+are also compared against an earlier ``--json`` file.
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import add_report_args, finish, identity, logger, meta  # noqa: E402
+from bench_suite import synthetic_image  # noqa: E402
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from redax_engine import PendingBox, WatchDaemon, WatchTemplate  # noqa: E402
+
+
+def run(files: int, workers: int, max_inflight: int, settle: float, poll: float, megapixels: float) -> List[float]:
+    """Latencies (s) of ``files`` images present when the daemon starts."""
+    image = synthetic_image(megapixels, "RGB")
+    template = WatchTemplate([PendingBox((10, 10, 300, 60), "black"), PendingBox((10, 80, 300, 140), "pixelate")],
+                             preset="fast")
+    with tempfile.TemporaryDirectory(prefix="redax-watch-") as folder:
+        for i in range(files):
+            image.save(os.path.join(folder, f"shot-{i:03d}.png"), compress_level=1)
+        daemon = WatchDaemon(folder, template, workers=workers, max_inflight=max_inflight, settle=settle,
+                             poll_interval=poll, force_poll=True, stats_every=3600, log=lambda _msg: None)
+        stop = threading.Event()
+        thread = threading.Thread(target=daemon.run, args=(stop,), daemon=True)
+        thread.start()
+        deadline = time.perf_counter() + 60 + files * poll
+        while daemon.stats.count + daemon.stats.failed < files and time.perf_counter() < deadline:
+            time.sleep(0.02)
+        stop.set()
+        thread.join()
+        return list(daemon.stats.samples)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=12, help="images waiting when the daemon starts")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-inflight", type=int, default=4)
+    parser.add_argument("--settle", type=float, default=0.5)
+    parser.add_argument("--poll", type=float, default=1.0, help="daemon rescan interval")
+    parser.add_argument("--megapixels", type=float, default=0.05, help="size of each image")
+    parser.add_argument("--slack", type=float, default=0.5,
+                        help="seconds over --settle any file may take (default 0.5)")
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    log = logger(args)
+    latencies = run(args.files, args.workers, args.max_inflight, args.settle, args.poll, args.megapixels)
+    ms = sorted(v * 1000 for v in latencies)
+    if len(ms) < args.files:
+        print(f"only {len(ms)} of {args.files} file(s) were redacted")
+        return 1
+    results = {"latency p50": round(ms[len(ms) // 2], 1), "latency max": round(ms[-1], 1)}
+    log(f"{len(ms)} files | latency p50 {results['latency p50']:.0f} ms, max {results['latency max']:.0f} ms "
+        f"(settle {args.settle * 1000:.0f} ms)")
+    status = finish(args, meta(**{k: v for k, v in vars(args).items()
+                                  if k not in ("json_path", "baseline", "threshold", "quiet")}),
+                    results, identity)
+    limit = (args.settle + args.slack) * 1000
+    if ms[-1] > limit:
+        print(f"slowest file took {ms[-1]:.0f} ms, over settle + slack ({limit:.0f} ms)")
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,26 @@ from __future__ import annotations
 import os
 import io
 import sys
-import yaml
+import json
+import time
+_STARTED = time.perf_counter()  # startup timings (--startup-report) are measured from here
+import queue
+import threading
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
-from PIL import Image, ImageTk, ImageDraw, ImageOps
+from PIL import Image, ImageTk
+
+from redax_engine import (MODES, PendingBox, BoxIndex, DiskImage, display_frame, ImagePyramid, History, open_image, open_preview,
+                          burn_boxes, affected_rects, save_image, suggest_output_name,
+                          SAVE_PRESETS, PROFILER, profiled, find_matches, rect_overlap,
+                          FrameSequence, open_frames, save_frames, SessionJournal, file_digest, preload,
+                          MemoryBudget, image_nbytes, BLUR_RADIUS, burn_groups, display_groups, groups_in,
+                          preview_margin, preview_region, tiles_touched)
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("dark-blue")
@@ -25,6 +37,7 @@ THEMES = {
         "label_text": "#cccccc",
         "accent_pixelate": "#00d1b2",
         "accent_black": "#ff5555",
+        "accent_blur": "#ffb86c",
     },
     "Light": {
         "bg": "#eeeeee",
@@ -34,6 +47,7 @@ THEMES = {
         "label_text": "#333333",
         "accent_pixelate": "#00a896",
         "accent_black": "#cc0000",
+        "accent_blur": "#d97706",
     },
     "Monochrome": {
         "bg": "#1a1a1a",
@@ -43,47 +57,174 @@ THEMES = {
         "label_text": "#b3b3b3",
         "accent_pixelate": "#808080",
         "accent_black": "#e0e0e0",
+        "accent_blur": "#b0b0b0",
     }
 }
 
 
+def _theme_styles(theme: dict) -> Dict[str, dict]:
+    """Widget options for ``theme`` by widget kind; used both when the widgets are
+    created and when the theme changes, so each widget is drawn once per change."""
+    return {
+        "button": dict(fg_color=theme["button_fg"], hover_color=theme["button_hover"],
+                       text_color=theme["button_text"]),
+        "label": dict(text_color=theme["label_text"]),
+        "slider": dict(progress_color=theme["accent_pixelate"], button_color=theme["button_fg"],
+                       button_hover_color=theme["button_hover"]),
+        "progress": dict(progress_color=theme["accent_pixelate"], fg_color=theme["button_fg"]),
+        "scrollbar": dict(button_color=theme["button_fg"], button_hover_color=theme["button_hover"]),
+        "option": dict(fg_color=theme["button_fg"], button_color=theme["button_hover"],
+                       text_color=theme["button_text"]),
+        "checkbox": dict(fg_color=theme["accent_pixelate"], hover_color=theme["button_hover"],
+                         border_color=theme["button_hover"], text_color=theme["label_text"]),
+    }
+
+
+
+TILE_SIZE = 256  # edge length of a display tile, in canvas pixels
+RENDER_FRAME_MS = 16    # scheduled renders run at most once per display frame
+RENDER_SETTLE_MS = 150  # quiet time after zoom input before the preview is replaced
+_RENDER_RANK = {"layout": 0, "preview": 1, "full": 2}  # merged requests keep the strongest kind
+
+FADE_IN_MS = 150       # window fade-in; the first key or click cuts it short
+MEMORY_CHECK_MS = 1000 # how often the memory budget is enforced and the status bar updated
+MB = 1024 * 1024
+
+FRAME_SPANS = ("All frames", "This frame", "Marked range")  # what a burn covers in a multi-frame file
+
 
 SETTINGS_PATH = os.path.join(os.getcwd(), "settings.yml")
+PROFILE_PATH = os.path.join(os.getcwd(), "redax-trace.json")
 
 DEFAULT_SETTINGS = {
     "theme": "Dark",
-    "mode": "Pixelate",
-    "pixel": 12
+    "mode": "pixelate",
+    "pixel": 12,
+    "blur": BLUR_RADIUS,
+    "live_preview": True,
+    "undo_compress": True,
+    "undo_memory_mb": 256,
+    "fade_max_megapixels": 12,
+    "out_of_core_megapixels": 100,
+    "match_threshold": 0.9,
+    "session_journal": True,
+    "memory_budget_mb": 1024,
+    "save_preset": "balanced"
 }
 
 
 
-def load_settings():
-    if os.path.exists(SETTINGS_PATH):
+def _validate_settings(raw) -> dict:
+    """Merge ``raw`` over the defaults, dropping values of the wrong type or range."""
+    settings = DEFAULT_SETTINGS.copy()
+    if not isinstance(raw, dict):
+        return settings
+    for key, value in raw.items():
+        default = settings.get(key)
+        if default is None:
+            settings[key] = value  # unknown key: keep it for whoever wrote it
+        elif isinstance(default, bool):
+            if isinstance(value, bool):
+                settings[key] = value
+        elif isinstance(default, (int, float)):
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+                settings[key] = type(default)(value)
+        elif isinstance(value, str):
+            settings[key] = value
+    if settings["theme"] not in THEMES:
+        settings["theme"] = DEFAULT_SETTINGS["theme"]
+    settings["mode"] = str(settings["mode"]).lower()
+    if settings["mode"] not in MODES:
+        settings["mode"] = DEFAULT_SETTINGS["mode"]
+    if settings["pixel"] < 1:
+        settings["pixel"] = DEFAULT_SETTINGS["pixel"]
+    if settings["blur"] < 1:
+        settings["blur"] = DEFAULT_SETTINGS["blur"]
+    return settings
+
+def load_settings(path: str = SETTINGS_PATH) -> dict:
+    if os.path.exists(path):
         try:
-            with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f) or DEFAULT_SETTINGS.copy()
+            import yaml  # deferred: only needed once a settings file exists
+            with open(path, "r", encoding="utf-8") as f:
+                return _validate_settings(yaml.safe_load(f))
         except Exception:
             pass
     return DEFAULT_SETTINGS.copy()
 
-def save_settings(settings: dict):
+@profiled("save_settings")
+def save_settings(settings: dict, path: str = SETTINGS_PATH):
+    """Write ``settings`` to a temp file and atomically rename it over ``path``."""
+    import yaml
+    tmp = f"{path}.tmp"
     try:
-        with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
+        with open(tmp, "w", encoding="utf-8") as f:
             yaml.safe_dump(settings, f, sort_keys=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
     except Exception as e:
         print(f"[WARN] Failed to save settings: {e}")
 
 
+class SettingsStore:
+    """Settings held in memory; changes are coalesced into one write after a quiet period.
+
+    Reads never touch the disk after construction. The write happens on a timer
+    thread, and :meth:`flush` forces any pending change out (e.g. on close).
+    """
+
+    def __init__(self, path: str = SETTINGS_PATH, delay: float = 0.75):
+        self.path = path
+        self.delay = delay
+        self._values = load_settings(path)
+        self._on_disk = dict(self._values) if os.path.exists(path) else {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._values and self._values[key] == value:
+                return
+            self._values[key] = value
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            snapshot = dict(self._values)
+        # Write outside the value lock so the UI thread never waits on the disk
+        with self._write_lock:
+            if snapshot == self._on_disk:
+                return
+            save_settings(snapshot, self.path)
+            self._on_disk = snapshot
+
+
 @dataclass
-class PendingBox:
-    rect: Tuple[int, int, int, int]  # in *image* coordinates: (x1, y1, x2, y2)
-    mode: str                        # "black" or "pixelate"
-    canvas_id: Optional[int] = None  # handle of preview rectangle on canvas
+class ViewTile:
+    photo: ImageTk.PhotoImage        # resampled pixels uploaded to Tk
+    item: int                        # canvas image item showing the tile
+    rect: Tuple[int, int, int, int]  # display rect the tile covers
+    effects: tuple = ()              # previewed pending boxes drawn into it (see _tile_effects)
 
 
 class RedaxApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, report_startup: bool = False):
+        self._init_started = time.perf_counter()
         super().__init__()
         
         set_icons(self)
@@ -93,140 +234,352 @@ class RedaxApp(ctk.CTk):
         # self.minsize(920, 600)
 
         # State
-        self.image: Optional[Image.Image] = None         # original image in RGBA
+        self.image: Optional[Image.Image] = None         # original image, native mode (L/RGB/P/RGBA)
         self.image_path: Optional[str] = None
-        self.display_image: Optional[Image.Image] = None # resized for current zoom
-        self.display_tk: Optional[ImageTk.PhotoImage] = None
+        self.loading: bool = False                       # True until the full-res image is in
+        self._showing_preview = False                    # self.image is a reduced JPEG preview
+        self._load_token = 0                             # bumped per open; stale loads are dropped
+        self._load_queue: "queue.Queue" = queue.Queue()
+        self._load_polling = False
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="redax-save")
+        self._save_future: Optional[Future] = None
+        self.display_tk: Optional[ImageTk.PhotoImage] = None # fade-in frame only
+        self._fade_job: Optional[str] = None
+        self._fade_frames: Tuple[Image.Image, ...] = ()  # blend endpoints while the open fade runs
+        self.tiles: Dict[Tuple[int, int], ViewTile] = {} # visible tiles by (col, row)
+        self.origin: Tuple[int, int] = (0, 0)            # canvas offset of image (centering)
+        self.pyramid = ImagePyramid()                    # reduced copies for zoomed-out views
+        self._pyramid_polling = False
         self.zoom: float = 1.0
         self.fit_scale: float = 1.0
-        self.pending: List[PendingBox] = []              # boxes not yet burned
-        self.undo_stack: List[Image.Image] = []          # past burned images
-        self.redo_stack: List[Image.Image] = []
+        self._render_job: Optional[str] = None           # next scheduled render (one per frame)
+        self._render_kind: Optional[str] = None          # "layout", "preview" or "full"
+        self._render_anchor = None                       # anchor for the scheduled render
+        self._settle_job: Optional[str] = None           # full render once zoom input stops
+        self._preview_tk: Optional[ImageTk.PhotoImage] = None  # low-res view shown while zooming
+        self.pending = BoxIndex()                        # boxes not yet burned, spatially indexed
+        self._groups_key = None                          # (pending version, scale, size) of _groups
+        self._groups: list = []                          # pending boxes as display_groups, for the preview
+        self._effects_job: Optional[str] = None          # tile preview refresh (one per frame)
+        self._drawn: Dict[int, PendingBox] = {}          # id(box) -> box with an outline on the canvas
+        self.selected: Optional[PendingBox] = None       # box picked for moving/deleting
+        self._drag_box = None                            # (box, rect at press, press x, press y) while moving
         self.draw_start: Optional[Tuple[int, int]] = None
         self.temp_rect_id: Optional[int] = None
-
-        self.settings = load_settings()
-        save_settings(self.settings)
+        self.frames: Optional[FrameSequence] = None      # set for animations and multi-page files
+        self.frame_index = 0                             # frame shown in self.image
+        self.frame_range: Tuple[int, int] = (0, 0)       # marks set with [ and ], inclusive
+        self._frame_target = 0                           # frame the scrubber asks for
+        self._frame_stale = False                        # edits changed while a decode was running
+        self._frame_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="redax-frames")
+        self._frame_future: Optional[Future] = None
+        self._find_future: Optional[Future] = None       # match search running on the frame executor
+        self._edits = 0                                  # bumped by every in-place burn, undo and redo
+        self.journal: Optional[SessionJournal] = None    # append-only log of this session, next to the image
+
+        self.settings = SettingsStore()
 
         self.mode = self.settings.get("mode", "black")
         self.pixel_size = self.settings.get("pixel", 12)
+        self.blur_radius = self.settings.get("blur", BLUR_RADIUS)
+        self.live_preview = self.settings.get("live_preview", True)  # draw pending boxes as they will burn
         self.active_theme = THEMES.get(self.settings.get("theme", "Dark"), THEMES["Dark"])
-
+        self.history = History(compress=self.settings.get("undo_compress", True),
+                               max_bytes=int(self.settings.get("undo_memory_mb", 256)) * 1024 * 1024)
+        self.memory = MemoryBudget(int(self.settings.get("memory_budget_mb", 1024)) * MB)
+        self._register_memory()
+        self._mem_text = ""
+
+        # Widgets are created with the saved theme, mode and pixel size, so
+        # nothing is reconfigured (and redrawn) before the first frame
+        self.configure(fg_color=self.active_theme["bg"])
         self._build_ui()
-
-        # Sync UI state to loaded settings
-        self.mode_var.set(self.mode)
-        self.theme_var.set(self.settings.get("theme", "Dark"))
-        self.pixel_slider.set(self.pixel_size)
-        
-        # Update the pixel label to the correct size
-        self.pixel_lbl.configure(text=f"Pixel {self.pixel_size}")
-
-        # Trigger correct UI enable/disable state for mode
-        self.on_mode_change(self.mode)
-
-        # Apply the saved theme visually
-        self.on_theme_change(self.settings.get("theme", "Dark"))
+        self._built_at = time.perf_counter()
 
         self._bind_keys()
-        
-        
-        self.attributes('-alpha', 0.0)
-        self.after(10, self.fade_in)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
-    def fade_in(self, step=0.05):
-        alpha = self.attributes('-alpha')
-        if alpha < 1.0:
-            alpha += step
-            self.attributes('-alpha', alpha)
-            self.after(10, self.fade_in, step)
-                
+        self._report_startup = report_startup
+        self._fade_started: Optional[float] = None
+        self._fade_in_job: Optional[str] = None
+        self._fade_binds: List[Tuple[str, str]] = []
+        self.attributes('-alpha', 0.0)
+        self.after_idle(self.fade_in)
+        self.after_idle(self._on_interactive)
+        self.after(MEMORY_CHECK_MS, self._memory_tick)
+
+    def on_close(self):
+        self.settings.flush()
+        self._close_journal()
+        self.destroy()
+
+    def _update_profile_overlay(self):
+        frames = list(PROFILER.frame_times)
+        parts = []
+        if frames:
+            parts.append(f"frame {frames[-1]:.1f} ms (avg {sum(frames) / len(frames):.1f}, max {max(frames):.1f})")
+        if PROFILER.last_op:
+            name, ms = PROFILER.last_op
+            parts.append(f"last: {name} {ms:.0f} ms")
+        self.prof_lbl.configure(text=" | ".join(parts))
+        self.after(250, self._update_profile_overlay)
+
+    def fade_in(self):
+        """Raise the window's alpha over FADE_IN_MS of wall time; any key or click
+        finishes the fade at once so it never stands between the user and input."""
+        now = time.perf_counter()
+        if self._fade_started is None:
+            self._fade_started = now
+            self._fade_binds = [(seq, self.bind(seq, self._end_fade_in, add="+"))
+                                for seq in ("<Key>", "<ButtonPress>")]
+        alpha = (now - self._fade_started) * 1000 / FADE_IN_MS
+        if alpha >= 1.0:
+            self._end_fade_in()
+            return
+        self.attributes('-alpha', alpha)
+        self._fade_in_job = self.after(RENDER_FRAME_MS, self.fade_in)
+
+    def _end_fade_in(self, event=None):
+        if self._fade_in_job is not None:
+            self.after_cancel(self._fade_in_job)
+            self._fade_in_job = None
+        for seq, funcid in self._fade_binds:
+            self.unbind(seq, funcid)
+        self._fade_binds = []
+        self.attributes('-alpha', 1.0)
+
+    def _on_interactive(self):
+        """First idle of the event loop: the window is up and taking input."""
+        now = time.perf_counter()
+        # Warm numpy and Pillow's common codecs off the UI thread for the first open
+        threading.Thread(target=preload, name="redax-preload", daemon=True).start()
+        if self._report_startup:
+            print(json.dumps({"import_ms": round((self._init_started - _STARTED) * 1000, 1),
+                              "window_ms": round((self._built_at - self._init_started) * 1000, 1),
+                              "interactive_ms": round((now - _STARTED) * 1000, 1)}), flush=True)
+            self.on_close()
+
+    # ------------------------- Memory -------------------------
+    def _register_memory(self):
+        """Account for the large buffers. When over budget, the ones cheapest to
+        rebuild are released first and old undo steps are spilled to disk last."""
+        memory = self.memory
+        memory.register("image", lambda: image_nbytes(self.image))
+        memory.register("preview", lambda: self._photo_nbytes(self._preview_tk))
+        memory.register("fade", self._fade_nbytes, self._finish_fade)
+        memory.register("tiles", lambda: sum(self._photo_nbytes(t.photo) for t in self.tiles.values()),
+                        self._trim_tiles)
+        memory.register("frames", lambda: self.frames.nbytes if self.frames else 0,
+                        lambda n: self.frames.trim_cache(n) if self.frames else 0)
+        memory.register("pyramid", lambda: self.pyramid.nbytes, lambda n: self.pyramid.drop_levels(n))
+        memory.register("history", lambda: self.history.nbytes, lambda n: self.history.spill(n))
+
+    @staticmethod
+    def _photo_nbytes(photo) -> int:
+        return photo.width() * photo.height() * 4 if photo is not None else 0
+
+    def _fade_nbytes(self) -> int:
+        return sum(image_nbytes(im) for im in self._fade_frames) + self._photo_nbytes(self.display_tk)
+
+    def _finish_fade(self, nbytes: int) -> int:
+        """Skip to the end of a running open fade, freeing its frames."""
+        if self._fade_job is None:
+            return 0
+        freed = self._fade_nbytes()
+        self._cancel_fade()
+        self._render()
+        return freed
+
+    def _trim_tiles(self, nbytes: int) -> int:
+        """Drop the margin of off-screen tiles kept for panning."""
+        if not self.tiles:
+            return 0
+        cols, rows = self._visible_tiles()
+        freed = 0
+        for key in list(self.tiles):
+            col, row = key
+            if col not in cols or row not in rows:
+                tile = self.tiles.pop(key)
+                freed += self._photo_nbytes(tile.photo)
+                self.canvas.delete(tile.item)
+        return freed
+
+    def _update_memory(self):
+        """Enforce the memory budget and show current usage in the status bar.
+
+        A pyramid trimmed under pressure is rebuilt once there is room for it
+        again (its levels add up to about a third of the image).
+        """
+        self.memory.enforce()
+        budget = self.memory.budget
+        if (self.pyramid.trimmed and self.pyramid.ready and self.image is not None
+                and (not budget or self.memory.total + image_nbytes(self.image) // 3 <= budget)):
+            self._rebuild_pyramid()
+        text = f"RAM {self.memory.total / MB:.0f} MB"
+        if self.memory.budget:
+            text += f" / {self.memory.budget / MB:.0f}"
+        spilled = self.history.disk_bytes
+        if spilled:
+            text += f" (+{spilled / MB:.0f} MB undo on disk)"
+        if text != self._mem_text:
+            self._mem_text = text
+            self.mem_lbl.configure(text=text)
+
+    def _memory_tick(self):
+        self._update_memory()
+        self.after(MEMORY_CHECK_MS, self._memory_tick)
 
     # --------------------------- UI ---------------------------
     def _build_ui(self):
+        style = _theme_styles(self.active_theme)
+
         # Top toolbar
-        tb = ctk.CTkFrame(self)
+        tb = ctk.CTkFrame(self, fg_color="transparent")
         tb.pack(side="top", fill="x", padx=6, pady=(6, 4))
 
-        self.btn_open = ctk.CTkButton(tb, text="▲", command=self.on_open, width = 40)
+        self.btn_open = ctk.CTkButton(tb, text="▲", command=self.on_open, width=40, **style["button"])
         self.btn_open.pack(side="left", padx=4)
 
-        self.btn_save = ctk.CTkButton(tb, text="▼", command=self.on_save, width = 40, state="disabled")
+        self.btn_save = ctk.CTkButton(tb, text="▼", command=self.on_save, width=40, **style["button"], state="disabled")
         self.btn_save.pack(side="left", padx=4)
         
         
 
-        self.btn_undo = ctk.CTkButton(tb, text="◄", command=self.on_undo, width = 40, state="disabled")
+        self.btn_undo = ctk.CTkButton(tb, text="◄", command=self.on_undo, width=40, **style["button"], state="disabled")
         self.btn_undo.pack(side="left", padx=4)
 
-        self.btn_redo = ctk.CTkButton(tb, text="►", command=self.on_redo, width = 40, state="disabled")
+        self.btn_redo = ctk.CTkButton(tb, text="►", command=self.on_redo, width=40, **style["button"], state="disabled")
         self.btn_redo.pack(side="left", padx=4)
 
+        self.btn_find = ctk.CTkButton(tb, text="⌕", command=self.on_find_matches, width=40, **style["button"], state="disabled")
+        self.btn_find.pack(side="left", padx=4)
+
         
 
         # Mode selector
-        self.mode_lbl = ctk.CTkLabel(tb, text="Mode:")
+        self.mode_lbl = ctk.CTkLabel(tb, text="Mode:", **style["label"])
         self.mode_lbl.pack(side="left", padx=(18, 4))
 
         self.mode_var = tk.StringVar(value=self.mode)
         self.opt_mode = ctk.CTkOptionMenu(tb, variable=self.mode_var,
-                                          values=["black", "pixelate"],
-                                          command=self.on_mode_change)
+                                          values=list(MODES),
+                                          command=self.on_mode_change, **style["option"])
         self.opt_mode.pack(side="left", padx=4)
 
-        # Pixel size slider (for pixelate)
-        self.pixel_slider = ctk.CTkSlider(tb, from_=4, to=48, number_of_steps=11, command=self.on_pixel_change)
-        self.pixel_slider.set(self.pixel_size)
+        # Strength slider: pixel size for pixelate, radius for blur
+        self.pixel_slider = ctk.CTkSlider(tb, from_=4, to=48, number_of_steps=11, command=self.on_pixel_change,
+                                          state="normal" if self.mode != "black" else "disabled",
+                                          **style["slider"])
+        self.pixel_slider.set(self.blur_radius if self.mode == "blur" else self.pixel_size)
         self.pixel_slider.pack(side="left", padx=8)
-        self.pixel_lbl = ctk.CTkLabel(tb, text=f"Pixel {self.pixel_size}")
+        self.pixel_lbl = ctk.CTkLabel(tb, **self._pixel_label_options())
         self.pixel_lbl.pack(side="left")
-        
-        self.pixel_slider.configure(state="disabled")
-        self.pixel_lbl.configure(text="Pixel (N/A)", text_color="gray")
+
+        self.preview_var = tk.BooleanVar(value=self.live_preview)
+        self.chk_preview = ctk.CTkCheckBox(tb, text="Preview", variable=self.preview_var, width=0,
+                                           command=self.on_live_preview_toggle, **style["checkbox"])
+        self.chk_preview.pack(side="left", padx=(12, 0))
 
 
 
         # Zoom controls
-        self.zoom_lbl = ctk.CTkLabel(tb, text="Zoom:")
+        self.zoom_lbl = ctk.CTkLabel(tb, text="Zoom:", **style["label"])
         self.zoom_lbl.pack(side="left", padx=(18, 4))
-        self.zoom_slider = ctk.CTkSlider(tb, from_=25, to=300, number_of_steps=55, command=self.on_zoom_change)
+        self.zoom_slider = ctk.CTkSlider(tb, from_=25, to=300, number_of_steps=55, command=self.on_zoom_change,
+                                         **style["slider"])
         self.zoom_slider.set(100)
         self.zoom_slider.pack(side="left", padx=4, fill="x", expand=True)
 
-        # Canvas area
-        self.canvas = tk.Canvas(self, bg="#202225", highlightthickness=0)
-        self.canvas.pack(side="top", fill="both", expand=True, padx=6, pady=(0, 6))
+        # Canvas area (scrollable; only visible tiles are ever resampled)
+        view = ctk.CTkFrame(self, fg_color="transparent")
+        view.pack(side="top", fill="both", expand=True, padx=6, pady=(0, 6))
+        view.grid_rowconfigure(0, weight=1)
+        view.grid_columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(view, bg=self.active_theme["bg"], highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+
+        self.vbar = ctk.CTkScrollbar(view, orientation="vertical", command=self._on_yscroll,
+                                     **style["scrollbar"])
+        self.vbar.grid(row=0, column=1, sticky="ns")
+        self.hbar = ctk.CTkScrollbar(view, orientation="horizontal", command=self._on_xscroll,
+                                     **style["scrollbar"])
+        self.hbar.grid(row=1, column=0, sticky="ew")
+        self.canvas.configure(xscrollcommand=self.hbar.set, yscrollcommand=self.vbar.set)
 
         self.canvas.bind("<ButtonPress-1>", self.on_mouse_down)
         self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
-        self.canvas.bind("<Configure>", lambda e: self._render())
+        self.canvas.bind("<Configure>", self.on_canvas_configure)
         self.canvas.bind("<MouseWheel>", self.on_wheel)
 
+        # Pan with middle or right drag (right is button 2 on macOS)
+        for button in (2, 3):
+            self.canvas.bind(f"<ButtonPress-{button}>", self.on_pan_start)
+            self.canvas.bind(f"<B{button}-Motion>", self.on_pan_drag)
+
         # ---------------- Status and Bottom Controls ----------------
         status_bar = ctk.CTkFrame(self, fg_color="transparent")
         status_bar.pack(side="bottom", fill="x", padx=6, pady=(0, 6))
 
-        # Left side: status label
-        self.status = ctk.CTkLabel(status_bar, text="Open an image to begin.")
+        # Left side: status label (+ progress bar while saving)
+        self.status = ctk.CTkLabel(status_bar, text="Open an image to begin.", **style["label"])
         self.status.pack(side="left")
+        self.save_progress = ctk.CTkProgressBar(status_bar, mode="indeterminate", width=120,
+                                                **style["progress"])
+        # Profiling overlay (--profile / REDAX_PROFILE): frame time and last operation
+        self.prof_lbl = ctk.CTkLabel(status_bar, text="", **style["label"])
+        if PROFILER.enabled:
+            self.prof_lbl.pack(side="left", padx=12)
+            self.after(250, self._update_profile_overlay)
 
         # Right side: burn + theme controls
         right_bar = ctk.CTkFrame(status_bar, fg_color="transparent")
         right_bar.pack(side="right")
 
-        self.btn_burn = ctk.CTkButton(right_bar, text="Burn (Space)", command=self.on_burn, state="disabled")
+        self.mem_lbl = ctk.CTkLabel(right_bar, text="", **style["label"])
+        self.mem_lbl.pack(side="left", padx=(0, 12))
+
+        self.btn_burn = ctk.CTkButton(right_bar, text="Burn (Space)", command=self.on_burn, state="disabled",
+                                      **style["button"])
         self.btn_burn.pack(side="left", padx=8)
 
+        self.preset_lbl = ctk.CTkLabel(right_bar, text="Save:", **style["label"])
+        self.preset_lbl.pack(side="left", padx=(12, 4))
+
+        self.preset_var = tk.StringVar(value=self.settings.get("save_preset", "balanced"))
+        self.opt_preset = ctk.CTkOptionMenu(right_bar, variable=self.preset_var, width = 100,
+                                            values=list(SAVE_PRESETS.keys()),
+                                            command=self.on_preset_change, **style["option"])
+        self.opt_preset.pack(side="left")
+
         theme_lbl = ctk.CTkLabel(right_bar, text="Theme:")
         theme_lbl.pack(side="left", padx=(12, 4))
 
-        self.theme_var = tk.StringVar(value="Dark")
+        self.theme_var = tk.StringVar(value=self.settings.get("theme", "Dark"))
         self.opt_theme = ctk.CTkOptionMenu(right_bar, variable=self.theme_var, width = 100,
                                            values=list(THEMES.keys()),
-                                           command=self.on_theme_change)
+                                           command=self.on_theme_change, **style["option"])
         self.opt_theme.pack(side="left")
 
+        # ---------------- Frame scrubber (packed only for multi-frame files) ----------------
+        self.frame_bar = ctk.CTkFrame(self, fg_color="transparent")
+
+        self.frame_lbl = ctk.CTkLabel(self.frame_bar, text="Frame 1/1", **style["label"])
+        self.frame_lbl.pack(side="left")
+
+        self.frame_slider = ctk.CTkSlider(self.frame_bar, from_=0, to=1, command=self.on_frame_change,
+                                          **style["slider"])
+        self.frame_slider.pack(side="left", padx=8, fill="x", expand=True)
+
+        self.span_lbl = ctk.CTkLabel(self.frame_bar, text="Burn on:", **style["label"])
+        self.span_lbl.pack(side="left", padx=(12, 4))
+
+        self.span_var = tk.StringVar(value=FRAME_SPANS[0])
+        self.opt_span = ctk.CTkOptionMenu(self.frame_bar, variable=self.span_var, width = 130,
+                                          values=list(FRAME_SPANS), **style["option"])
+        self.opt_span.pack(side="left")
+
             
     def cycle_theme(self, direction: int = 1):
         """Cycle through available themes based on current settings."""
@@ -258,160 +611,225 @@ class RedaxApp(ctk.CTk):
         """Apply a new theme from the THEMES dictionary."""
         theme = THEMES.get(value, THEMES["Dark"])
         self.active_theme = theme  # store active theme for later use (e.g. in _render)
+        self._apply_theme(theme)
+        self.settings["theme"] = value
 
-        # ---- Main surfaces ----
+        # ---- Recolor overlays with the new accent colors (image layer is unaffected) ----
+        self._recolor_overlay()
+
+    def _themed_widgets(self) -> Dict[str, list]:
+        """Widgets restyled on a theme change, by :func:`_theme_styles` kind."""
+        return {
+            "button": [self.btn_open, self.btn_save, self.btn_undo, self.btn_redo, self.btn_find, self.btn_burn],
+            "label": [self.status, self.mode_lbl, self.zoom_lbl, self.preset_lbl, self.prof_lbl,
+                      self.mem_lbl, self.frame_lbl, self.span_lbl],
+            "slider": [self.pixel_slider, self.zoom_slider, self.frame_slider],
+            "progress": [self.save_progress],
+            "scrollbar": [self.hbar, self.vbar],
+            "option": [self.opt_mode, self.opt_theme, self.opt_preset, self.opt_span],
+            "checkbox": [self.chk_preview],
+        }
+
+    def _apply_theme(self, theme: dict):
+        """Restyle every widget in one pass: one configure (and redraw) per widget."""
         self.configure(fg_color=theme["bg"])
         self.canvas.configure(bg=theme["bg"])
-
-        # ---- Buttons ----
-        buttons = [self.btn_open, self.btn_save, self.btn_undo,
-                   self.btn_redo, self.btn_burn]
-        for btn in buttons:
-            btn.configure(fg_color=theme["button_fg"],
-                          hover_color=theme["button_hover"],
-                          text_color=theme["button_text"])
-
-        # ---- Labels ----
-        labels = [self.pixel_lbl, self.status, self.mode_lbl, self.zoom_lbl]
-        for lbl in labels:
-            lbl.configure(text_color=theme["label_text"])
-
-
-        # ---- Sliders ----
-        sliders = [self.pixel_slider, self.zoom_slider]
-        for s in sliders:
-            s.configure(progress_color=theme["accent_pixelate"],
-                        button_color=theme["button_fg"],
-                        button_hover_color=theme["button_hover"])
-
-        # ---- Option menus (mode + theme selector) ----
-        option_menus = [self.opt_mode, self.opt_theme]
-        for om in option_menus:
-            om.configure(fg_color=theme["button_fg"],
-                         button_color=theme["button_hover"],
-                         text_color=theme["button_text"])
-
-        # ---- Frames (toolbar/status) ----
-        for child in self.winfo_children():
-            if isinstance(child, ctk.CTkFrame):
-                child.configure(fg_color="transparent")
-
-        # ---- Update pixel label based on mode ----
+        styles = _theme_styles(theme)
+        for kind, widgets in self._themed_widgets().items():
+            for widget in widgets:
+                widget.configure(**styles[kind])
+        self.pixel_lbl.configure(**self._pixel_label_options())
+
+    def _pixel_label_options(self) -> dict:
+        """Text and colour of the strength label for the current mode and theme."""
         if self.mode == "pixelate":
-            self.pixel_lbl.configure(text=f"Pixel {self.pixel_size}",
-                                     text_color=theme["button_text"])
-        else:
-            self.pixel_lbl.configure(text="Pixel (N/A)",
-                                     text_color="gray")
-
-        # ---- Save theme selection (corrected) ----
-        self.settings["theme"] = value
-        save_settings(self.settings)
-
-        # ---- Re-render to apply new accent colors ----
-        self._render()
-
-
-
-
+            return dict(text=f"Pixel {self.pixel_size}", text_color=self.active_theme["button_text"])
+        if self.mode == "blur":
+            return dict(text=f"Blur {self.blur_radius}", text_color=self.active_theme["button_text"])
+        return dict(text="Pixel (N/A)", text_color="gray")
 
     def _bind_keys(self):
         self.bind("<Control-s>", lambda e: self.on_save())
         self.bind("<Control-z>", lambda e: self.on_undo())
         self.bind("<Control-y>", lambda e: self.on_redo())
+        self.bind("<Control-f>", lambda e: self.on_find_matches())
+        self.bind("<Delete>", lambda e: self.on_delete_selected())
+        self.bind("<BackSpace>", lambda e: self.on_delete_selected())
+        self.bind("<Escape>", lambda e: self._select(None))
+        self.bind("<comma>", lambda e: self._step_frame(-1))
+        self.bind("<period>", lambda e: self._step_frame(1))
+        self.bind("<bracketleft>", lambda e: self._mark_frame(start=True))
+        self.bind("<bracketright>", lambda e: self._mark_frame(start=False))
         self.bind("<Control-t>", lambda e: self.cycle_theme(1)) 
         self.bind("<Control-Shift-T>", lambda e: self.cycle_theme(-1))  
         self.bind("<space>", lambda e: self.on_burn())
-        self.bind("b", lambda e: self._set_mode("black"))
-        self.bind("p", lambda e: self._set_mode("pixelate"))
+        self.bind("b", lambda e: self.on_mode_change("black"))
+        self.bind("p", lambda e: self.on_mode_change("pixelate"))
+        self.bind("l", lambda e: self.on_mode_change("blur"))
+        self.bind("v", lambda e: self._toggle_live_preview())
         self.bind("-", lambda e: self._nudge_zoom(-10))
         self.bind("=", lambda e: self._nudge_zoom(10))
 
     # ----------------------- File ops -------------------------
     def on_open(self):
         ftypes = [
-            ("Images", "*.png *.jpg *.jpeg *.webp *.bmp"),
+            ("Images", "*.png *.jpg *.jpeg *.webp *.bmp *.gif *.tif *.tiff"),
             ("PNG", "*.png"),
             ("JPEG", "*.jpg *.jpeg"),
             ("WEBP", "*.webp"),
+            ("GIF", "*.gif"),
+            ("TIFF", "*.tif *.tiff"),
             ("All files", "*.*"),
         ]
         path = filedialog.askopenfilename(title="Open image", filetypes=ftypes)
         if not path:
             return
+
+        # Decode off the UI thread: a reduced preview first (JPEG), then the full image
+        self._load_token += 1
+        self.loading = True
+        self._showing_preview = False
+        self._update_controls()
+        self.status.configure(text=f"Loading: {os.path.basename(path)}…")
+        target = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        threading.Thread(target=self._load_worker, args=(path, self._load_token, target),
+                         daemon=True).start()
+        if not self._load_polling:
+            self._load_polling = True
+            self.after(20, self._poll_load)
+
+    @profiled("load", kind="op")
+    def _load_worker(self, path: str, token: int, target: Tuple[int, int]):
         try:
-            img = Image.open(path)
-            # Convert to RGBA to simplify drawing; also remove orientation EXIF by transposing
-            img = ImageOps.exif_transpose(img).convert("RGBA")
+            preview = open_preview(path, target)
+            if preview is not None:
+                self._load_queue.put((token, "preview", path, preview))
+            frames = open_frames(path)
+            if frames is not None:
+                frames.frame(0)  # decode (and cache) the first frame here, off the UI thread
+                self._load_queue.put((token, "full", path, (frames, self._session_digest(path))))
+                return
+            limit = int(float(self.settings.get("out_of_core_megapixels", 100)) * 1_000_000)
+            img = open_image(path, out_of_core_pixels=limit)
+            self._load_queue.put((token, "full", path, (img, self._session_digest(path))))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to open image:\n{e}")
-            return
+            self._load_queue.put((token, "error", path, e))
+
+    def _poll_load(self):
+        while True:
+            try:
+                token, kind, path, payload = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if token != self._load_token:
+                continue  # superseded by a newer open
+            if kind == "preview":
+                self._show_image(payload, path)
+                self._showing_preview = True
+                self.status.configure(text=f"Loading full resolution: {os.path.basename(path)}…")
+            elif kind == "full":
+                self._finish_load(*payload, path=path)
+            else:
+                self.loading = False
+                if self._showing_preview:
+                    # The preview is all we had; don't leave it around as if it were editable
+                    self._showing_preview = False
+                    self.image = None; self.image_path = None; self._clear_pending()
+                    self._render()
+                self._update_controls()
+                self.status.configure(text="Open an image to begin.")
+                messagebox.showerror("Error", f"Failed to open image:\n{payload}")
+        if self.loading:
+            self.after(20, self._poll_load)
+        else:
+            self._load_polling = False
 
+    def _show_image(self, img: Image.Image, path: str):
+        self._close_journal()
         self.image = img
         self.image_path = path
-        self.pending.clear()
-        self.undo_stack.clear()
-        self.redo_stack.clear()
+        self._clear_pending()
+        self._set_frames(None)
+        self.history.clear()
+        self.pyramid.clear()
         self._update_controls()
         self._fit_to_canvas()
 
         # --- New: Fade-in the rendered image ---
         self._fade_in_render(img)
 
+    @profiled("finish_load")
+    def _finish_load(self, img, path: str, digest: Optional[str] = None):
+        frames = img if isinstance(img, FrameSequence) else None
+        if frames is not None:
+            img = frames.frame(0)  # cached by the loader
+        preview = self.image if self._showing_preview else None
+        self.loading = False
+        self._showing_preview = False
+        if preview is None:
+            self._show_image(img, path)
+        else:
+            # Swap the preview for the full image: map boxes drawn so far to full-res
+            # coordinates and keep the on-screen size where it was
+            fx = img.width / preview.width; fy = img.height / preview.height
+            for box in self.pending:
+                x1, y1, x2, y2 = box.rect
+                box.rect = (int(x1 * fx), int(y1 * fy),
+                            min(img.width, int(x2 * fx + 0.999)), min(img.height, int(y2 * fy + 0.999)))
+            self.pending.reindex()
+            self.fit_scale /= fx
+            self.image = img
+            self._update_controls()
+            if self._fade_job is None:
+                self._render()
+            # else: the running fade hands over to _render when it finishes
+        self._set_frames(frames)
+        resumed = self._open_journal(path, digest)
+        self._update_controls()
+        self._rebuild_pyramid()
+        if isinstance(self.image, DiskImage):
+            note = " | disk-backed"
+        elif frames is not None:
+            note = f" | {frames.n_frames} frames"
+        else:
+            note = ""
+        if resumed:
+            note += f" | {resumed}"
         self.status.configure(
-            text=f"Loaded: {os.path.basename(path)} | {self.image.width}×{self.image.height}"
+            text=f"Loaded: {os.path.basename(path)} | {self.image.width}×{self.image.height}{note}"
         )
 
     def _fade_in_render(self, pil_image, steps=10, delay=10):
-        """Smoothly fade in a PIL image on the canvas, without black showing through transparency."""
+        """Fade a PIL image in on the canvas, without black showing through transparency.
+
+        The flattened frame is built once; each step is a single ``Image.blend`` pasted
+        into the same PhotoImage and scheduled with ``after``, so the UI never blocks.
+        Images above the ``fade_max_megapixels`` setting skip the animation.
+        """
         if not hasattr(self, "canvas"):
             return
+        self._cancel_fade()
+        max_mp = float(self.settings.get("fade_max_megapixels", 12))
+        if isinstance(pil_image, DiskImage) or pil_image.width * pil_image.height > max_mp * 1_000_000:
+            return  # _fit_to_canvas has already rendered the image
 
         # Grab theme background colour
         bg_hex = self.active_theme["bg"].lstrip("#")
         bg_rgb = tuple(int(bg_hex[i:i+2], 16) for i in (0, 2, 4))
 
-        # Prepare image scaled to current zoom
-        display_img = pil_image.resize(
-            (int(pil_image.width * self.fit_scale),
-             int(pil_image.height * self.fit_scale)),
-            Image.Resampling.LANCZOS
-        ).convert("RGBA")
+        # Prepare image scaled to current zoom, flattened onto the theme background
+        size = (max(1, int(pil_image.width * self.fit_scale)),
+                max(1, int(pil_image.height * self.fit_scale)))
+        base = Image.new("RGB", size, bg_rgb)
+        final = display_frame(pil_image, size, bg_rgb)
 
         # Clear existing content once
         self.canvas.delete("all")
+        self.tiles.clear()
+        self._forget_overlay()
 
-        # --- Fade animation ---
-        for i in range(steps + 1):
-            alpha = int(255 * (i / steps))
-
-            # Create the intermediate alpha frame
-            frame = display_img.copy()
-            frame.putalpha(alpha)
-
-            # Flatten onto theme background BEFORE sending to Tk
-            base = Image.new("RGBA", frame.size, bg_rgb + (255,))
-            composited = Image.alpha_composite(base, frame).convert("RGB")
-
-            # Draw on canvas
-            tk_img = ImageTk.PhotoImage(composited)
-            self.display_tk = tk_img
-            self.canvas.create_image(
-                self.canvas.winfo_width() // 2,
-                self.canvas.winfo_height() // 2,
-                image=tk_img,
-                anchor="center",
-                tags="img",
-            )
-
-            self.update_idletasks()
-            self.after(delay)
-
-        # --- Final opaque render to guarantee proper background ---
-        self.canvas.delete("img")
-        final_base = Image.new("RGBA", display_img.size, bg_rgb + (255,))
-        final_composite = Image.alpha_composite(final_base, display_img).convert("RGB")
-        self.display_tk = ImageTk.PhotoImage(final_composite)
+        self._fade_frames = (base, final)
+        self.display_tk = ImageTk.PhotoImage(base)
         self.canvas.create_image(
             self.canvas.winfo_width() // 2,
             self.canvas.winfo_height() // 2,
@@ -419,47 +837,301 @@ class RedaxApp(ctk.CTk):
             anchor="center",
             tags="img",
         )
+        self._fade_job = self.after(delay, self._fade_step, base, final, 1, steps, delay)
 
-        self.update_idletasks()
-
-
+    def _fade_step(self, base, final, i, steps, delay):
+        self.display_tk.paste(Image.blend(base, final, i / steps))
+        if i < steps:
+            self._fade_job = self.after(delay, self._fade_step, base, final, i + 1, steps, delay)
+            return
+        # --- Hand over to the tiled renderer for the final frame ---
+        self._fade_job = None
+        self._fade_frames = ()
+        self._render()
 
+    def _cancel_fade(self):
+        if self._fade_job is not None:
+            self.after_cancel(self._fade_job)
+            self._fade_job = None
+        self._fade_frames = ()
+        self.display_tk = None
 
     def on_save(self):
-        if self.image is None:
+        if self.image is None or self.loading:
+            return
+        if self._save_future is not None and not self._save_future.done():
+            self.status.configure(text="A save is already in progress…")
             return
         initial = self._suggest_output_name()
+        if self.frames is not None:
+            self._save_frames(initial)
+            return
+        if isinstance(self.image, DiskImage):
+            # Disk-backed images are streamed straight from their tiles, and only as PNG
+            initial = os.path.splitext(initial)[0] + ".png"
+            filetypes = [("PNG", "*.png")]
+        else:
+            filetypes = [("PNG", "*.png"), ("JPEG", "*.jpg *.jpeg"), ("WEBP", "*.webp"), ("All", "*.*")]
         path = filedialog.asksaveasfilename(defaultextension=".png", initialfile=initial,
-                                            filetypes=[("PNG", "*.png"), ("JPEG", "*.jpg *.jpeg"), ("All", "*.*")])
+                                            filetypes=filetypes)
+        if not path:
+            return
+        # Encode a snapshot on the worker so editing can carry on meanwhile. Copying a
+        # disk-backed image would double its temp file, so editing pauses instead
+        with PROFILER.span("save.snapshot"):
+            snapshot = self.image if isinstance(self.image, DiskImage) else self.image.copy()
+        preset = self.preset_var.get()
+        self._start_save(path, save_image, snapshot, path, preset)
+
+    def _save_frames(self, initial: str):
+        """Save every frame: the same container as the source is offered first."""
+        kinds = {"GIF": ("GIF", ".gif", "*.gif"), "PNG": ("Animated PNG", ".png", "*.png"),
+                 "TIFF": ("TIFF", ".tif", "*.tif *.tiff")}
+        source = kinds.get(self.frames.format, kinds["PNG"])
+        filetypes = [(source[0], source[2])] + [(k[0], k[2]) for k in kinds.values() if k is not source]
+        path = filedialog.asksaveasfilename(defaultextension=source[1], filetypes=filetypes,
+                                            initialfile=os.path.splitext(initial)[0] + source[1])
         if not path:
             return
+        # Frames are decoded and burned again as they stream into the encoder, so
+        # only the edit list is snapshotted
+        self._start_save(path, save_frames, self.frames, path, self.preset_var.get(),
+                         self.frames.applied_edits())
+
+    def _start_save(self, path: str, fn, *args):
+        self._save_future = self._save_executor.submit(fn, *args)
+        self._update_controls()
+        self.save_progress.pack(side="left", padx=8)
+        self.save_progress.start()
+        # The save belongs to the session it started in, even if another image is open by the time it finishes
+        self._poll_save(path, time.perf_counter(), self.journal)
+
+    def _poll_save(self, path: str, started: float, journal: Optional[SessionJournal]):
+        name = os.path.basename(path)
+        elapsed = time.perf_counter() - started
+        if not self._save_future.done():
+            self.status.configure(text=f"Saving: {name} {elapsed:.1f}s…")
+            self.after(100, self._poll_save, path, started, journal)
+            return
+        self.save_progress.stop()
+        self.save_progress.pack_forget()
+        self._update_controls()
         try:
-            # STRIP metadata by writing fresh image data without EXIF/ICC
-            out = self.image
-            if path.lower().endswith(('.jpg', '.jpeg')):
-                # Convert to RGB for JPEG (no alpha); write without EXIF
-                out = out.convert("RGB")
-                out.save(path, format="JPEG", quality=95, optimize=True)
-            else:
-                out.save(path, format="PNG", optimize=True)
-            self.status.configure(text=f"Saved: {os.path.basename(path)}")
+            self._save_future.result()
         except Exception as e:
+            self.status.configure(text=f"Save failed: {name}")
             messagebox.showerror("Error", f"Failed to save file:\n{e}")
+            return
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        if journal is not None:
+            self._log("saved", path, journal=journal)
+            if journal is not self.journal:
+                journal.close()  # that session was closed while saving; the record reopened it
+        self.status.configure(text=f"Saved: {name} | {size_mb:.1f} MB in {elapsed:.1f}s")
+
+    # --------------------- Session journal ---------------------
+    def _session_digest(self, path: str) -> Optional[str]:
+        """Hash of the source for its journal (worker thread); None when journaling is off."""
+        if not self.settings.get("session_journal", True):
+            return None
+        try:
+            return file_digest(path)
+        except OSError:
+            return None
+
+    def _open_journal(self, path: str, digest: Optional[str]) -> str:
+        """Attach a journal to the image just loaded, offering to resume an unfinished one.
+
+        Returns a short note for the status bar when a session was resumed.
+        """
+        self._close_journal()
+        if digest is None:
+            return ""
+        journal = SessionJournal(path, digest)
+        early = list(self.pending)  # boxes drawn on the preview before the full image arrived
+        note = ""
+        try:
+            header, ops = SessionJournal.read(path)
+            if header is not None:
+                if (header.get("sha256") == digest and SessionJournal.has_work(ops)
+                        and messagebox.askyesno("Resume session",
+                                                f"{os.path.basename(path)} has unsaved redactions from an "
+                                                f"earlier session.\n\nResume them?")):
+                    note = self._resume_session(journal, ops)
+                else:
+                    journal.discard()  # different source, already saved, or declined
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Session journal for {path} ignored: {e}")
+            return ""
+        self.journal = journal
+        if early:
+            self._log("add_boxes", early)
+        return note
+
+    def _resume_session(self, journal: SessionJournal, ops: List[dict]) -> str:
+        result = journal.replay(ops, self.image, self.history, self.frames)
+        self.image = result.image  # a checkpoint replay starts from a fresh image
+        for box in result.pending.values():
+            self.pending.append(box)
+        if self.frames is not None:
+            self._refresh_frame()
+        elif self._fade_job is None:
+            self._redraw_image()
+        # else: the fade hands over to _render, which draws the replayed pixels
+        return f"resumed {result.burns} burn(s), {len(result.pending)} pending box(es)"
+
+    def _log(self, op: str, *args, journal: Optional[SessionJournal] = None):
+        """Append ``op`` to the session journal (or to ``journal``, an earlier one);
+        the current journal is switched off if it can't be written."""
+        journal = journal or self.journal
+        if journal is None:
+            return
+        try:
+            getattr(journal, op)(*args)
+        except OSError as e:
+            if journal is self.journal:
+                self.journal = None
+                self.status.configure(text=f"Session journal off: {e}")
+
+    def _close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def on_preset_change(self, value):
+        self.settings["save_preset"] = value
 
     def _suggest_output_name(self) -> str:
-        if not self.image_path:
-            return "redacted.png"
-        stem, ext = os.path.splitext(os.path.basename(self.image_path))
-        return f"{stem}.redacted.png"
+        return suggest_output_name(self.image_path)
+
+    # ------------------------ Frames --------------------------
+    def _set_frames(self, frames: Optional[FrameSequence]):
+        """Show the scrubber for ``frames``, or hide it for a single image."""
+        if self.frames is not None and self.frames is not frames:
+            self.frames.close()
+        self.frames = frames
+        self.frame_index = self._frame_target = 0
+        if frames is None:
+            self.frame_bar.pack_forget()
+            return
+        last = frames.n_frames - 1
+        self.frame_range = (0, last)
+        self.frame_slider.configure(from_=0, to=last, number_of_steps=last)
+        self.frame_slider.set(0)
+        self.frame_bar.pack(side="bottom", fill="x", padx=6, pady=(0, 4))
+        self._update_frame_label()
+
+    def _update_frame_label(self, index: Optional[int] = None):
+        if self.frames is None:
+            return
+        index = self.frame_index if index is None else index
+        first, last = self.frame_range
+        self.frame_lbl.configure(text=f"Frame {index + 1}/{self.frames.n_frames} | marks {first + 1}–{last + 1}")
+
+    def _frame_span(self) -> Tuple[int, int]:
+        span = self.span_var.get()
+        if span == "This frame":
+            return self.frame_index, self.frame_index
+        if span == "Marked range":
+            return self.frame_range
+        return 0, self.frames.n_frames - 1
+
+    def _mark_frame(self, start: bool):
+        """Set the start (``[``) or end (``]``) of the marked range to the current frame."""
+        if self.frames is None:
+            return
+        first, last = self.frame_range
+        i = self.frame_index
+        self.frame_range = (i, max(i, last)) if start else (min(first, i), i)
+        self.span_var.set("Marked range")
+        self._update_frame_label()
+
+    def _step_frame(self, delta: int):
+        if self.frames is None:
+            return
+        target = max(0, min(self.frames.n_frames - 1, self._frame_target + delta))
+        self.frame_slider.set(target)
+        self.on_frame_change(target)
+
+    def on_frame_change(self, value):
+        """Scrubber moved: decode that frame on the worker, skipping any the slider passes
+        while a decode is still running."""
+        if self.frames is None or self.loading:
+            return
+        self._frame_target = int(round(float(value)))
+        self._update_frame_label(self._frame_target)
+        if self._frame_future is None:
+            self._request_frame()
+
+    def _refresh_frame(self):
+        """Decode the current frame again after the edit list changed."""
+        self._frame_target = self.frame_index
+        self._frame_stale = True
+        if self._frame_future is None:
+            self._request_frame()
+
+    def _request_frame(self):
+        frames, index = self.frames, self._frame_target
+        self._frame_stale = False
+        self._frame_future = self._frame_executor.submit(frames.frame, index)
+        self.after(15, self._poll_frame, frames, index)
+
+    def _poll_frame(self, frames: FrameSequence, index: int):
+        if not self._frame_future.done():
+            self.after(15, self._poll_frame, frames, index)
+            return
+        future, self._frame_future = self._frame_future, None
+        if frames is self.frames:  # else another file was opened meanwhile
+            try:
+                self._show_frame(index, future.result())
+            except Exception as e:
+                self._frame_target = self.frame_index
+                self.frame_slider.set(self.frame_index)
+                self._update_frame_label()
+                self.status.configure(text=f"Could not decode frame {index + 1}: {e}")
+                return
+        if self.frames is not None and (self._frame_stale or self._frame_target != self.frame_index):
+            self._request_frame()
+
+    @profiled("show_frame")
+    def _show_frame(self, index: int, img: Image.Image):
+        # Pending boxes stay put, so they can be checked against every frame before burning
+        resized = self.image is None or self.image.size != img.size
+        self.frame_index = index
+        self.image = img
+        self._rebuild_pyramid()
+        if resized:
+            self._fit_to_canvas()  # multi-page TIFFs can mix page sizes
+        else:
+            self._redraw_image()
+        self._update_frame_label()
 
     # ------------------------ Zoom ----------------------------
     def on_zoom_change(self, value):
-        self.zoom = float(value) / 100.0
-        self._render()
+        self._set_zoom(float(value) / 100.0)
 
-    def _nudge_zoom(self, delta_percent: int):
+    def _nudge_zoom(self, delta_percent: int, pointer: Optional[Tuple[int, int]] = None):
         val = max(25, min(300, int(self.zoom * 100) + delta_percent))
-        self.zoom_slider.set(val); self.on_zoom_change(val)
+        self.zoom_slider.set(val); self._set_zoom(val / 100.0, pointer)
+
+    def _set_zoom(self, zoom: float, pointer: Optional[Tuple[int, int]] = None):
+        """Change zoom, keeping the image point under ``pointer`` (or the view centre) still.
+
+        The view is not redrawn here: a burst of wheel steps is merged into one
+        preview per frame, and the full render follows once the input settles.
+        """
+        if not self.image:
+            self.zoom = zoom
+            return
+        anchor = None
+        if self._render_anchor is None:
+            # With a render still pending the canvas shows an older zoom, so the
+            # first anchor of the burst is kept instead
+            wx, wy = pointer or (self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2)
+            ix, iy = self._canvas_to_img(self.canvas.canvasx(wx), self.canvas.canvasy(wy))
+            anchor = (ix, iy, wx, wy)
+        self.zoom = zoom
+        self._schedule_render("preview", anchor)
 
     def _fit_to_canvas(self):
         if not self.image:
@@ -475,54 +1147,462 @@ class RedaxApp(ctk.CTk):
         self.zoom_slider.set(100)
         self._render()
 
+    # ----------------------- Scheduling -----------------------
+    # Input handlers ask for a render instead of doing one. Requests are merged
+    # until the next frame (the strongest kind and the first anchor win), so a
+    # burst of events costs one render and superseded ones are never run
+    def _schedule_render(self, kind: str = "full", anchor: Optional[Tuple[int, int, int, int]] = None):
+        if anchor is not None and self._render_anchor is None:
+            self._render_anchor = anchor
+        if self._render_kind is None or _RENDER_RANK[kind] > _RENDER_RANK[self._render_kind]:
+            self._render_kind = kind
+        if self._render_job is None:
+            self._render_job = self.after(RENDER_FRAME_MS, self._run_render)
+        if kind == "preview":
+            if self._settle_job is not None:
+                self.after_cancel(self._settle_job)
+            self._settle_job = self.after(RENDER_SETTLE_MS, self._settle_render)
+
+    def _run_render(self):
+        self._render_job = None
+        kind, self._render_kind = self._render_kind, None
+        anchor, self._render_anchor = self._render_anchor, None
+        if kind == "full":
+            self._render(anchor)
+        elif kind == "preview":
+            self._render_preview(anchor)
+        else:
+            self._relayout()
+
+    def _settle_render(self):
+        self._settle_job = None
+        self._schedule_render("full")
+
+    def _flush_render(self):
+        """Run a pending render now, e.g. before mapping a click to image coordinates."""
+        if self._render_job is not None:
+            self.after_cancel(self._render_job)
+            self._run_render()
+
+    def _drop_scheduled_render(self):
+        """A full render is happening anyway: anything still queued is stale."""
+        for job in (self._render_job, self._settle_job):
+            if job is not None:
+                self.after_cancel(job)
+        self._render_job = self._settle_job = None
+        self._render_kind = self._render_anchor = None
+
     # ----------------------- Rendering ------------------------
-    def _render(self):
+    def _apply_anchor(self, anchor: Optional[Tuple[int, int, int, int]]):
+        if anchor:
+            ix, iy, wx, wy = anchor
+            cx, cy = self._img_to_canvas(ix, iy)
+            _, _, rw, rh = self._scroll_region()
+            self.canvas.xview_moveto((cx - wx) / rw)
+            self.canvas.yview_moveto((cy - wy) / rh)
+
+    @profiled("render")
+    def _render(self, anchor: Optional[Tuple[int, int, int, int]] = None):
+        """Rebuild both layers; only needed when the scale changes. ``anchor`` is
+        (ix, iy, wx, wy): scroll so image point (ix, iy) ends up at window position (wx, wy)."""
+        self._drop_scheduled_render()
+        self._cancel_fade()
         self.canvas.delete("all")
+        self.tiles.clear()
+        self._forget_overlay()
+        self._preview_tk = None
+        if not self.image:
+            self.canvas.configure(scrollregion=(0, 0, 0, 0))
+            return
+        self._layout()
+        self._apply_anchor(anchor)
+        self._update_tiles()
+
+    @profiled("render_preview", kind="frame")
+    def _render_preview(self, anchor: Optional[Tuple[int, int, int, int]] = None):
+        """Cheap stand-in for :meth:`_render` while the zoom is still changing.
+
+        The visible area becomes one canvas image, sampled from a pyramid level
+        half as fine as the scale needs, so each step is one small resize and
+        one upload instead of a tile grid.
+        """
+        self._cancel_fade()
+        self.canvas.delete("all")
+        self.tiles.clear()
+        self._forget_overlay()
+        self._preview_tk = None
+        if not self.image:
+            return
+        self._layout()
+        self._apply_anchor(anchor)
+        w, h = self._display_size()
+        ox, oy = self.origin
+        x0 = max(0, int(self.canvas.canvasx(0)) - ox); y0 = max(0, int(self.canvas.canvasy(0)) - oy)
+        x1 = min(w, x0 + self.canvas.winfo_width()); y1 = min(h, y0 + self.canvas.winfo_height())
+        if x1 > x0 and y1 > y0:
+            pixels = self.pyramid.sample(self.image, self.fit_scale * self.zoom, (x0, y0, x1, y1), coarser=1)
+            self._preview_tk = ImageTk.PhotoImage(pixels)
+            self.canvas.create_image(ox + x0, oy + y0, anchor="nw", image=self._preview_tk,
+                                     tags=("img", "preview"))
+        self._update_overlay()
+
+    # Overlay layer: pending-box outlines, edited without touching the image tiles.
+    # Only boxes in (or near) the view have an outline; see _update_overlay
+    def _box_color(self, mode: str) -> str:
+        return self.active_theme[f"accent_{mode}"]
+
+    def _draw_box(self, box: PendingBox):
+        cx1, cy1 = self._img_to_canvas(box.rect[0], box.rect[1])
+        cx2, cy2 = self._img_to_canvas(box.rect[2], box.rect[3])
+        box.canvas_id = self.canvas.create_rectangle(cx1, cy1, cx2, cy2, outline=self._box_color(box.mode),
+                                                     width=4 if box is self.selected else 2, tags=("box",))
+        self._drawn[id(box)] = box
+
+    def _forget_overlay(self):
+        """The canvas was cleared: no box has an outline any more."""
+        for box in self._drawn.values():
+            box.canvas_id = None
+        self._drawn.clear()
+
+    def _redraw_overlay(self):
+        self.canvas.delete("box")
+        self._forget_overlay()
+        self._update_overlay()
+
+    def _update_overlay(self):
+        """Outline boxes that came into view (plus a tile of margin) and drop the rest."""
+        if not self.image:
+            return
+        cw = self.canvas.winfo_width(); ch = self.canvas.winfo_height()
+        x0, y0 = self._canvas_to_img(self.canvas.canvasx(0) - TILE_SIZE, self.canvas.canvasy(0) - TILE_SIZE)
+        x1, y1 = self._canvas_to_img(self.canvas.canvasx(cw) + TILE_SIZE, self.canvas.canvasy(ch) + TILE_SIZE)
+        visible = {id(box): box for box in self.pending.query((x0, y0, x1, y1))}
+        for key in [k for k in self._drawn if k not in visible]:
+            box = self._drawn.pop(key)
+            if box.canvas_id is not None:
+                self.canvas.delete(box.canvas_id)
+                box.canvas_id = None
+        for key, box in visible.items():
+            if key not in self._drawn:
+                self._draw_box(box)
+
+    def _recolor_overlay(self):
+        for box in self._drawn.values():
+            if box.canvas_id is not None:
+                self.canvas.itemconfigure(box.canvas_id, outline=self._box_color(box.mode))
+
+    def _clear_pending(self):
+        self.pending.clear()
+        self.selected = None
+        self._drag_box = None
+
+    def _select(self, box: Optional[PendingBox]):
+        previous, self.selected = self.selected, box
+        for b, width in ((previous, 2), (box, 4)):
+            if b is not None and b.canvas_id is not None:
+                self.canvas.itemconfigure(b.canvas_id, width=width)
+
+    def on_delete_selected(self):
+        box = self.selected
+        if box is None:
+            return
+        self._select(None)
+        self.pending.remove(box)
+        self._log("delete_box", box)
+        self._schedule_effects()
+        self._drawn.pop(id(box), None)
+        if box.canvas_id is not None:
+            self.canvas.delete(box.canvas_id)
+            box.canvas_id = None
+        self._update_controls()
+
+    def on_canvas_configure(self, event):
+        """Resizes are merged into one re-layout per frame (see _schedule_render)."""
+        if self.image:
+            self._schedule_render("layout")
+
+    def _relayout(self):
+        """Resizing keeps the scale, so just re-centre the existing items."""
         if not self.image:
             return
-        # Compose display image
+        if self.display_tk is not None:
+            # Fade still running: skip the rest of it and render properly
+            self._render()
+            return
+        old_x, old_y = self.origin
+        self._layout()
+        dx = self.origin[0] - old_x; dy = self.origin[1] - old_y
+        if dx or dy:
+            self.canvas.move("all", dx, dy)
+        self._update_tiles()
+
+    def _display_size(self) -> Tuple[int, int]:
         scale = self.fit_scale * self.zoom
-        w = max(1, int(self.image.width * scale))
-        h = max(1, int(self.image.height * scale))
-        self.display_image = self.image.resize((w, h), Image.NEAREST)
-        self.display_tk = ImageTk.PhotoImage(self.display_image)
+        return max(1, int(self.image.width * scale)), max(1, int(self.image.height * scale))
+
+    def _scroll_region(self) -> Tuple[int, int, int, int]:
+        w, h = self._display_size()
+        return 0, 0, max(w, self.canvas.winfo_width()), max(h, self.canvas.winfo_height())
 
-        # Center in canvas
+    def _layout(self):
+        """Size the scroll region and centre the image when it is smaller than the canvas."""
+        w, h = self._display_size()
         cw = self.canvas.winfo_width(); ch = self.canvas.winfo_height()
-        x = (cw - w) // 2; y = (ch - h) // 2
-        self.canvas.create_image(x, y, anchor="nw", image=self.display_tk, tags=("img",))
+        self.origin = (max(0, (cw - w) // 2), max(0, (ch - h) // 2))
+        self.canvas.configure(scrollregion=self._scroll_region())
 
-        # Re-draw pending boxes overlaid (scaled to current zoom)
-        for box in self.pending:
-            cx1, cy1 = self._img_to_canvas(box.rect[0], box.rect[1])
-            cx2, cy2 = self._img_to_canvas(box.rect[2], box.rect[3])
-            color = "#00d1b2" if box.mode == "pixelate" else "#ff5555"
-            box.canvas_id = self.canvas.create_rectangle(cx1, cy1, cx2, cy2, outline=color, width=2)
+    @profiled("update_tiles", kind="frame")
+    def _update_tiles(self):
+        """Create tiles that scrolled into view and drop those far outside it.
+
+        Existing tiles are never resampled here, so panning only moves the view.
+        """
+        if not self.image:
+            return
+        w, h = self._display_size()
+        ox, oy = self.origin
+        cols, rows = self._visible_tiles()
+
+        # Keep a one-tile margin around the view so small pans back and forth stay free
+        for key in list(self.tiles):
+            col, row = key
+            if not (cols.start - 1 <= col <= cols.stop and rows.start - 1 <= row <= rows.stop):
+                self.canvas.delete(self.tiles.pop(key).item)
+
+        new = {}
+        for row in rows:
+            for col in cols:
+                if (col, row) in self.tiles:
+                    continue
+                x0 = col * TILE_SIZE; y0 = row * TILE_SIZE
+                rect = (x0, y0, min(x0 + TILE_SIZE, w), min(y0 + TILE_SIZE, h))
+                new[(col, row)] = (rect, self._tile_effects(rect))
+        for key, pixels in zip(new, self._tiles_pixels(list(new.values()))):
+            (x0, y0, x1, y1), effects = new[key]
+            with PROFILER.span("tile.photo", bytes=pixels.width * pixels.height * len(pixels.getbands())):
+                photo = ImageTk.PhotoImage(pixels)
+            with PROFILER.span("tile.canvas"):
+                item = self.canvas.create_image(ox + x0, oy + y0, anchor="nw", image=photo,
+                                                tags=("img", "tile"))
+            self.tiles[key] = ViewTile(photo, item, (x0, y0, x1, y1), effects)
+        if new:
+            # New tiles must sit beneath the pending-box outlines
+            self.canvas.tag_lower("tile")
+        self._update_overlay()
+
+    def _visible_tiles(self) -> Tuple[range, range]:
+        """Columns and rows of the tiles the view currently shows."""
+        w, h = self._display_size()
+        ox, oy = self.origin
+        vx0 = self.canvas.canvasx(0) - ox; vy0 = self.canvas.canvasy(0) - oy
+        vx1 = vx0 + self.canvas.winfo_width(); vy1 = vy0 + self.canvas.winfo_height()
+        cols = range(max(0, int(vx0 // TILE_SIZE)), min((w - 1) // TILE_SIZE, int(vx1 // TILE_SIZE)) + 1)
+        rows = range(max(0, int(vy0 // TILE_SIZE)), min((h - 1) // TILE_SIZE, int(vy1 // TILE_SIZE)) + 1)
+        return cols, rows
+
+    def _tile_pixels(self, x0: int, y0: int, x1: int, y1: int, effects: tuple = ()) -> Image.Image:
+        """Resample display rect (x0, y0)-(x1, y1) from the nearest pyramid level
+        at or above the current scale, falling back to the original, with the
+        previewed ``effects`` drawn in."""
+        scale = self.fit_scale * self.zoom
+
+        def sample(rect):
+            return self.pyramid.sample(self.image, scale, rect)
+
+        if not effects:
+            return sample((x0, y0, x1, y1))
+        block, radius = self._preview_strengths()
+        return preview_region(sample, (x0, y0, x1, y1), self._display_size(),
+                              [(mode, pieces) for mode, pieces, _ in effects], block, radius)
+
+    # Live preview: pending boxes are drawn into the tiles as they will burn,
+    # computed from the display-resolution pixels; self.image is only touched by Burn
+    def _preview_strengths(self) -> Tuple[float, int]:
+        """Pixel size and blur radius at the current scale."""
+        scale = self.fit_scale * self.zoom
+        return max(1.0, self.pixel_size * scale), max(1, round(self.blur_radius * scale))
+
+    def _tile_effects(self, rect: Tuple[int, int, int, int]) -> tuple:
+        """The pending-box groups (with their strength) previewed in display ``rect``;
+        a tile is redrawn when this changes."""
+        if not self.live_preview or not self.pending:
+            return ()
+        scale = self.fit_scale * self.zoom
+        key = (self.pending.version, scale, self.image.size)
+        if key != self._groups_key:
+            self._groups = display_groups(burn_groups(self.pending, self.image.size), scale, self._display_size())
+            self._groups_key = key
+        block, radius = self._preview_strengths()
+        strength = {"pixelate": block, "blur": radius, "black": 0}
+        return tuple((mode, pieces, strength[mode])
+                     for mode, pieces in groups_in(self._groups, rect, preview_margin(block, radius)))
+
+    def _tiles_pixels(self, tiles: List[Tuple[Tuple[int, int, int, int], tuple]]) -> List[Image.Image]:
+        """Pixels for each ``(rect, effects)``. Tiles with previewed boxes are cut from
+        one region covering them all, so a box spanning many tiles (and its blur
+        margin) is processed once rather than once per tile."""
+        out: List[Optional[Image.Image]] = [None] * len(tiles)
+        previewed = [i for i, (_, effects) in enumerate(tiles) if effects]
+        if len(previewed) > 1:
+            rects = [tiles[i][0] for i in previewed]
+            x0 = min(r[0] for r in rects); y0 = min(r[1] for r in rects)
+            x1 = max(r[2] for r in rects); y1 = max(r[3] for r in rects)
+            # Groups must still be applied in burn order, whichever tile they came from
+            order = {group: n for n, group in enumerate(self._groups)}
+            effects = tuple(sorted(dict.fromkeys(e for i in previewed for e in tiles[i][1]),
+                                   key=lambda e: order[e[:2]]))
+            pixels = self._tile_pixels(x0, y0, x1, y1, effects)
+            for i, (rx0, ry0, rx1, ry1) in zip(previewed, rects):
+                out[i] = pixels.crop((rx0 - x0, ry0 - y0, rx1 - x0, ry1 - y0))
+        return [pixels if pixels is not None else self._tile_pixels(*rect, effects)
+                for pixels, (rect, effects) in zip(out, tiles)]
+
+    def _schedule_effects(self):
+        """Pending boxes or strengths changed: update the preview on the next frame."""
+        if self._effects_job is None and self.image:
+            self._effects_job = self.after(RENDER_FRAME_MS, self._refresh_effects)
+
+    @profiled("refresh_effects", kind="frame")
+    def _refresh_effects(self):
+        """Redraw only the tiles whose previewed boxes changed, pasting into their PhotoImage."""
+        self._effects_job = None
+        if not self.image:
+            return
+        changed = []
+        for tile in self.tiles.values():
+            effects = self._tile_effects(tile.rect)
+            if effects != tile.effects:
+                changed.append((tile, effects))
+        for (tile, effects), pixels in zip(changed, self._tiles_pixels([(t.rect, e) for t, e in changed])):
+            tile.photo.paste(pixels)
+            tile.effects = effects
+
+    def _toggle_live_preview(self):
+        self.preview_var.set(not self.live_preview)
+        self.on_live_preview_toggle()
+
+    def on_live_preview_toggle(self):
+        self.live_preview = bool(self.preview_var.get())
+        self.settings["live_preview"] = self.live_preview
+        self._schedule_effects()
+
+    def _redraw_image(self):
+        """Drop every tile so the visible ones are resampled from current pixels."""
+        self.canvas.delete("tile")
+        self.tiles.clear()
+        self._update_tiles()
+
+    @profiled("patch_tiles", kind="frame")
+    def _patch_tiles(self, rects: List[Tuple[int, int, int, int]]):
+        """Resample only the tiles showing image ``rects`` (plus those whose previewed
+        boxes changed) and paste them into their PhotoImages; the rest of the view,
+        and the canvas items, stay as they are. The cost follows the size of the
+        change on screen, not the size of the image."""
+        if not self.image:
+            return
+        touched = set(tiles_touched([tile.rect for tile in self.tiles.values()], rects, self.fit_scale * self.zoom))
+        changed = []
+        for tile in self.tiles.values():
+            effects = self._tile_effects(tile.rect)
+            if effects != tile.effects or tile.rect in touched:
+                changed.append((tile, effects))
+        for (tile, effects), pixels in zip(changed, self._tiles_pixels([(t.rect, e) for t, e in changed])):
+            tile.photo.paste(pixels)
+            tile.effects = effects
+        self._update_overlay()  # drops the outlines of boxes that were just burned
+
+    def _rebuild_pyramid(self):
+        self.pyramid.build(self.image)
+        if not self._pyramid_polling:
+            self._pyramid_polling = True
+            self.after(100, self._poll_pyramid)
+
+    def _poll_pyramid(self):
+        if not self.pyramid.ready:
+            self.after(100, self._poll_pyramid)
+            return
+        self._pyramid_polling = False
+        # Zoomed-out tiles were sampled from the original; redo them from the pyramid
+        if self.image and self.fit_scale * self.zoom <= 0.5:
+            self._redraw_image()
+
+    def _on_xscroll(self, *args):
+        self.canvas.xview(*args)
+        self._update_tiles()
+
+    def _on_yscroll(self, *args):
+        self.canvas.yview(*args)
+        self._update_tiles()
+
+    def on_pan_start(self, event):
+        self.canvas.scan_mark(event.x, event.y)
+
+    def on_pan_drag(self, event):
+        if not self.image:
+            return
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        self._update_tiles()
 
     # ----------------------- Mouse ops ------------------------
     def on_mouse_down(self, event):
         if not self.image:
             return
-        self.draw_start = (event.x, event.y)
+        self._flush_render()  # the click must map through the zoom that is about to show
+        cx, cy = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
         if self.temp_rect_id:
             self.canvas.delete(self.temp_rect_id); self.temp_rect_id = None
+        # Pressing on a pending box picks it up; Shift always starts a new box
+        if not getattr(event, "state", 0) & 0x0001:
+            ix, iy = self._canvas_to_img(cx, cy)
+            hit = self.pending.hit(ix, iy, tolerance=3 / (self.fit_scale * self.zoom))
+            if hit is not None:
+                self._select(hit)
+                self._drag_box = (hit, hit.rect, cx, cy)
+                self.draw_start = None
+                return
+        self._select(None)
+        self.draw_start = (cx, cy)
 
     def on_mouse_drag(self, event):
+        if self._drag_box is not None:
+            self._move_selected(event)
+            return
         if not self.image or not self.draw_start:
             return
         x1, y1 = self.draw_start
-        x2, y2 = event.x, event.y
+        x2, y2 = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
         if self.temp_rect_id:
             self.canvas.coords(self.temp_rect_id, x1, y1, x2, y2)
         else:
-            color = "#00d1b2" if self.mode == "pixelate" else "#ff5555"
-            self.temp_rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline=color, width=2, dash=(4,2))
+            self.temp_rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline=self._box_color(self.mode),
+                                                             width=2, dash=(4,2))
+
+    def _move_selected(self, event):
+        box, (x1, y1, x2, y2), px, py = self._drag_box
+        scale = self.fit_scale * self.zoom
+        dx = round((self.canvas.canvasx(event.x) - px) / scale)
+        dy = round((self.canvas.canvasy(event.y) - py) / scale)
+        # Keep the whole box on the image
+        dx = max(-x1, min(self.image.width - x2, dx))
+        dy = max(-y1, min(self.image.height - y2, dy))
+        self.pending.update(box, (x1 + dx, y1 + dy, x2 + dx, y2 + dy))
+        if box.canvas_id is not None:
+            cx1, cy1 = self._img_to_canvas(box.rect[0], box.rect[1])
+            cx2, cy2 = self._img_to_canvas(box.rect[2], box.rect[3])
+            self.canvas.coords(box.canvas_id, cx1, cy1, cx2, cy2)
+        self._schedule_effects()
 
     def on_mouse_up(self, event):
+        if self._drag_box is not None:
+            box, start, _, _ = self._drag_box
+            self._drag_box = None
+            if box.rect != start:
+                self._log("move_box", box)
+            return
         if not self.image or not self.draw_start:
             return
         x1, y1 = self.draw_start
-        x2, y2 = event.x, event.y
+        x2, y2 = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
         self.draw_start = None
         if self.temp_rect_id:
             self.canvas.delete(self.temp_rect_id); self.temp_rect_id = None
@@ -536,106 +1616,200 @@ class RedaxApp(ctk.CTk):
             return
         pb = PendingBox(rect=(x1i, y1i, x2i, y2i), mode=self.mode)
         self.pending.append(pb)
-        self._update_controls(); self._render()
+        self._log("add_boxes", [pb])
+        self._draw_box(pb)
+        self._schedule_effects()
+        self._update_controls()
 
     # ------------------------ Actions -------------------------
+    @profiled("burn", kind="op")
     def on_burn(self):
-        if not self.image or not self.pending:
+        if not self.image or not self.pending or self.loading or self._saving_in_place():
             return
-        # Push to undo stack (copy image to preserve state)
-        self.undo_stack.append(self.image.copy())
-        self.redo_stack.clear()
-
-        draw = ImageDraw.Draw(self.image)
-        for box in self.pending:
-            x1, y1, x2, y2 = box.rect
-            if box.mode == "black":
-                draw.rectangle([x1, y1, x2, y2], fill=(0,0,0,255))
-            else:
-                # Pixelate region deterministically by block size
-                region = self.image.crop((x1, y1, x2, y2))
-                w, h = region.size
-                k = max(1, int(min(w, h) // max(4, self.pixel_size)))
-                small = region.resize((max(1, w // k), max(1, h // k)), Image.NEAREST)
-                pix = small.resize((w, h), Image.NEAREST)
-                self.image.paste(pix, (x1, y1))
-        self.pending.clear()
-        self._update_controls(); self._render()
+        if self.frames is not None:
+            self._burn_frames()
+            return
+        # Save only the pixels about to change so undo can put them back
+        rects = affected_rects(self.pending, self.image.size)
+        self.history.record(self.image, rects)
+
+        burn_boxes(self.image, self.pending, self.pixel_size, self.blur_radius)
+        self._edits += 1
+        self.pyramid.patch(self.image, rects)
+        self._clear_pending()
+        self._log("burn", self.pixel_size, None, self.blur_radius)
+        self._log("maybe_checkpoint", self.image, self._save_executor)
+        self._update_controls(); self._patch_tiles(rects)
+        self._update_memory()
         self.status.configure(text=f"Burned redactions. Undo available (Ctrl+Z)")
 
+    @profiled("undo", kind="op")
     def on_undo(self):
-        if not self.undo_stack:
+        if not self.image or not self._undo_log().can_undo or self._saving_in_place():
             return
-        self.redo_stack.append(self.image.copy())
-        self.image = self.undo_stack.pop()
-        self.pending.clear()
-        self._update_controls(); self._render()
-
+        self._log("undo")
+        if self.frames is not None:
+            self.frames.undo()
+            self._clear_pending()
+            self._refresh_frame()
+            self._update_controls()
+            return
+        rects = self.history.undo(self.image)
+        self._edits += 1
+        self._clear_pending()
+        self.pyramid.patch(self.image, rects)
+        self._update_controls(); self._patch_tiles(rects)
+        self._update_memory()
+
+    @profiled("redo", kind="op")
     def on_redo(self):
-        if not self.redo_stack:
+        if not self.image or not self._undo_log().can_redo or self._saving_in_place():
             return
-        self.undo_stack.append(self.image.copy())
-        self.image = self.redo_stack.pop()
-        self.pending.clear()
-        self._update_controls(); self._render()
+        self._log("redo")
+        if self.frames is not None:
+            self.frames.redo()
+            self._clear_pending()
+            self._refresh_frame()
+            self._update_controls()
+            return
+        rects = self.history.redo(self.image)
+        self._edits += 1
+        self._clear_pending()
+        self.pyramid.patch(self.image, rects)
+        self._update_controls(); self._patch_tiles(rects)
+        self._update_memory()
+
+    def _burn_frames(self):
+        """Record the pending boxes as an edit over the chosen frames.
+
+        The frame on screen is burned directly so the result shows at once;
+        every other frame picks the edit up when it is next decoded or saved.
+        """
+        first, last = self._frame_span()
+        self.frames.apply(self.pending, self.pixel_size, first, last, self.blur_radius)
+        self._log("burn", self.pixel_size, (first, last), self.blur_radius)
+        rects = []
+        if first <= self.frame_index <= last:
+            rects = affected_rects(self.pending, self.image.size)
+            burn_boxes(self.image, self.pending, self.pixel_size, self.blur_radius)
+            self._edits += 1
+            self.pyramid.patch(self.image, rects)
+        self._clear_pending()
+        self._update_controls(); self._patch_tiles(rects)
+        self.status.configure(text=f"Burned redactions on frames {first + 1}–{last + 1}. Undo available (Ctrl+Z)")
+
+    def on_find_matches(self):
+        """Add a pending box over every other place that looks like the selected (or last) pending box.
+
+        The search runs off the UI thread; :meth:`_poll_find` adds the boxes.
+        """
+        if (not self.image or not self.pending or self.loading or self._saving_in_place()
+                or isinstance(self.image, DiskImage) or self._finding()):
+            return
+        template = self.selected or self.pending[-1]
+        threshold = float(self.settings.get("match_threshold", 0.9))
+        self._find_future = self._frame_executor.submit(find_matches, self.image, template.rect, threshold)
+        self._update_controls()
+        self.status.configure(text="Finding matches…")
+        self._poll_find(template.mode, self.image, self._edits)
 
-    def on_mode_change(self, value):
-        if value == "pixelate":
-            self.pixel_slider.configure(state="normal")
-            self.pixel_lbl.configure(text=f"Pixel {self.pixel_size}", text_color="white")
-        else:
-            self.pixel_slider.configure(state="disabled")
-            self.pixel_lbl.configure(text="Pixel (N/A)", text_color="gray")
+    def _finding(self) -> bool:
+        return self._find_future is not None and not self._find_future.done()
+
+    def _poll_find(self, mode: str, image, edits: int):
+        if not self._find_future.done():
+            self.after(50, self._poll_find, mode, image, edits)
+            return
+        self._update_controls()
+        if self.image is not image or self._edits != edits:
+            # Burned, undone or replaced while searching: the matches describe other pixels
+            self.status.configure(text="Image changed while searching; find matches again")
+            return
+        try:
+            found = self._find_future.result()
+        except ValueError as e:
+            self.status.configure(text=str(e))
+            return
+        added = []
+        for rect in found:
+            # Skip spots that already have a box (e.g. from an earlier search)
+            if any(rect_overlap(rect, box.rect) > 0.5 for box in self.pending.query(rect)):
+                continue
+            box = PendingBox(rect=rect, mode=mode)
+            self.pending.append(box)
+            added.append(box)
+        self._log("add_boxes", added)
+        self._update_overlay()
+        self._schedule_effects()
+        self._update_controls()
+        self.status.configure(text=f"Found {len(found)} match(es); added {len(added)} box(es). Burn to apply")
 
+    def on_mode_change(self, value):
+        if value not in MODES:
+            return
         self.settings["mode"] = value
-        save_settings(self.settings)
         self._set_mode(value)
-
-
+        # One slider serves both strengths: pixel size for pixelate, radius for blur
+        if self.mode in ("pixelate", "blur"):
+            self.pixel_slider.set(self.pixel_size if self.mode == "pixelate" else self.blur_radius)
+        self.pixel_slider.configure(state="normal" if self.mode != "black" else "disabled")
+        self.pixel_lbl.configure(**self._pixel_label_options())
 
     def _set_mode(self, mode: str):
-        if mode not in ("black", "pixelate"):
+        if mode not in MODES:
             return
         self.mode = mode
         self.mode_var.set(mode)
-        self._render()
 
     def on_pixel_change(self, value):
-        self.pixel_size = int(float(value))
-        self.pixel_lbl.configure(text=f"Pixel {self.pixel_size}")
-        
-        self.settings["pixel"] = self.pixel_size
-        save_settings(self.settings)
+        if self.mode == "blur":
+            self.blur_radius = int(float(value))
+            self.settings["blur"] = self.blur_radius
+        else:
+            self.pixel_size = int(float(value))
+            self.settings["pixel"] = self.pixel_size
+        self.pixel_lbl.configure(text=self._pixel_label_options()["text"])
+        self._schedule_effects()
 
     # ----------------------- Utilities ------------------------
+    # Canvas coordinates here are scroll-region coordinates (see canvasx/canvasy)
     def _img_to_canvas(self, ix: int, iy: int) -> Tuple[int, int]:
-        cw = self.canvas.winfo_width(); ch = self.canvas.winfo_height()
         scale = self.fit_scale * self.zoom
-        w = int(self.image.width * scale); h = int(self.image.height * scale)
-        ox = (cw - w) // 2; oy = (ch - h) // 2
+        ox, oy = self.origin
         cx = int(ox + ix * scale); cy = int(oy + iy * scale)
         return cx, cy
 
-    def _canvas_to_img(self, cx: int, cy: int) -> Tuple[int, int]:
-        cw = self.canvas.winfo_width(); ch = self.canvas.winfo_height()
+    def _canvas_to_img(self, cx: float, cy: float) -> Tuple[int, int]:
         scale = self.fit_scale * self.zoom
-        w = int(self.image.width * scale); h = int(self.image.height * scale)
-        ox = (cw - w) // 2; oy = (ch - h) // 2
+        ox, oy = self.origin
         ix = int((cx - ox) / scale); iy = int((cy - oy) / scale)
         return ix, iy
 
+    def _saving_in_place(self) -> bool:
+        """True while a disk-backed image is being saved from its live pixels."""
+        return (isinstance(self.image, DiskImage) and self._save_future is not None
+                and not self._save_future.done())
+
+    def _undo_log(self):
+        """Where undo/redo live: the frame edit list for multi-frame files, else the history."""
+        return self.frames if self.frames is not None else self.history
+
     def _update_controls(self):
-        has_img = self.image is not None
-        self.btn_burn.configure(state=("normal" if (has_img and self.pending) else "disabled"))
+        has_img = self.image is not None and not self.loading
+        editable = has_img and not self._saving_in_place()
+        log = self._undo_log()
+        self.btn_burn.configure(state=("normal" if (editable and self.pending) else "disabled"))
+        can_find = editable and self.pending and not isinstance(self.image, DiskImage) and not self._finding()
+        self.btn_find.configure(state=("normal" if can_find else "disabled"))
         self.btn_save.configure(state=("normal" if has_img else "disabled"))
-        self.btn_undo.configure(state=("normal" if self.undo_stack else "disabled"))
-        self.btn_redo.configure(state=("normal" if self.redo_stack else "disabled"))
+        self.btn_undo.configure(state=("normal" if editable and log.can_undo else "disabled"))
+        self.btn_redo.configure(state=("normal" if editable and log.can_redo else "disabled"))
 
     def on_wheel(self, event):
         if not self.image:
             return
         delta = 10 if event.delta > 0 else -10
-        self._nudge_zoom(delta)
+        self._nudge_zoom(delta, (event.x, event.y))
 
 
 def get_resource_path(relative_path: str) -> str:
@@ -657,6 +1831,47 @@ def set_icons(window):
         print(f"Could not set icon: {e}")
 
 
-if __name__ == "__main__":
-    app = RedaxApp()
+def _enable_profiling(argv: List[str]) -> List[str]:
+    """Turn on :data:`PROFILER` for ``--profile[=PATH]`` or ``REDAX_PROFILE``.
+
+    ``REDAX_PROFILE=1`` writes to the default path; any other value is taken as
+    the path. Returns ``argv`` without the flag.
+    """
+    path = None
+    rest = []
+    for arg in argv:
+        if arg == "--profile":
+            path = PROFILE_PATH
+        elif arg.startswith("--profile="):
+            path = arg.split("=", 1)[1] or PROFILE_PATH
+        else:
+            rest.append(arg)
+    env = os.environ.get("REDAX_PROFILE", "").strip()
+    if path is None and env and env.lower() not in ("0", "false", "no", "off"):
+        path = PROFILE_PATH if env.lower() in ("1", "true", "yes", "on") else env
+    if path:
+        PROFILER.enable(path)
+        print(f"[INFO] Profiling on; trace will be written to {path}")
+    return rest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = _enable_profiling(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "batch":
+        from redax_engine import batch_main
+        return batch_main(argv[1:])
+    if argv and argv[0] == "watch":
+        from redax_engine import watch_main
+        return watch_main(argv[1:])
+    report = "--startup-report" in argv  # print startup timings as JSON once interactive, then quit
+    app = RedaxApp(report_startup=report)
     app.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    # Needed so the batch/watch process pools work from the frozen exe
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
+
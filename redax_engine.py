@@ -0,0 +1,2865 @@
+
+"""Headless redaction engine shared by the Redax GUI and the batch CLI.
+
+Nothing in this module touches Tk, so it can run in worker processes,
+CI jobs and screenshot pipelines without a display.
+"""
+from __future__ import annotations
+import io
+import os
+import sys
+import json
+import math
+import mmap
+import atexit
+import functools
+import hashlib
+import struct
+import weakref
+import tempfile
+import time
+import argparse
+import importlib
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from PIL import Image, ImageFilter, ImageOps
+
+
+# ----------------------- Lazy imports ----------------------
+class _LazyModule:
+    """Module stand-in that imports the real module on first attribute access and
+    then takes its place in this module's globals, so later lookups cost nothing.
+
+    numpy alone is a third of the editor's import time and nothing touches it
+    until an image is edited.
+    """
+
+    def __init__(self, name: str, alias: str):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+
+np = _LazyModule("numpy", "np")
+
+# Pillow plugins its preinit() does not load. Importing only the one a file needs
+# keeps Image.open/save from loading every codec (Image.init) on first use.
+_PLUGINS = {".tif": "TiffImagePlugin", ".tiff": "TiffImagePlugin", ".webp": "WebPImagePlugin"}
+
+
+def _load_plugin(path: str) -> None:
+    name = _PLUGINS.get(os.path.splitext(path)[1].lower())
+    if name:
+        try:
+            importlib.import_module(f"PIL.{name}")
+        except ImportError:
+            pass  # codec not built into this Pillow; Image.open reports it
+
+
+def preload() -> None:
+    """Import what the first edit needs; the editor calls this on a thread once it
+    is interactive so opening an image doesn't pay for it."""
+    np.ndarray
+    Image.preinit()
+
+
+MODES = ("black", "pixelate", "blur")
+
+BLUR_RADIUS = 16  # default blur radius (Gaussian standard deviation), in image pixels
+BLUR_PASSES = 3   # box passes in Pillow's GaussianBlur (see blur_union)
+
+# Images above this many pixels are decoded into a DiskImage when the format allows it
+OUT_OF_CORE_PIXELS = 100_000_000
+
+
+@dataclass
+class PendingBox:
+    rect: Tuple[int, int, int, int]  # in *image* coordinates: (x1, y1, x2, y2)
+    mode: str                        # "black", "pixelate" or "blur"
+    canvas_id: Optional[int] = None  # handle of preview rectangle on canvas
+
+
+# --------------------- Pending boxes ----------------------
+class BoxIndex:
+    """Pending boxes in the order they were added, bucketed on a grid of ``CELL``-px
+    squares so region queries and hit tests only look at nearby boxes.
+
+    It stands in for the plain list the editor used (``append``, ``clear``,
+    iteration, ``len``, ``[-1]``). Rects are read when a box is added, so a
+    box's rect must be changed through :meth:`update` (or :meth:`reindex`
+    called after changing many in place). ``version`` goes up on every change,
+    so work derived from the boxes can be cached against it.
+    """
+    CELL = 256
+
+    def __init__(self, boxes: Iterable[PendingBox] = ()):
+        self._boxes: Dict[int, PendingBox] = {}          # id(box) -> box, insertion ordered
+        self._order: Dict[int, int] = {}
+        self._cells: Dict[Tuple[int, int], set] = {}     # grid cell -> ids of boxes touching it
+        self._seq = 0
+        self.version = 0
+        self.extend(boxes)
+
+    def _cell_keys(self, rect) -> Iterator[Tuple[int, int]]:
+        x1, y1, x2, y2 = rect
+        c = self.CELL
+        for row in range(int(y1) // c, int(y2) // c + 1):
+            for col in range(int(x1) // c, int(x2) // c + 1):
+                yield col, row
+
+    def _link(self, key: int, box: PendingBox) -> None:
+        for cell in self._cell_keys(box.rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def _unlink(self, key: int, box: PendingBox) -> None:
+        for cell in self._cell_keys(box.rect):
+            ids = self._cells.get(cell)
+            if ids is not None:
+                ids.discard(key)
+                if not ids:
+                    del self._cells[cell]
+
+    def append(self, box: PendingBox) -> None:
+        key = id(box)
+        if key in self._boxes:
+            return
+        self._boxes[key] = box
+        self._order[key] = self._seq
+        self._seq += 1
+        self._link(key, box)
+        self.version += 1
+
+    def extend(self, boxes: Iterable[PendingBox]) -> None:
+        for box in boxes:
+            self.append(box)
+
+    def remove(self, box: PendingBox) -> None:
+        key = id(box)
+        if self._boxes.pop(key, None) is not None:
+            del self._order[key]
+            self._unlink(key, box)
+            self.version += 1
+
+    def update(self, box: PendingBox, rect: Tuple[int, int, int, int]) -> None:
+        """Move/resize ``box`` to ``rect`` and re-bucket it."""
+        key = id(box)
+        if key in self._boxes:
+            self._unlink(key, box)
+            box.rect = rect
+            self._link(key, box)
+            self.version += 1
+        else:
+            box.rect = rect
+
+    def reindex(self) -> None:
+        self._cells.clear()
+        for key, box in self._boxes.items():
+            self._link(key, box)
+        self.version += 1
+
+    def clear(self) -> None:
+        self._boxes.clear(); self._order.clear(); self._cells.clear()
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def __iter__(self) -> Iterator[PendingBox]:
+        return iter(list(self._boxes.values()))
+
+    def __getitem__(self, index: int) -> PendingBox:
+        if index == -1 and self._boxes:
+            return next(reversed(self._boxes.values()))
+        return list(self._boxes.values())[index]
+
+    def query(self, rect: Tuple[int, int, int, int]) -> List[PendingBox]:
+        """Boxes whose (edge-inclusive) rect intersects ``rect``, oldest first."""
+        x1, y1, x2, y2 = rect
+        keys = set()
+        for cell in self._cell_keys(rect):
+            keys.update(self._cells.get(cell, ()))
+        found = []
+        for key in sorted(keys, key=self._order.__getitem__):
+            box = self._boxes[key]
+            bx1, by1, bx2, by2 = box.rect
+            if bx1 <= x2 and x1 <= bx2 and by1 <= y2 and y1 <= by2:
+                found.append(box)
+        return found
+
+    def hit(self, x: float, y: float, tolerance: float = 0) -> Optional[PendingBox]:
+        """The most recently added box under point (x, y), if any."""
+        found = self.query((x - tolerance, y - tolerance, x + tolerance, y + tolerance))
+        return found[-1] if found else None
+
+
+def _touch_components(a: np.ndarray) -> List[List[int]]:
+    """Indices of half-open rects ``a`` (N×4) grouped by overlap or shared edges/corners."""
+    n = len(a)
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Pairwise test in row chunks so memory stays O(chunk * N)
+    for start in range(0, n, 1024):
+        c = a[start:start + 1024]
+        touch = ((c[:, None, 0] <= a[None, :, 2]) & (a[None, :, 0] <= c[:, None, 2])
+                 & (c[:, None, 1] <= a[None, :, 3]) & (a[None, :, 1] <= c[:, None, 3]))
+        for i, j in zip(*np.nonzero(touch)):
+            ri, rj = find(start + int(i)), find(int(j))
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+
+def _disjoint_pieces(a: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Split the union of half-open rects ``a`` into a few disjoint rects.
+
+    Edges are compressed to a small grid; covered cells form horizontal runs
+    per row band, and a run continues downwards while the band below has the
+    exact same run.
+    """
+    if len(a) == 1:
+        return [tuple(int(v) for v in a[0])]
+    xs = np.unique(a[:, [0, 2]]); ys = np.unique(a[:, [1, 3]])
+    grid = np.zeros((len(ys) - 1, len(xs) - 1), bool)
+    xi1, xi2 = np.searchsorted(xs, a[:, 0]), np.searchsorted(xs, a[:, 2])
+    yi1, yi2 = np.searchsorted(ys, a[:, 1]), np.searchsorted(ys, a[:, 3])
+    for r in range(len(a)):
+        grid[yi1[r]:yi2[r], xi1[r]:xi2[r]] = True
+    pieces = []
+    open_runs: Dict[Tuple[int, int], int] = {}  # (x start, x end) -> first row band
+    for row in range(grid.shape[0] + 1):
+        runs = set()
+        if row < grid.shape[0]:
+            edges = np.diff(np.concatenate(([0], grid[row].view(np.int8), [0])))
+            runs = set(zip(np.nonzero(edges == 1)[0].tolist(), np.nonzero(edges == -1)[0].tolist()))
+        for run in [r for r in open_runs if r not in runs]:
+            top = open_runs.pop(run)
+            pieces.append((int(xs[run[0]]), int(ys[top]), int(xs[run[1]]), int(ys[row])))
+        for run in runs:
+            open_runs.setdefault(run, row)
+    return pieces
+
+
+def coalesce_rects(rects: Iterable[Tuple[int, int, int, int]]) -> List[List[Tuple[int, int, int, int]]]:
+    """Group half-open ``rects`` that overlap or touch, and return each group's
+    union as a list of disjoint rects. Empty rects are dropped."""
+    a = np.array([r for r in rects if r[2] > r[0] and r[3] > r[1]], np.int64).reshape(-1, 4)
+    if len(a) == 0:
+        return []
+    return [_disjoint_pieces(a[idx]) for idx in _touch_components(a)]
+
+
+# ----------------------- Profiling ------------------------
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, or None where it can't be read cheaply."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "kind", "args", "start", "rss")
+
+    def __init__(self, profiler: "Profiler", name: str, kind: Optional[str], args: dict):
+        self.profiler, self.name, self.kind, self.args = profiler, name, kind, args
+
+    def __enter__(self):
+        self.rss = rss_bytes()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self.rss is not None:
+            # Growth while the span ran; PIL allocates outside tracemalloc's view
+            self.args["rss_delta_kb"] = ((rss_bytes() or self.rss) - self.rss) // 1024
+        self.profiler._record(self.name, self.kind, self.start, end, self.args)
+        return False
+
+
+class Profiler:
+    """Opt-in timings of the hot paths, exported as a Chrome trace.
+
+    Disabled it costs one attribute check per call: :meth:`span` hands back a
+    shared no-op and :func:`profiled` calls straight through. Enabled, every
+    span is kept (up to ``MAX_EVENTS``) with its duration, thread and RSS
+    growth, and written on exit for chrome://tracing or Perfetto. Spans of
+    kind ``"frame"`` feed :attr:`frame_times`, kind ``"op"`` sets :attr:`last_op`.
+    """
+    MAX_EVENTS = 500_000
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.frame_times: deque = deque(maxlen=60)  # ms, most recent last
+        self.last_op: Optional[Tuple[str, float]] = None
+        self._events: deque = deque(maxlen=self.MAX_EVENTS)
+        self._t0 = time.perf_counter()
+        self._exported = False
+
+    def enable(self, path: str) -> None:
+        """Start recording; the trace is written to ``path`` at exit."""
+        if not self.enabled:
+            atexit.register(self.export)
+        self.enabled = True
+        self.path = path
+
+    def span(self, name: str, kind: Optional[str] = None, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, kind, args)
+
+    def _record(self, name: str, kind: Optional[str], start: float, end: float, args: dict) -> None:
+        ms = (end - start) * 1000
+        self._events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                             "ts": round((start - self._t0) * 1e6, 1), "dur": round(ms * 1000, 1),
+                             "args": args})
+        if kind == "frame":
+            self.frame_times.append(ms)
+        elif kind == "op":
+            self.last_op = (name, ms)
+
+    def summary(self) -> Dict[str, dict]:
+        """Count, total and worst time (ms) per span name."""
+        out: Dict[str, dict] = {}
+        for ev in list(self._events):
+            s = out.setdefault(ev["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = ev["dur"] / 1000
+            s["count"] += 1; s["total_ms"] += ms; s["max_ms"] = max(s["max_ms"], ms)
+        for s in out.values():
+            s["total_ms"] = round(s["total_ms"], 3); s["max_ms"] = round(s["max_ms"], 3)
+        return out
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the Chrome trace (once); returns the path written, if any."""
+        path = path or self.path
+        if not self.enabled or not path or (self._exported and path == self.path):
+            return None
+        trace = {"traceEvents": list(self._events), "displayTimeUnit": "ms",
+                 "otherData": {"summary": self.summary()}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        if path == self.path:
+            self._exported = True
+        return path
+
+
+PROFILER = Profiler()
+
+
+def profiled(name: Optional[str] = None, kind: Optional[str] = None) -> Callable:
+    """Decorator: time calls to the function as a :data:`PROFILER` span when enabled."""
+    def wrap(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with _Span(PROFILER, label, kind, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# ---------------------- Disk images -----------------------
+_BANDS = {"L": 1, "RGB": 3, "RGBA": 4}
+_RAW_FORMATS = ("TIFF", "BMP", "PPM")  # formats whose pixel rows sit at fixed offsets
+
+
+def _drop_file(mm: mmap.mmap, fh, path: str) -> None:
+    try:
+        mm.close()
+    except BufferError:
+        pass  # a NumPy view is still alive; the OS reclaims the mapping at exit
+    fh.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class DiskImage:
+    """An image kept in a tiled, memory-mapped temp file instead of RAM.
+
+    It implements the small part of the ``PIL.Image`` API that Redax uses
+    (``size``, ``mode``, ``crop``, ``paste``, ``resize`` with a box, ``reduce``,
+    ``copy``). Every call touches only the tiles it needs, so peak memory
+    depends on the region asked for, not on the image size.
+    """
+    TILE = 512
+    STRIP_BYTES = 64 * 1024 * 1024  # working-set cap for whole-image passes
+
+    def __init__(self, size: Tuple[int, int], mode: str):
+        if mode not in _BANDS:
+            raise ValueError(f"DiskImage does not support mode {mode!r}")
+        self.size = size
+        self.mode = mode
+        self.bands = _BANDS[mode]
+        self._cols = -(-size[0] // self.TILE)
+        self._rows = -(-size[1] // self.TILE)
+        self._tile_bytes = self.TILE * self.TILE * self.bands
+        fd, self.path = tempfile.mkstemp(prefix="redax-", suffix=".tiles")
+        self._fh = os.fdopen(fd, "w+b")
+        self._fh.truncate(self._cols * self._rows * self._tile_bytes)
+        self._mm = mmap.mmap(self._fh.fileno(), 0)
+        self._finalizer = weakref.finalize(self, _drop_file, self._mm, self._fh, self.path)
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    def close(self) -> None:
+        self._finalizer()
+
+    # Raw tile access
+    def _tile(self, col: int, row: int) -> np.ndarray:
+        offset = (row * self._cols + col) * self._tile_bytes
+        return np.frombuffer(self._mm, np.uint8, self._tile_bytes, offset).reshape(
+            self.TILE, self.TILE, self.bands)
+
+    def _spans(self, box):
+        """Yield (tile view, image-space rect) for every tile piece under ``box``."""
+        x0, y0, x1, y1 = box
+        t = self.TILE
+        for row in range(y0 // t, (y1 - 1) // t + 1):
+            for col in range(x0 // t, (x1 - 1) // t + 1):
+                tx, ty = col * t, row * t
+                ix0, iy0 = max(x0, tx), max(y0, ty)
+                ix1, iy1 = min(x1, tx + t), min(y1, ty + t)
+                yield self._tile(col, row)[iy0 - ty:iy1 - ty, ix0 - tx:ix1 - tx], (ix0, iy0, ix1, iy1)
+
+    def _clip(self, box):
+        x0, y0, x1, y1 = (int(v) for v in box)
+        return max(0, x0), max(0, y0), min(self.width, x1), min(self.height, y1)
+
+    def read(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Pixels of ``box`` as an H×W×bands array; outside the image is zero, like crop."""
+        x0, y0, x1, y1 = (int(v) for v in box)
+        out = np.zeros((max(0, y1 - y0), max(0, x1 - x0), self.bands), np.uint8)
+        cx0, cy0, cx1, cy1 = self._clip(box)
+        if cx1 > cx0 and cy1 > cy0:
+            for view, (ix0, iy0, ix1, iy1) in self._spans((cx0, cy0, cx1, cy1)):
+                out[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = view
+        return out
+
+    def write(self, xy: Tuple[int, int], a: np.ndarray) -> None:
+        x, y = xy
+        if a.ndim == 2:
+            a = a[:, :, None]
+        cx0, cy0, cx1, cy1 = self._clip((x, y, x + a.shape[1], y + a.shape[0]))
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        for view, (ix0, iy0, ix1, iy1) in self._spans((cx0, cy0, cx1, cy1)):
+            view[...] = a[iy0 - y:iy1 - y, ix0 - x:ix1 - x]
+
+    def release(self) -> None:
+        """Drop mapped pages from our working set after a whole-image pass (Linux)."""
+        if hasattr(mmap, "MADV_DONTNEED"):
+            self._mm.madvise(mmap.MADV_DONTNEED)
+
+    def _strip_rows(self, multiple: int = 1) -> int:
+        rows = max(1, self.STRIP_BYTES // max(1, self.width * self.bands))
+        return max(multiple, rows - rows % multiple)
+
+    # PIL-like API
+    def crop(self, box) -> Image.Image:
+        a = self.read(box)
+        return Image.fromarray(a[:, :, 0] if self.bands == 1 else a)
+
+    def paste(self, im: Union[Image.Image, int, tuple], box=None) -> None:
+        box = box or (0, 0)
+        if not isinstance(im, Image.Image):
+            # Colour fill, as in PIL's Image.paste(color, box)
+            x0, y0, x1, y1 = self._clip(box)
+            if x1 > x0 and y1 > y0:
+                color = np.array(im if isinstance(im, tuple) else (im,), np.uint8)[:self.bands]
+                for view, _ in self._spans((x0, y0, x1, y1)):
+                    view[...] = color
+            return
+        if im.mode != self.mode:
+            im = im.convert(self.mode)
+        self.write(box[:2], np.asarray(im))
+
+    def resize(self, size, resample=Image.NEAREST, box=None, **kwargs) -> Image.Image:
+        box = box or (0, 0, self.width, self.height)
+        if resample == Image.NEAREST and (box[2] - box[0]) * (box[3] - box[1]) > 4 * size[0] * size[1]:
+            return self._sample(size, box)
+        bx0, by0 = int(box[0]), int(box[1])
+        bx1 = max(bx0 + 1, min(self.width, math.ceil(box[2])))
+        by1 = max(by0 + 1, min(self.height, math.ceil(box[3])))
+        region = self.crop((bx0, by0, bx1, by1))
+        local = (box[0] - bx0, box[1] - by0, box[2] - bx0, box[3] - by0)
+        return region.resize(size, resample, box=local, **kwargs)
+
+    def _sample(self, size, box) -> Image.Image:
+        """Nearest-neighbour downscale that reads only the sampled pixels, so a
+        zoomed-out view doesn't pull the whole region off disk."""
+        w, h = size
+        xs = np.clip((box[0] + (np.arange(w) + 0.5) * (box[2] - box[0]) / w).astype(np.int64), 0, self.width - 1)
+        ys = np.clip((box[1] + (np.arange(h) + 0.5) * (box[3] - box[1]) / h).astype(np.int64), 0, self.height - 1)
+        return self.take(xs, ys)
+
+    def take(self, xs: np.ndarray, ys: np.ndarray) -> Image.Image:
+        """The image made of pixels (xs[i], ys[j]), reading only the tiles they fall in."""
+        w, h = len(xs), len(ys)
+        out = np.empty((h, w, self.bands), np.uint8)
+        t = self.TILE
+        for row in np.unique(ys // t):
+            yi = np.nonzero(ys // t == row)[0]
+            for col in np.unique(xs // t):
+                xi = np.nonzero(xs // t == col)[0]
+                out[np.ix_(yi, xi)] = self._tile(col, row)[np.ix_(ys[yi] - row * t, xs[xi] - col * t)]
+        return Image.fromarray(out[:, :, 0] if self.bands == 1 else out)
+
+    def reduce(self, factor: int) -> Image.Image:
+        """Box-average by ``factor`` into an in-memory image, one strip at a time."""
+        out = Image.new(self.mode, (-(-self.width // factor), -(-self.height // factor)))
+        step = self._strip_rows(factor)
+        for y in range(0, self.height, step):
+            strip = self.crop((0, y, self.width, min(self.height, y + step)))
+            out.paste(strip.reduce(factor), (0, y // factor))
+        self.release()
+        return out
+
+    def copy(self) -> "DiskImage":
+        clone = DiskImage(self.size, self.mode)
+        chunk = self.STRIP_BYTES
+        for offset in range(0, len(self._mm), chunk):
+            clone._mm[offset:offset + chunk] = self._mm[offset:offset + chunk]
+        self.release(); clone.release()
+        return clone
+
+    def iter_strips(self) -> Iterator[Tuple[int, np.ndarray]]:
+        step = self._strip_rows()
+        for y in range(0, self.height, step):
+            yield y, self.read((0, y, self.width, min(self.height, y + step)))
+        self.release()
+
+
+def _open_unbounded(path: str) -> Optional[Image.Image]:
+    """Open a TIFF, BMP or PPM header without PIL's decompression-bomb guard.
+
+    Huge scans trip that guard, which only :func:`Image.open` applies, so the
+    format plugins are called directly here; nothing global is touched, and
+    the guard stays in force for full in-memory decodes. Returns None for
+    other formats (they are never decoded strip by strip).
+    """
+    from PIL import BmpImagePlugin, PpmImagePlugin, TiffImagePlugin  # noqa: F401  (registers the plugins)
+    with open(path, "rb") as f:
+        prefix = f.read(16)
+    for fmt in _RAW_FORMATS:
+        factory, accept = Image.OPEN[fmt]
+        if accept and not accept(prefix):
+            continue
+        try:
+            return factory(path)
+        except (SyntaxError, IndexError, TypeError, struct.error):
+            return None  # looked like it, but isn't; the normal open reports the error
+    return None
+
+
+def open_disk_image(path: str, min_pixels: int = OUT_OF_CORE_PIXELS) -> Optional[DiskImage]:
+    """Decode a large image band by band into a :class:`DiskImage`.
+
+    Returns None when the image is smaller than ``min_pixels`` or its data
+    can't be read in pieces. That works for uncompressed pixel data (raw
+    TIFF strips/tiles, BMP, PPM): rows sit at fixed offsets and are decoded a
+    band at a time. Compressed formats are decoded by PIL in one call, so
+    they are left to the normal in-memory path.
+    """
+    src = _open_unbounded(path)
+    if src is None:
+        return None
+    try:
+        w, h = src.size
+        # Raw decoder args are (rawmode, stride, ystep), or just the rawmode (PPM/PGM)
+        tiles = [(codec, extents, offset, (args,) if isinstance(args, str) else args)
+                 for codec, extents, offset, args in src.tile or []]
+        if (w * h <= min_pixels or src.mode not in _BANDS or not tiles
+                or any(t[0] != "raw" or any(d in t[3][0] for d in ("16", "32")) for t in tiles)
+                or src.getexif().get(0x0112, 1) != 1):
+            return None
+        disk = DiskImage((w, h), src.mode)
+        with open(path, "rb") as f:
+            for _codec, (x0, y0, x1, y1), offset, args in tiles:
+                rawmode = args[0]
+                stride = args[1] if len(args) > 1 else 0
+                ystep = args[2] if len(args) > 2 else 1
+                tw, th = x1 - x0, y1 - y0
+                row_bytes = stride or tw * len(rawmode.split(";")[0])
+                band = max(1, DiskImage.STRIP_BYTES // row_bytes)
+                for r0 in range(0, th, band):
+                    r1 = min(th, r0 + band)
+                    # Bottom-up data (ystep -1) stores image row r at file row th-1-r
+                    first = r0 if ystep > 0 else th - r1
+                    f.seek(offset + first * row_bytes)
+                    data = f.read(row_bytes * (r1 - r0))
+                    piece = Image.frombytes(src.mode, (tw, r1 - r0), data, "raw", rawmode, stride, ystep)
+                    disk.paste(piece, (x0, y0 + r0))
+        disk.release()
+        return disk
+    finally:
+        src.close()
+
+
+# ----------------------- Image ops ------------------------
+NATIVE_MODES = ("L", "RGB", "RGBA", "P")
+
+
+def native_image(img: Image.Image) -> Image.Image:
+    """Return ``img`` in the nearest mode the editor works in, converting only if needed.
+
+    L, RGB, RGBA and opaque palette images are kept as they are. Palette images
+    with transparency become RGBA, bilevel becomes L, 16-bit/float grayscale is
+    clamped to L and anything else (CMYK, YCbCr, LA …) becomes RGB or RGBA.
+    """
+    mode = img.mode
+    if mode in ("L", "RGB", "RGBA") or (mode == "P" and "transparency" not in img.info):
+        return img
+    if mode == "1" or mode.startswith(("I", "F")):
+        return img.convert("L")
+    return img.convert("RGBA" if img.has_transparency_data else "RGB")
+
+
+@profiled("open_image", kind="op")
+def open_image(path: str, out_of_core_pixels: Optional[int] = OUT_OF_CORE_PIXELS):
+    """Open an image the way the editor does: EXIF-upright, in its native mode.
+
+    Images above ``out_of_core_pixels`` come back as a :class:`DiskImage`
+    when the file can be decoded in pieces.
+    """
+    _load_plugin(path)
+    if out_of_core_pixels:
+        disk = open_disk_image(path, out_of_core_pixels)
+        if disk is not None:
+            return disk
+    img = Image.open(path)
+    # Remove orientation EXIF by transposing; keep the pixel mode (see native_image)
+    return native_image(ImageOps.exif_transpose(img))
+
+
+@profiled("open_preview")
+def open_preview(path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+    """Cheap reduced-resolution decode of ``path`` at roughly ``size``, or None.
+
+    Only JPEG can skip work here (``draft`` decodes at 1/2 to 1/8 scale via the
+    DCT); other formats have no reduced decode, so the caller waits for the
+    full image instead of paying for a second full decode.
+    """
+    _load_plugin(path)
+    img = Image.open(path)
+    if img.format != "JPEG":
+        return None
+    w, h = size
+    if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+        w, h = h, w  # rotated by EXIF: request the size of the stored axes
+    full_size = img.size
+    img.draft("RGB", (max(1, w), max(1, h)))
+    if img.size == full_size:
+        return None
+    return native_image(ImageOps.exif_transpose(img))
+
+
+def _block_average(a: np.ndarray, block: int) -> np.ndarray:
+    """Return ``a`` (H×W or H×W×C) with every ``block``×``block`` cell set to its mean.
+
+    Cells are anchored at the top-left corner; the last row/column of cells is
+    whatever is left over, so no original pixel survives unaveraged.
+    """
+    out = np.empty(a.shape, a.dtype)  # C order, so row bands reshape as views
+    h, w = a.shape[:2]
+    hf = h - h % block; wf = w - w % block
+    for y0, y1 in ((0, hf), (hf, h)):
+        if y1 <= y0:
+            continue
+        bh = min(block, y1 - y0); ny = (y1 - y0) // bh
+        # Whole-width bands of rows are contiguous, so summing each cell's rows
+        # needs no copy (uint16 holds 257 rows of 8-bit data); the much smaller
+        # row sums are then summed across each cell, which einsum does several
+        # times faster than sum() over that short inner axis
+        acc = np.uint16 if bh <= 257 else np.uint32
+        rows = a[y0:y1].reshape((ny, bh) + a.shape[1:]).sum(axis=1, dtype=acc)
+        parts = []
+        if wf:
+            cells = np.einsum("ijkl->ijl", rows[:, :wf].astype(np.uint32).reshape(ny, wf // block, block, -1))
+            n = bh * block
+            means = ((cells + n // 2) // n).astype(a.dtype).reshape((ny, wf // block) + a.shape[2:])
+            parts.append(np.repeat(means, block, axis=1))
+        if wf < w:
+            n = bh * (w - wf)
+            rest = rows[:, wf:].sum(axis=1, keepdims=True, dtype=np.uint32)
+            parts.append(np.repeat(((rest + n // 2) // n).astype(a.dtype), w - wf, axis=1))
+        wide = parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+        out[y0:y1].reshape((ny, bh) + a.shape[1:])[...] = wide[:, None]
+    return out
+
+
+@profiled("pixelate_rects")
+def pixelate_rects(image: Image.Image, rects: Iterable[Tuple[int, int, int, int]], block: int) -> None:
+    """Pixelate half-open ``rects`` of ``image`` in place with exact ``block``-sized cells.
+
+    Each rect is cropped (a copy), converted to an array (another copy),
+    averaged with reshape/sum into a new array, and pasted back from a new
+    image. Every pixel is read, so this is 2-3x slower than sampling one pixel
+    per cell with a NEAREST resize, which let the others through unaveraged.
+    Overlapping rects see each other's result, as before.
+    """
+    block = max(1, int(block))
+    w, h = image.size
+    for x1, y1, x2, y2 in rects:
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        image.paste(_pixelated(image, image.crop((x1, y1, x2, y2)), block), (x1, y1))
+
+
+def _pixelated(image: Image.Image, crop: Image.Image, block: int) -> Image.Image:
+    """``crop`` of ``image`` block-averaged into ``block``-sized cells, in ``image``'s mode."""
+    if image.mode == "P":
+        # Average the colours, not the palette indices, then map back to the palette
+        cells = Image.fromarray(_block_average(np.asarray(crop.convert("RGB")), block))
+        return cells.quantize(palette=image, dither=Image.Dither.NONE)
+    return Image.fromarray(_block_average(np.asarray(crop), block))
+
+
+def pixelate_union(image: Image.Image, pieces: List[Tuple[int, int, int, int]], block: int) -> None:
+    """Pixelate disjoint half-open ``pieces`` (one group from :func:`coalesce_rects`)
+    with a single cell grid anchored at the group's top-left corner.
+
+    Everything is read before anything is written, so a cell shared by two
+    pieces gets one average and no seam. Usually the group's bounding box is
+    averaged in one pass, paying the crop/array/paste overhead once; a group
+    that covers less than half its bounding box (an L shape, a diagonal run)
+    reads each piece with the cells it straddles instead. A group of one rect
+    pixelates exactly like :func:`pixelate_rects`.
+    """
+    block = max(1, int(block))
+    ox = min(p[0] for p in pieces); oy = min(p[1] for p in pieces)
+    gx2 = max(p[2] for p in pieces); gy2 = max(p[3] for p in pieces)
+    if 2 * sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in pieces) >= (gx2 - ox) * (gy2 - oy):
+        cells = _pixelated(image, image.crop((ox, oy, gx2, gy2)), block)
+        if len(pieces) == 1:
+            image.paste(cells, (ox, oy))
+            return
+        for x1, y1, x2, y2 in pieces:
+            image.paste(cells.crop((x1 - ox, y1 - oy, x2 - ox, y2 - oy)), (x1, y1))
+        return
+    results = []
+    for x1, y1, x2, y2 in pieces:
+        ex1 = ox + (x1 - ox) // block * block; ey1 = oy + (y1 - oy) // block * block
+        ex2 = min(gx2, ox + -(-(x2 - ox) // block) * block)
+        ey2 = min(gy2, oy + -(-(y2 - oy) // block) * block)
+        cells = _pixelated(image, image.crop((ex1, ey1, ex2, ey2)), block)
+        results.append((cells.crop((x1 - ex1, y1 - ey1, x2 - ex1, y2 - ey1)), (x1, y1)))
+    for cells, xy in results:
+        image.paste(cells, xy)
+
+
+@profiled("blur_union")
+def blur_union(image: Image.Image, pieces: List[Tuple[int, int, int, int]], radius: int) -> None:
+    """Blur disjoint half-open ``pieces`` (one group from :func:`coalesce_rects`) in
+    place with Pillow's GaussianBlur of standard deviation ``radius``.
+
+    Pillow builds that blur from BLUR_PASSES separable running-sum box passes
+    in C, so the cost per pixel does not grow with the radius. A pass reaches
+    ``radius`` pixels, so only a margin of ``BLUR_PASSES * radius`` around each
+    piece is read and the pixels inside come out exactly as if the whole image
+    had been blurred. The box kernels' spectral zeros and the 8-bit rounding
+    after every pass throw away the detail a deconvolution would need. Every
+    piece is read before anything is written, so neighbouring pieces blur
+    without a seam.
+    """
+    radius = max(1, int(radius))
+    margin = radius * BLUR_PASSES
+    w, h = image.size
+    results = []
+    for x1, y1, x2, y2 in pieces:
+        ex1, ey1 = max(0, x1 - margin), max(0, y1 - margin)
+        ex2, ey2 = min(w, x2 + margin), min(h, y2 + margin)
+        crop = image.crop((ex1, ey1, ex2, ey2))
+        if image.mode == "P":
+            crop = crop.convert("RGB")  # blur the colours, not the palette indices
+        piece = crop.filter(ImageFilter.GaussianBlur(radius)).crop((x1 - ex1, y1 - ey1, x2 - ex1, y2 - ey1))
+        if image.mode == "P":
+            piece = piece.quantize(palette=image, dither=Image.Dither.NONE)
+        results.append((piece, (x1, y1)))
+    for piece, xy in results:
+        image.paste(piece, xy)
+
+
+def _black(image: Image.Image):
+    """The fill value for opaque black in ``image``'s mode."""
+    if image.mode == "P":
+        try:
+            return image.palette.getcolor((0, 0, 0), image)
+        except ValueError:
+            # Palette full and without black: use the darkest entry
+            rgb = np.array(image.getpalette("RGB"), np.int32).reshape(-1, 3)
+            return int(rgb.sum(axis=1).argmin())
+    return {"L": 0, "RGB": (0, 0, 0)}.get(image.mode, (0, 0, 0, 255))
+
+
+def burn_groups(boxes: Iterable[PendingBox], size: Tuple[int, int]) -> List[Tuple[str, List[Tuple[int, int, int, int]]]]:
+    """``(mode, pieces)`` for every group :func:`burn_boxes` processes, in its order.
+
+    Boxes of the same mode that overlap or touch are merged, and each group's
+    union is split into disjoint half-open pieces clipped to ``size`` (see
+    :func:`coalesce_rects`). Pixelate groups come first, then blur, then black.
+    """
+    boxes = list(boxes)
+    w, h = size
+
+    def clipped(x1, y1, x2, y2):
+        return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+    groups = []
+    for mode in ("pixelate", "blur"):
+        groups += [(mode, pieces) for pieces in coalesce_rects([clipped(*b.rect) for b in boxes if b.mode == mode])]
+    # Black fills are inclusive of the right/bottom edge, like ImageDraw.rectangle
+    groups += [("black", pieces) for pieces in coalesce_rects(
+        [clipped(b.rect[0], b.rect[1], b.rect[2] + 1, b.rect[3] + 1) for b in boxes if b.mode == "black"])]
+    return groups
+
+
+@profiled("burn_boxes")
+def burn_boxes(image: Image.Image, boxes: Iterable[PendingBox], pixel_size: int,
+               blur_radius: int = BLUR_RADIUS) -> None:
+    """Apply black fills, pixelation and blur to ``image`` in place.
+
+    Every pixel is processed once however many boxes cover it (see
+    :func:`burn_groups`). Pixelate boxes go first, then blur; black fills
+    are drawn on top, so where they overlap the others the result is always black.
+    """
+    black = None
+    for mode, pieces in burn_groups(boxes, image.size):
+        if mode == "pixelate":
+            pixelate_union(image, pieces, pixel_size)
+        elif mode == "blur":
+            blur_union(image, pieces, blur_radius)
+        else:
+            if black is None:
+                black = _black(image)
+            for piece in pieces:
+                image.paste(black, piece)
+
+
+def display_groups(groups: List[Tuple[str, List[Tuple[int, int, int, int]]]], scale: float,
+                   size: Tuple[int, int]) -> List[Tuple[str, Tuple[Tuple[int, int, int, int], ...]]]:
+    """:func:`burn_groups` output mapped to a view of the image at ``scale`` whose
+    size is ``size``. Edges are rounded the way nearest-neighbour sampling picks
+    pixels, and every piece keeps at least one display pixel so it stays visible."""
+    w, h = size
+
+    def scaled(x1, y1, x2, y2):
+        dx1 = min(w - 1, int(x1 * scale + 0.5)); dy1 = min(h - 1, int(y1 * scale + 0.5))
+        return (dx1, dy1, max(dx1 + 1, min(w, int(x2 * scale + 0.5))),
+                max(dy1 + 1, min(h, int(y2 * scale + 0.5))))
+
+    return [(mode, tuple(scaled(*piece) for piece in pieces)) for mode, pieces in groups]
+
+
+def tiles_touched(tiles: Iterable[Tuple[int, int, int, int]], rects: Iterable[Tuple[int, int, int, int]],
+                  scale: float) -> List[Tuple[int, int, int, int]]:
+    """The display ``tiles`` (half-open rects of the view at ``scale``) that may show
+    a change to half-open image ``rects``, in the order given."""
+    # One display pixel of margin: nearest-neighbour sampling, or a pyramid level
+    # pixel that averages a changed one, may reach just outside the scaled rect
+    dirty = [(math.floor(x1 * scale) - 1, math.floor(y1 * scale) - 1,
+              math.ceil(x2 * scale) + 1, math.ceil(y2 * scale) + 1) for x1, y1, x2, y2 in rects]
+    return [tile for tile in tiles if any(_overlaps(tile, rect) for rect in dirty)]
+
+
+def _cell_runs(x1: int, x2: int, origin: int, limit: int, block: float) -> Tuple[int, int, np.ndarray]:
+    """Start, end and widths of the cells covering ``x1``..``x2`` on a grid whose
+    edges sit at ``origin + k * block`` (rounded up), clipped to ``limit``."""
+    k1 = math.floor((x1 - origin) / block); k2 = math.floor((x2 - 1 - origin) / block)
+    edges = [math.ceil(origin + k * block) for k in range(k1, k2 + 2)]
+    edges[-1] = min(limit, edges[-1])
+    return edges[0], edges[-1], np.diff(edges)
+
+
+def _cell_average(a: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """``a`` with every cell of the grid with row heights ``rows`` and column
+    widths ``cols`` set to its mean; unlike :func:`_block_average`, cells may differ in size."""
+    r0 = np.concatenate(([0], np.cumsum(rows)[:-1])); c0 = np.concatenate(([0], np.cumsum(cols)[:-1]))
+    sums = np.add.reduceat(np.add.reduceat(a, r0, axis=0, dtype=np.uint32), c0, axis=1, dtype=np.uint32)
+    n = np.outer(rows, cols).reshape(sums.shape[:2] + (1,) * (a.ndim - 2))
+    means = ((sums + n // 2) // n).astype(a.dtype)
+    return np.repeat(np.repeat(means, rows, axis=0), cols, axis=1)
+
+
+def _pixelate_view(view: Image.Image, pieces: List[Tuple[int, int, int, int]], block: float,
+                   bounds: Tuple[int, int, int, int]) -> None:
+    """:func:`pixelate_union` for a reduced view, where a cell is ``block`` (often
+    fractional) display pixels wide; ``bounds`` is the whole group's extent, so
+    the grid stays put when ``pieces`` are only the part of it being drawn."""
+    ox, oy, gx2, gy2 = bounds
+    results = []
+    for x1, y1, x2, y2 in pieces:
+        ex1, ex2, cols = _cell_runs(x1, x2, ox, min(gx2, view.width), block)
+        ey1, ey2, rows = _cell_runs(y1, y2, oy, min(gy2, view.height), block)
+        crop = view.crop((ex1, ey1, ex2, ey2))
+        cells = Image.fromarray(_cell_average(np.asarray(crop.convert("RGB") if view.mode == "P" else crop), rows, cols))
+        if view.mode == "P":
+            cells = cells.quantize(palette=view, dither=Image.Dither.NONE)
+        results.append((cells.crop((x1 - ex1, y1 - ey1, x2 - ex1, y2 - ey1)), (x1, y1)))
+    for cells, xy in results:
+        view.paste(cells, xy)
+
+
+def _overlaps(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def preview_margin(block: float, radius: int) -> int:
+    """How far (display pixels) one group's preview reads outside its pieces."""
+    return max(math.ceil(max(1.0, float(block))), max(1, int(radius)) * BLUR_PASSES)
+
+
+def _group_reach(groups, rect: Tuple[int, int, int, int], margin: int) -> list:
+    """``(mode, pieces, area)`` for every group that can change half-open ``rect``,
+    in burn order; ``area`` is where that group's result is needed. A group reads
+    ``margin`` pixels around what it draws, including what earlier groups drew
+    there, so each earlier group is needed that much further out."""
+    reach, out = rect, []
+    for mode, pieces in reversed(groups):
+        if any(_overlaps(piece, reach) for piece in pieces):
+            out.append((mode, pieces, reach))
+            reach = (reach[0] - margin, reach[1] - margin, reach[2] + margin, reach[3] + margin)
+    out.reverse()
+    return out
+
+
+def groups_in(groups, rect: Tuple[int, int, int, int], margin: int = 0) -> tuple:
+    """The groups that can change half-open ``rect``, as a hashable tuple; with a
+    ``margin`` (see :func:`preview_margin`) that includes groups outside ``rect``
+    whose result a group inside it reads."""
+    return tuple((mode, pieces) for mode, pieces, _ in _group_reach(groups, rect, margin))
+
+
+@profiled("preview_region")
+def preview_region(sample: Callable[[Tuple[int, int, int, int]], Image.Image], rect: Tuple[int, int, int, int],
+                   size: Tuple[int, int], groups, block: float, radius: int) -> Image.Image:
+    """What display rect ``rect`` will look like once ``groups`` are burned.
+
+    ``groups`` come from :func:`display_groups`; ``block`` and ``radius`` are
+    the pixel size (fractional cells are fine) and blur radius at display
+    scale. ``sample(rect)`` returns the view's pixels for a display rect of a
+    view ``size`` big, and must give the same pixels whichever rect they are
+    sampled as part of (as :meth:`ImagePyramid.sample` does at any scale). The
+    effects run on those already-reduced pixels, read with enough margin for
+    every cell and blur pass reaching into ``rect`` -- and for the earlier
+    groups those read -- so ``rect`` comes out exactly as the same part of one
+    preview of the whole view, and the full-resolution image is never touched.
+    """
+    block = max(1.0, float(block)); radius = max(1, int(radius))
+    margin = preview_margin(block, radius)
+    needed = _group_reach(groups, rect, margin)
+    if not needed:
+        return sample(rect)
+    w, h = size
+    first = needed[0][2]
+    ex1, ey1 = max(0, first[0] - margin), max(0, first[1] - margin)
+    ex2, ey2 = min(w, first[2] + margin), min(h, first[3] + margin)
+    view = sample((ex1, ey1, ex2, ey2))
+
+    def local(x1, y1, x2, y2):
+        return x1 - ex1, y1 - ey1, x2 - ex1, y2 - ey1
+
+    black = None
+    for mode, pieces, area in needed:
+        pieces = [local(*p) for p in pieces]
+        ax1, ay1, ax2, ay2 = area = local(*area)
+        inside = [(max(ax1, x1), max(ay1, y1), min(ax2, x2), min(ay2, y2))
+                  for x1, y1, x2, y2 in pieces if _overlaps((x1, y1, x2, y2), area)]
+        if mode == "pixelate":
+            bounds = (min(p[0] for p in pieces), min(p[1] for p in pieces),
+                      max(p[2] for p in pieces), max(p[3] for p in pieces))
+            _pixelate_view(view, inside, block, bounds)
+        elif mode == "blur":
+            blur_union(view, inside, radius)
+        else:
+            if black is None:
+                black = _black(view)
+            for piece in inside:
+                view.paste(black, piece)
+    return view.crop(local(*rect))
+
+
+def affected_rects(boxes: Iterable[PendingBox], size: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+    """Disjoint half-open image rects covering everything :func:`burn_boxes` may change."""
+    w, h = size
+    rects = []
+    for box in boxes:
+        x1, y1, x2, y2 = box.rect
+        # Black fills include their right/bottom edge, hence the +1
+        rects.append((max(0, x1), max(0, y1), min(w, x2 + 1), min(h, y2 + 1)))
+    return [piece for pieces in coalesce_rects(rects) for piece in pieces]
+
+
+# Encoder effort per format: trade save time against file size
+SAVE_PRESETS = {
+    "fast": {
+        "PNG": {"compress_level": 1},
+        "JPEG": {"quality": 90, "subsampling": "4:2:0"},
+        "WEBP": {"quality": 90, "method": 0},
+    },
+    "balanced": {
+        "PNG": {"compress_level": 6},
+        "JPEG": {"quality": 95, "subsampling": "4:2:0"},
+        "WEBP": {"quality": 90, "method": 4},
+    },
+    "smallest": {
+        "PNG": {"optimize": True},
+        "JPEG": {"quality": 85, "subsampling": "4:2:0", "optimize": True, "progressive": True},
+        "WEBP": {"quality": 80, "method": 6},
+    },
+}
+
+
+_PNG_COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+
+
+def _png_chunk(fh, tag: bytes, data: bytes) -> None:
+    fh.write(struct.pack(">I", len(data)) + tag + data)
+    fh.write(struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def _png_filter(rows: np.ndarray, bands: int) -> bytes:
+    """Scanlines of ``rows`` (h × w·bands bytes) with the Sub filter applied."""
+    filtered = np.empty((rows.shape[0], rows.shape[1] + 1), np.uint8)
+    filtered[:, 0] = 1  # Sub: each byte minus the same band of the previous pixel
+    filtered[:, 1:bands + 1] = rows[:, :bands]
+    np.subtract(rows[:, bands:], rows[:, :-bands], out=filtered[:, bands + 1:])
+    return filtered.tobytes()
+
+
+def _write_png_stream(image: DiskImage, fh, level: int) -> None:
+    """Encode ``image`` as PNG one strip at a time (Sub filter, one zlib stream)."""
+    fh.write(b"\x89PNG\r\n\x1a\n")
+    _png_chunk(fh, b"IHDR", struct.pack(">IIBBBBB", image.width, image.height, 8,
+                                        _PNG_COLOR_TYPES[image.mode], 0, 0, 0))
+    comp = zlib.compressobj(level)
+    for _, strip in image.iter_strips():
+        data = comp.compress(_png_filter(strip.reshape(strip.shape[0], -1), image.bands))
+        if data:
+            _png_chunk(fh, b"IDAT", data)
+    _png_chunk(fh, b"IDAT", comp.flush())
+    _png_chunk(fh, b"IEND", b"")
+
+
+@profiled("save_image", kind="op")
+def save_image(image: Image.Image, path: str, preset: str = "balanced") -> None:
+    """Write ``image`` without EXIF/ICC so no source metadata leaks out.
+
+    The file is written next to ``path`` and renamed into place, so an
+    interrupted save never leaves a truncated image behind.
+    """
+    options = SAVE_PRESETS.get(preset, SAVE_PRESETS["balanced"])
+    lower = path.lower()
+    if isinstance(image, DiskImage):
+        if not lower.endswith(".png"):
+            # JPEG and WEBP cap out at 65535/16383 px per side anyway
+            raise ValueError("Disk-backed images can only be saved as PNG")
+        level = 9 if options["PNG"].get("optimize") else options["PNG"].get("compress_level", 6)
+        tmp = f"{path}.part"
+        try:
+            with open(tmp, "wb") as fh:
+                _write_png_stream(image, fh, level)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return
+    # STRIP metadata by writing fresh image data without EXIF/ICC
+    if lower.endswith(('.jpg', '.jpeg')):
+        # JPEG takes L and RGB as they are; anything else is converted (alpha dropped)
+        fmt, out = "JPEG", image if image.mode in ("L", "RGB") else image.convert("RGB")
+    elif lower.endswith('.webp'):
+        _load_plugin(path)
+        fmt, out = "WEBP", image
+    else:
+        fmt, out = "PNG", image
+    tmp = f"{path}.part"
+    try:
+        out.save(tmp, format=fmt, **options[fmt])
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@profiled("display_frame")
+def display_frame(image: Image.Image, size: Tuple[int, int], bg_rgb: Tuple[int, int, int]) -> Image.Image:
+    """``image`` resized to ``size`` and flattened onto ``bg_rgb`` as an RGB frame."""
+    src = image.convert("RGB") if image.mode == "P" else image  # LANCZOS needs colours
+    frame = src.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if frame.mode == "RGBA":
+        return Image.alpha_composite(Image.new("RGBA", size, bg_rgb + (255,)), frame).convert("RGB")
+    return frame.convert("RGB")
+
+
+def suggest_output_name(image_path: Optional[str]) -> str:
+    if not image_path:
+        return "redacted.png"
+    stem, ext = os.path.splitext(os.path.basename(image_path))
+    return f"{stem}.redacted.png"
+
+
+# ------------------------ Frames --------------------------
+FRAME_FORMATS = ("GIF", "PNG", "TIFF")  # containers opened as frame sequences (PNG = APNG)
+
+# Disposal is kept as the APNG op (0 none, 1 background, 2 previous); GIF numbers it 1–3
+_GIF_TO_DISPOSAL = {2: 1, 3: 2}
+_DISPOSAL_TO_GIF = {0: 1, 1: 2, 2: 3}
+
+
+@dataclass
+class FrameEdit:
+    """One burn applied to frames ``first``–``last`` (inclusive) of a sequence."""
+    boxes: List[PendingBox]
+    pixel_size: int
+    first: int
+    last: int
+    blur_radius: int = BLUR_RADIUS
+
+
+class FrameSequence:
+    """A multi-frame image (GIF, APNG, multi-page TIFF) decoded one frame at a time.
+
+    Burns are kept as :class:`FrameEdit` records instead of pixels and applied
+    whenever a frame is decoded, so memory stays at the few frames in the
+    cache however long the animation is. ``undo``/``redo`` step through the
+    records, mirroring :class:`History`.
+    """
+    CACHE_FRAMES = 4
+
+    def __init__(self, path: str):
+        self.path = path
+        self._im = Image.open(path)
+        self.format = self._im.format
+        self.n_frames = getattr(self._im, "n_frames", 1)
+        self.size = self._im.size
+        self.loop = self._im.info.get("loop")
+        self.has_alpha = self._im.mode in ("RGBA", "LA", "PA") or "transparency" in self._im.info
+        # One mode for formats where every frame must share it (APNG). GIF frames
+        # after the first decode as RGB, so only a gray PNG/TIFF stays L
+        gray = self._im.mode in ("1", "L") and self.format != "GIF"
+        self.mode = "RGBA" if self.has_alpha else ("L" if gray else "RGB")
+        self.edits: List[FrameEdit] = []
+        self._applied = 0                          # edits[:_applied] are live; the rest can be redone
+        self._cache: "OrderedDict[int, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._im.close()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the decoded-frame cache."""
+        with self._lock:
+            return sum(image_nbytes(frame) for frame in self._cache.values())
+
+    def trim_cache(self, nbytes: int) -> int:
+        """Drop least recently used frames until ``nbytes`` are freed; return the bytes freed."""
+        freed = 0
+        with self._lock:
+            while self._cache and freed < nbytes:
+                freed += image_nbytes(self._cache.popitem(last=False)[1])
+        return freed
+
+    @property
+    def can_undo(self) -> bool:
+        return self._applied > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._applied < len(self.edits)
+
+    def applied_edits(self) -> List[FrameEdit]:
+        """The live edits, copied so a save on another thread sees a fixed list."""
+        return self.edits[:self._applied]
+
+    def apply(self, boxes: Iterable[PendingBox], pixel_size: int, first: int = 0,
+              last: Optional[int] = None, blur_radius: int = BLUR_RADIUS) -> FrameEdit:
+        last = self.n_frames - 1 if last is None else last
+        boxes = [PendingBox(box.rect, box.mode) for box in boxes]
+        edit = FrameEdit(boxes, pixel_size, max(0, first), min(self.n_frames - 1, last), blur_radius)
+        with self._lock:
+            del self.edits[self._applied:]  # a new burn drops the redo branch
+            self.edits.append(edit)
+            self._applied += 1
+            self._cache.clear()
+        return edit
+
+    def undo(self) -> None:
+        with self._lock:
+            if self._applied:
+                self._applied -= 1
+                self._cache.clear()
+
+    def redo(self) -> None:
+        with self._lock:
+            if self._applied < len(self.edits):
+                self._applied += 1
+                self._cache.clear()
+
+    @staticmethod
+    def _burn(frame: Image.Image, index: int, edits: Iterable[FrameEdit]) -> Image.Image:
+        for edit in edits:
+            if edit.first <= index <= edit.last:
+                burn_boxes(frame, edit.boxes, edit.pixel_size, edit.blur_radius)
+        return frame
+
+    @staticmethod
+    def _frame_info(im: Image.Image) -> Dict[str, int]:
+        if im.format == "GIF":
+            disposal = _GIF_TO_DISPOSAL.get(getattr(im, "disposal_method", 0), 0)
+        else:
+            disposal = int(im.info.get("disposal", 0) or 0)
+        return {"duration": int(round(im.info.get("duration", 0) or 0)), "disposal": disposal}
+
+    @profiled("frames.decode")
+    def frame(self, index: int) -> Image.Image:
+        """Frame ``index`` with the live edits burned in, in its native mode."""
+        index = max(0, min(self.n_frames - 1, index))
+        with self._lock:
+            cached = self._cache.get(index)
+            if cached is not None:
+                self._cache.move_to_end(index)
+                return cached.copy()
+            self._im.seek(index)
+            # seek() reuses the decoder's buffer, so take a copy before editing
+            frame = self._burn(native_image(self._im.copy()), index, self.applied_edits())
+            self._cache[index] = frame
+            while len(self._cache) > self.CACHE_FRAMES:
+                self._cache.popitem(last=False)
+            return frame.copy()
+
+    def iter_frames(self, edits: Optional[List[FrameEdit]] = None) -> Iterator[Tuple[Image.Image, Dict[str, int]]]:
+        """Yield ``(frame, info)`` for every frame in order, decoding each only when asked.
+
+        ``info`` holds the frame's ``duration`` (ms) and ``disposal``. A
+        separate file handle is used, so this can run on a save thread while
+        the editor keeps scrubbing.
+        """
+        edits = self.applied_edits() if edits is None else edits
+        with Image.open(self.path) as im:
+            for index in range(self.n_frames):
+                im.seek(index)
+                yield self._burn(native_image(im.copy()), index, edits), self._frame_info(im)
+
+
+def open_frames(path: str) -> Optional[FrameSequence]:
+    """A :class:`FrameSequence` for animated GIF/APNG and multi-page TIFF, else None."""
+    _load_plugin(path)
+    with Image.open(path) as im:
+        if im.format not in FRAME_FORMATS or getattr(im, "n_frames", 1) < 2:
+            return None
+    return FrameSequence(path)
+
+
+def _gif_frame(frame: Image.Image) -> Tuple[Image.Image, Optional[int]]:
+    """``frame`` as a palette image plus its transparent index, if any."""
+    if frame.mode == "P":
+        return frame, None  # native_image only keeps opaque palettes
+    if frame.mode == "L":
+        gray = frame.copy()
+        gray.putpalette(bytes(v for v in range(256) for _ in range(3)))
+        return gray, None
+    if frame.mode == "RGBA":
+        # GIF transparency is on/off: keep 255 colours and give index 255 to the holes
+        holes = frame.getchannel("A").point(lambda a: 255 if a < 128 else 0)
+        pal = frame.convert("RGB").quantize(255, method=Image.Quantize.FASTOCTREE)
+        palette = pal.getpalette()
+        pal.putpalette(palette + [0] * (768 - len(palette)))
+        pal.paste(255, mask=holes)
+        return pal, 255
+    # Octree is ~50× faster than median cut on busy frames, which adds up over an animation
+    return frame.quantize(256, method=Image.Quantize.FASTOCTREE), None
+
+
+def _write_gif_stream(frames: Iterable[Tuple[Image.Image, Dict[str, int]]], fh,
+                      loop: Optional[int]) -> None:
+    """Write GIF frames as they arrive; each gets its own colour table."""
+    from PIL import GifImagePlugin
+    first = True
+    for frame, info in frames:
+        pal, transparency = _gif_frame(frame)
+        if first:
+            pal.info["version"] = b"89a"  # frames carry graphic control blocks
+            header, _ = GifImagePlugin.getheader(pal, info={} if loop is None else {"loop": loop})
+            fh.write(b"".join(header))
+            first = False
+        params = {"duration": info["duration"], "disposal": _DISPOSAL_TO_GIF[info["disposal"]],
+                  "include_color_table": True}
+        if transparency is not None:
+            params["transparency"] = transparency
+        for data in GifImagePlugin.getdata(pal, **params):
+            fh.write(data)
+    fh.write(b";")
+
+
+def _write_apng_stream(frames: Iterable[Tuple[Image.Image, Dict[str, int]]], fh, size: Tuple[int, int],
+                       count: int, mode: str, loop: Optional[int], level: int) -> None:
+    """Write an APNG frame by frame: every frame is full-size with blend op SOURCE.
+
+    Decoded frames are already composited, so each one replaces the canvas
+    outright; the source's durations and disposal ops are kept.
+    """
+    fh.write(b"\x89PNG\r\n\x1a\n")
+    _png_chunk(fh, b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, _PNG_COLOR_TYPES[mode], 0, 0, 0))
+    _png_chunk(fh, b"acTL", struct.pack(">II", count, 1 if loop is None else loop))
+    seq = 0
+    bands = len(mode)
+    for index, (frame, info) in enumerate(frames):
+        if frame.size != size:
+            raise ValueError("Frames differ in size; save as TIFF instead")
+        duration = min(info["duration"], 65535)
+        _png_chunk(fh, b"fcTL", struct.pack(">IIIIIHHBB", seq, size[0], size[1], 0, 0,
+                                            duration, 1000, info["disposal"], 0))
+        seq += 1
+        rows = np.asarray(frame if frame.mode == mode else frame.convert(mode)).reshape(size[1], -1)
+        data = zlib.compress(_png_filter(rows, bands), level)
+        if index == 0:
+            _png_chunk(fh, b"IDAT", data)  # the first frame doubles as the still image
+        else:
+            _png_chunk(fh, b"fdAT", struct.pack(">I", seq) + data)
+            seq += 1
+    _png_chunk(fh, b"IEND", b"")
+
+
+def _write_tiff_stream(frames: Iterable[Tuple[Image.Image, Dict[str, int]]], fh, compression: str) -> None:
+    """Append each frame to ``fh`` as its own TIFF page as soon as it is decoded."""
+    from PIL import TiffImagePlugin
+    with TiffImagePlugin.AppendingTiffWriter(fh, new=True) as tiff:
+        for frame, _ in frames:
+            frame.save(tiff, format="TIFF", compression=compression)
+            tiff.newFrame()
+
+
+@profiled("save_frames", kind="op")
+def save_frames(sequence: FrameSequence, path: str, preset: str = "balanced",
+                edits: Optional[List[FrameEdit]] = None) -> None:
+    """Stream every frame of ``sequence`` through its edits and into the encoder.
+
+    The container follows the extension (.gif, .tif/.tiff, otherwise APNG),
+    so only one decoded frame is alive at a time. Like :func:`save_image`
+    no source metadata is copied and the file is renamed into place.
+    """
+    options = SAVE_PRESETS.get(preset, SAVE_PRESETS["balanced"])
+    lower = path.lower()
+    frames = sequence.iter_frames(edits)
+    tmp = f"{path}.part"
+    try:
+        with open(tmp, "w+b") as fh:
+            if lower.endswith(".gif"):
+                _write_gif_stream(frames, fh, sequence.loop)
+            elif lower.endswith((".tif", ".tiff")):
+                _write_tiff_stream(frames, fh, "tiff_lzw" if preset == "fast" else "tiff_adobe_deflate")
+            else:
+                png = options["PNG"]
+                level = 9 if png.get("optimize") else png.get("compress_level", 6)
+                _write_apng_stream(frames, fh, sequence.size, sequence.n_frames, sequence.mode,
+                                   sequence.loop, level)
+        os.replace(tmp, path)
+    except BaseException:
+        frames.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# ------------------------ Pyramid -------------------------
+class ImagePyramid:
+    """Mipmap levels (½, ¼, ⅛ …) of an image, built on a worker thread.
+
+    ``levels[i]`` is the image reduced by ``factors[i]`` (powers of two).
+    Levels are published one by one as they finish; callers fall back to a
+    finer level (ultimately the original) for anything not built yet. For a
+    :class:`DiskImage` the finest levels are skipped until one fits in
+    ``MAX_LEVEL_PIXELS``, since those would not fit in memory either.
+    """
+    MIN_EDGE = 64  # stop reducing once the long edge is this small
+    MAX_LEVEL_PIXELS = 32_000_000
+
+    def __init__(self):
+        self.levels: List[Image.Image] = []
+        self.factors: List[int] = []
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._building = False
+        self.trimmed = False    # levels were dropped by drop_levels; a build restores them
+
+    @property
+    def ready(self) -> bool:
+        return not self._building
+
+    def build(self, image) -> None:
+        """Discard current levels and rebuild them from ``image`` in the background."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self.levels, self.factors = [], []
+            self._building = True
+            self.trimmed = False
+        threading.Thread(target=self._build, args=(image, generation), daemon=True).start()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.levels, self.factors = [], []
+            self._building = False
+            self.trimmed = False
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(image_nbytes(level) for level in self.levels)
+
+    def drop_levels(self, nbytes: int) -> int:
+        """Free at least ``nbytes`` by dropping the finest levels, which cost the most
+        and are only used close to 1:1 zoom; return the bytes freed. Views at those
+        scales fall back to the original. Nothing is dropped mid-build."""
+        freed = 0
+        with self._lock:
+            if self._building:
+                return 0
+            while self.levels and freed < nbytes:
+                freed += image_nbytes(self.levels[0])
+                self.levels, self.factors = self.levels[1:], self.factors[1:]
+                self.trimmed = True
+        return freed
+
+    @profiled("pyramid.build")
+    def _build(self, image, generation: int) -> None:
+        levels: List[Image.Image] = []
+        factors: List[int] = []
+        factor = 2
+        if isinstance(image, DiskImage):
+            while (image.width // factor) * (image.height // factor) > self.MAX_LEVEL_PIXELS:
+                factor *= 2
+        src, step = image, factor
+        if image.mode == "P":
+            src = image.convert("RGB")  # palette indices can't be averaged
+        while max(src.size) > self.MIN_EDGE:
+            src = src.reduce(step)
+            levels.append(src)
+            factors.append(factor)
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self.levels, self.factors = list(levels), list(factors)
+            factor *= 2
+            step = 2
+        with self._lock:
+            if generation == self._generation:
+                self._building = False
+
+    def level_for(self, scale: float) -> Tuple[Optional[Image.Image], int]:
+        """Return the coarsest level that still has at least ``scale`` resolution,
+        with its reduction factor, or ``(None, 1)`` if the original is needed."""
+        with self._lock:
+            levels, factors = self.levels, self.factors
+        best: Tuple[Optional[Image.Image], int] = (None, 1)
+        for level, factor in zip(levels, factors):
+            if 1 / factor < scale:
+                break
+            best = (level, factor)
+        return best
+
+    @profiled("pyramid.sample")
+    def sample(self, image, scale: float, rect: Tuple[int, int, int, int], coarser: int = 0) -> Image.Image:
+        """Resample display rect ``rect`` of ``image`` shown at ``scale`` from the
+        nearest level at or above that scale, falling back to the original.
+
+        Display pixel (x, y) always shows the source pixel under its centre,
+        ``((x + 0.5) / s, (y + 0.5) / s)``, whatever ``rect`` it is sampled as
+        part of, so tiles put side by side match one sample of the whole view.
+        ``coarser`` reads from a level that many halvings below the scale, for
+        quick previews where a blockier result is fine.
+        """
+        x0, y0, x1, y1 = rect
+        src, factor = self.level_for(scale / (1 << coarser))
+        if src is None:
+            src = image
+        s = scale * factor
+        xs = np.minimum(((np.arange(x0, x1) + 0.5) / s).astype(np.int64), src.width - 1)
+        ys = np.minimum(((np.arange(y0, y1) + 0.5) / s).astype(np.int64), src.height - 1)
+        if isinstance(src, DiskImage):
+            return src.take(xs, ys)
+        crop = src.crop((int(xs[0]), int(ys[0]), int(xs[-1]) + 1, int(ys[-1]) + 1))
+        if crop.size == (len(xs), len(ys)):
+            return crop  # no pixel skipped or repeated: a plain crop
+        out = Image.fromarray(np.asarray(crop).take(ys - ys[0], axis=0).take(xs - xs[0], axis=1))
+        if crop.mode == "P":
+            out.putpalette(crop.getpalette())
+            out.info = dict(crop.info)
+        return out
+
+    @profiled("pyramid.patch")
+    def patch(self, image, rects: Iterable[Tuple[int, int, int, int]]) -> None:
+        """Refresh only the pixels under ``rects`` (image coordinates) in every level.
+
+        A build still in flight may have read the old pixels, so it is restarted.
+        """
+        with self._lock:
+            building = self._building
+        if building:
+            self.build(image)
+            return
+        prev, prev_factor = image, 1
+        rects = list(rects)
+        for level, factor in zip(self.levels, self.factors):
+            k = factor // prev_factor
+            next_rects = []
+            for x1, y1, x2, y2 in rects:
+                lx1, ly1 = max(0, x1 // k), max(0, y1 // k)
+                lx2, ly2 = min(level.width, -(-x2 // k)), min(level.height, -(-y2 // k))
+                if lx2 <= lx1 or ly2 <= ly1:
+                    continue
+                src = prev.crop((lx1 * k, ly1 * k, min(lx2 * k, prev.width), min(ly2 * k, prev.height)))
+                if src.mode != level.mode:
+                    src = src.convert(level.mode)
+                level.paste(src.reduce(k), (lx1, ly1))
+                next_rects.append((lx1, ly1, lx2, ly2))
+            prev, prev_factor, rects = level, factor, next_rects
+
+
+# ---------------------- Find matches ----------------------
+MATCH_WORK_PIXELS = 1_000_000  # coarse search size: big images are reduced to about this
+
+
+def _fast_len(n: int) -> int:
+    """Smallest 2**a * 3**b * 5**c that is >= ``n``: a size FFTs handle quickly."""
+    best = 1 << max(0, n - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p = p35
+            while p < n:
+                p *= 2
+            best = min(best, p)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _window_sums(a: np.ndarray, th: int, tw: int) -> np.ndarray:
+    """Sum over every ``th``×``tw`` window of ``a`` (valid positions), from an integral image."""
+    s = np.zeros((a.shape[0] + 1, a.shape[1] + 1), np.float64)
+    np.cumsum(np.cumsum(a, axis=0, dtype=np.float64), axis=1, out=s[1:, 1:])
+    return s[th:, tw:] - s[:-th, tw:] - s[th:, :-tw] + s[:-th, :-tw]
+
+
+def ncc_map(image: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """Normalized cross-correlation of ``template`` at every valid position of ``image``.
+
+    Both are 2-D float arrays. The correlation is one real FFT product; window
+    means and energies come from integral images, so the cost does not depend
+    on the template size. Flat windows, where NCC is undefined, score 0.
+    """
+    h, w = image.shape
+    th, tw = template.shape
+    t = template - template.mean()
+    t_norm = math.sqrt(float((t * t).sum()))
+    if t_norm < 1e-6:
+        raise ValueError("The template is a flat colour; there is nothing to match")
+    shape = (_fast_len(h), _fast_len(w))
+    # Circular correlation equals the linear one at valid positions when shape >= image
+    corr = np.fft.irfft2(np.fft.rfft2(image, shape) * np.conj(np.fft.rfft2(t, shape)), shape)
+    corr = corr[:h - th + 1, :w - tw + 1]
+    n = th * tw
+    sums = _window_sums(image, th, tw)
+    var = _window_sums(image * image, th, tw) - sums * sums / n
+    out = np.zeros_like(corr)
+    ok = var > n * 1e-2  # at least ~0.1 grey levels of spread
+    out[ok] = corr[ok] / (np.sqrt(var[ok]) * t_norm)
+    return out
+
+
+def _peaks(score: np.ndarray, threshold: float, radius: Tuple[int, int], limit: int) -> List[Tuple[int, int, float]]:
+    """Best-first local maxima of ``score`` above ``threshold``, at least ``radius`` apart."""
+    ys, xs = np.nonzero(score >= threshold)
+    values = score[ys, xs]
+    if len(values) > limit * 64:
+        keep = np.argpartition(-values, limit * 64)[:limit * 64]
+        ys, xs, values = ys[keep], xs[keep], values[keep]
+    taken = np.zeros(score.shape, bool)
+    ry, rx = radius
+    found = []
+    for i in np.argsort(-values, kind="stable"):
+        y, x = int(ys[i]), int(xs[i])
+        if taken[y, x]:
+            continue
+        found.append((x, y, float(values[i])))
+        if len(found) >= limit:
+            break
+        taken[max(0, y - ry):y + ry + 1, max(0, x - rx):x + rx + 1] = True
+    return found
+
+
+def rect_overlap(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """Intersection over union of two half-open rects."""
+    iw = min(a[2], b[2]) - max(a[0], b[0]); ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+@profiled("find_matches", kind="op")
+def find_matches(image: Image.Image, rect: Tuple[int, int, int, int], threshold: float = 0.9,
+                 max_matches: int = 500) -> List[Tuple[int, int, int, int]]:
+    """Find other places in ``image`` that look like the half-open ``rect``.
+
+    The search runs on a grayscale copy reduced to about ``MATCH_WORK_PIXELS``
+    (as long as the template stays at least 8 px on its short side). Each
+    candidate is then re-scored at full resolution in a small window around
+    it, and kept if its NCC is at least ``threshold``. Returns rects the size of
+    ``rect``, best match first, without ``rect`` itself.
+    """
+    if isinstance(image, DiskImage):
+        raise ValueError("Find matches is not available for disk-backed images")
+    w, h = image.size
+    x1, y1, x2, y2 = max(0, rect[0]), max(0, rect[1]), min(w, rect[2]), min(h, rect[3])
+    tw, th = x2 - x1, y2 - y1
+    if tw < 2 or th < 2:
+        raise ValueError("The template box is too small to match")
+    gray_img = image.convert("L")
+    gray = np.asarray(gray_img, np.float32)
+    template = gray[y1:y2, x1:x2]
+
+    factor = max(1, min(min(tw, th) // 8, round(math.sqrt(w * h / MATCH_WORK_PIXELS))))
+    if factor > 1:
+        # Blur a little wider than a cell first: otherwise a match that sits at a
+        # different offset to the cell grid than the template reduces to a
+        # different pattern (thin text strokes suffer most) and scores too low
+        blurred = gray_img.filter(ImageFilter.BoxBlur(max(1, 2 * factor // 3)))
+        coarse = np.asarray(blurred.reduce(factor), np.float32)
+        coarse_t = np.asarray(blurred.crop((x1, y1, x2, y2)).reduce(factor), np.float32)
+        score = ncc_map(coarse, coarse_t)
+        ry, rx = max(1, coarse_t.shape[0] // 2), max(1, coarse_t.shape[1] // 2)
+        seeds = [(x * factor, y * factor) for x, y, _ in
+                 _peaks(score, max(0.5, threshold - 0.15), (ry, rx), max_matches * 2)]
+    else:
+        seeds = None
+
+    if seeds is None:
+        score = ncc_map(gray, template)
+        hits = _peaks(score, threshold, (max(1, th // 2), max(1, tw // 2)), max_matches + 1)
+    else:
+        r = factor + 1
+        hits = []
+        for sx, sy in seeds:
+            wx0, wy0 = max(0, sx - r), max(0, sy - r)
+            wx1, wy1 = min(w, sx + r + tw), min(h, sy + r + th)
+            if wx1 - wx0 < tw or wy1 - wy0 < th:
+                continue
+            local = ncc_map(gray[wy0:wy1, wx0:wx1], template)
+            iy, ix = np.unravel_index(int(local.argmax()), local.shape)
+            if local[iy, ix] >= threshold:
+                hits.append((wx0 + int(ix), wy0 + int(iy), float(local[iy, ix])))
+        hits.sort(key=lambda hit: -hit[2])
+
+    source = (x1, y1, x2, y2)
+    matches: List[Tuple[int, int, int, int]] = []
+    for x, y, _ in hits:
+        found = (x, y, x + tw, y + th)
+        # Refined seeds can converge on the same spot; keep the best of each
+        if rect_overlap(found, source) > 0.5 or any(rect_overlap(found, m) > 0.5 for m in matches):
+            continue
+        matches.append(found)
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+# ------------------------ History -------------------------
+@dataclass
+class RegionPatch:
+    """Saved pixels of one rectangle, optionally zlib-compressed.
+
+    While the patch is spilled, ``data`` is empty and ``spilled`` holds the
+    (offset, length) of its bytes in the history's :class:`SpillFile`.
+    """
+    rect: Tuple[int, int, int, int]
+    mode: str
+    data: bytes
+    compressed: bool = False
+    spilled: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def capture(cls, image: Image.Image, rect: Tuple[int, int, int, int], compress: bool) -> "RegionPatch":
+        data = image.crop(rect).tobytes()
+        if compress:
+            data = zlib.compress(data, 1)
+        return cls(rect, image.mode, data, compress)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def disk_bytes(self) -> int:
+        return self.spilled[1] if self.spilled else 0
+
+    def spill(self, spill: "SpillFile") -> int:
+        """Move the bytes to ``spill`` (compressing them first); return the bytes freed."""
+        freed = len(self.data)
+        if not self.compressed:
+            self.data, self.compressed = zlib.compress(self.data, 1), True
+        self.spilled = spill.write(self.data)
+        self.data = b""
+        return freed
+
+    def load(self, spill: "SpillFile") -> None:
+        if self.spilled:
+            self.data = spill.read(*self.spilled)
+            spill.release(self.spilled[1])
+            self.spilled = None
+
+    def restore(self, image: Image.Image) -> None:
+        x1, y1, x2, y2 = self.rect
+        data = zlib.decompress(self.data) if self.compressed else self.data
+        image.paste(Image.frombytes(self.mode, (x2 - x1, y2 - y1), data), (x1, y1))
+
+
+@dataclass
+class HistoryEntry:
+    patches: List[RegionPatch]
+
+    @property
+    def rects(self) -> List[Tuple[int, int, int, int]]:
+        return [p.rect for p in self.patches]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(p.nbytes for p in self.patches)
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(p.disk_bytes for p in self.patches)
+
+
+class SpillFile:
+    """Append-only temp file holding history patches pushed out of memory.
+
+    Space freed by patches that were loaded back (or dropped) is reclaimed by
+    truncating once nothing live is left in the file; :class:`History`
+    rewrites the file when most of it is dead.
+    """
+
+    def __init__(self):
+        self._fh = None
+        self.path: Optional[str] = None
+        self.size = 0       # bytes written so far
+        self.live = 0       # bytes still referenced by a spilled patch
+        self._finalizer = None
+
+    def _open(self):
+        fd, self.path = tempfile.mkstemp(prefix="redax-", suffix=".undo")
+        self._fh = os.fdopen(fd, "w+b")
+        self._finalizer = weakref.finalize(self, _drop_spill, self._fh, self.path)
+
+    def write(self, data: bytes) -> Tuple[int, int]:
+        if self._fh is None:
+            self._open()
+        self._fh.seek(self.size)
+        self._fh.write(data)
+        offset, self.size = self.size, self.size + len(data)
+        self.live += len(data)
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> bytes:
+        self._fh.flush()
+        self._fh.seek(offset)
+        return self._fh.read(length)
+
+    def release(self, length: int) -> None:
+        """Mark ``length`` spilled bytes as no longer referenced."""
+        self.live -= length
+        if self.live <= 0 and self._fh is not None:
+            self.live = self.size = 0
+            self._fh.truncate(0)
+
+    def close(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+        self._fh = self._finalizer = None
+        self.path = None
+        self.size = self.live = 0
+
+
+def _drop_spill(fh, path: str) -> None:
+    fh.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class History:
+    """Undo/redo that stores only the pixels a burn is about to change.
+
+    Entries are restored in place, so memory grows with the redacted area
+    rather than the image size. Once ``max_bytes`` is exceeded the oldest
+    undo steps are dropped (the newest one is always kept). :meth:`spill`
+    moves the steps furthest from the current state to a temp file; they
+    are read back when undo or redo reaches them.
+    """
+    SPILL_SLACK = 64 * 1024 * 1024  # dead bytes tolerated in the spill file before it is rewritten
+
+    def __init__(self, compress: bool = True, max_bytes: int = 256 * 1024 * 1024):
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.undo_stack: List[HistoryEntry] = []
+        self.redo_stack: List[HistoryEntry] = []
+        self._spill = SpillFile()
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory."""
+        return sum(e.nbytes for e in self.undo_stack) + sum(e.nbytes for e in self.redo_stack)
+
+    @property
+    def disk_bytes(self) -> int:
+        """Bytes spilled to the temp file."""
+        return sum(e.disk_bytes for e in self.undo_stack) + sum(e.disk_bytes for e in self.redo_stack)
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._spill.close()
+
+    def _capture(self, image: Image.Image, rects: Iterable[Tuple[int, int, int, int]]) -> HistoryEntry:
+        return HistoryEntry([RegionPatch.capture(image, r, self.compress) for r in rects])
+
+    @profiled("history.record")
+    def record(self, image: Image.Image, rects: Iterable[Tuple[int, int, int, int]]) -> None:
+        """Save the current pixels under ``rects``; call right before changing them."""
+        self.undo_stack.append(self._capture(image, rects))
+        self._drop(self.redo_stack)
+        self._enforce_limit()
+
+    @profiled("history.undo")
+    def undo(self, image: Image.Image) -> List[Tuple[int, int, int, int]]:
+        """Restore the last recorded state in place and return the rects it touched."""
+        return self._swap(image, self.undo_stack, self.redo_stack)
+
+    @profiled("history.redo")
+    def redo(self, image: Image.Image) -> List[Tuple[int, int, int, int]]:
+        return self._swap(image, self.redo_stack, self.undo_stack)
+
+    def _swap(self, image, source: List[HistoryEntry], target: List[HistoryEntry]):
+        if not source:
+            return []
+        entry = source.pop()
+        for patch in entry.patches:
+            patch.load(self._spill)
+        # Every patch was taken from the same state, so overlaps restore in any order
+        target.append(self._capture(image, entry.rects))
+        for patch in entry.patches:
+            patch.restore(image)
+        self._enforce_limit()
+        return entry.rects
+
+    @profiled("history.spill")
+    def spill(self, nbytes: int) -> int:
+        """Move in-memory steps to the temp file until ``nbytes`` are freed; return the
+        bytes freed. The oldest undo steps go first, then the furthest redo steps;
+        the next undo and the next redo always stay in memory."""
+        freed = 0
+        self._compact_spill()
+        for stack in (self.undo_stack, self.redo_stack):
+            for entry in stack[:-1]:
+                for patch in entry.patches:
+                    if freed >= nbytes:
+                        return freed
+                    if patch.spilled is None:
+                        freed += patch.spill(self._spill)
+        return freed
+
+    def _compact_spill(self) -> None:
+        """Copy the live spilled patches into a fresh file once dead space dominates."""
+        old = self._spill
+        if old.size <= 2 * old.live + self.SPILL_SLACK:
+            return
+        fresh = SpillFile()
+        for entry in self.undo_stack + self.redo_stack:
+            for patch in entry.patches:
+                if patch.spilled:
+                    patch.spilled = fresh.write(old.read(*patch.spilled))
+        old.close()
+        self._spill = fresh
+
+    def _drop(self, entries: List[HistoryEntry], count: Optional[int] = None) -> None:
+        """Remove ``entries[:count]`` (all by default), releasing their spilled bytes."""
+        count = len(entries) if count is None else count
+        for entry in entries[:count]:
+            for patch in entry.patches:
+                if patch.spilled:
+                    self._spill.release(patch.spilled[1])
+        del entries[:count]
+
+    def _enforce_limit(self) -> None:
+        # Spilled steps still count: spilling saves RAM, it doesn't deepen the history
+        while len(self.undo_stack) > 1 and self.nbytes + self.disk_bytes > self.max_bytes:
+            self._drop(self.undo_stack, 1)
+
+
+# ---------------------- Memory budget ---------------------
+# Bytes per pixel in Pillow's own storage (multi-band modes are padded to 4)
+_PIXEL_BYTES = {"1": 1, "L": 1, "P": 1, "I;16": 2, "I;16L": 2, "I;16B": 2}
+
+
+def image_nbytes(image) -> int:
+    """Resident bytes of a PIL image's pixels. A :class:`DiskImage` counts as 0:
+    its pages belong to the OS file cache, which can drop them on its own."""
+    if image is None or isinstance(image, DiskImage):
+        return 0
+    return image.width * image.height * _PIXEL_BYTES.get(image.mode, 4)
+
+
+class MemoryBudget:
+    """Byte accounting for the editor's large buffers, with eviction over a budget.
+
+    Each buffer is registered under a name with a ``size()`` callable and,
+    if it can give memory back, a ``release(nbytes) -> freed`` callable.
+    :meth:`enforce` asks the releasers in registration order for the excess
+    until usage is back under ``budget`` bytes (0 means no limit), so
+    rebuildable caches should be registered before history spilling.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._accounts: List[Tuple[str, Callable[[], int], Optional[Callable[[int], int]]]] = []
+
+    def register(self, name: str, size: Callable[[], int],
+                 release: Optional[Callable[[int], int]] = None) -> None:
+        self._accounts.append((name, size, release))
+
+    def usage(self) -> Dict[str, int]:
+        return {name: size() for name, size, _ in self._accounts}
+
+    @property
+    def total(self) -> int:
+        return sum(self.usage().values())
+
+    @profiled("memory.enforce")
+    def enforce(self) -> Dict[str, int]:
+        """Release memory until under budget; return the bytes freed by each releaser."""
+        freed: Dict[str, int] = {}
+        if not self.budget:
+            return freed
+        excess = self.total - self.budget
+        for name, _, release in self._accounts:
+            if excess <= 0:
+                break
+            if release is not None:
+                got = release(excess)
+                if got:
+                    freed[name] = got
+                    excess -= got
+        return freed
+
+
+# --------------------- Session journal --------------------
+def file_digest(path: str, chunk: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in ``chunk``-sized pieces."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@dataclass
+class ReplayResult:
+    image: Image.Image                   # the caller's image, or a fresh one from a checkpoint
+    pending: Dict[int, PendingBox]       # journal id -> box still waiting to be burned
+    burns: int                           # live burns (undone ones excluded)
+    ops: int                             # operations replayed after the starting point
+    checkpoint: Optional[str] = None     # checkpoint file the replay started from
+
+
+class SessionJournal:
+    """Append-only log of one editing session, kept next to the source image.
+
+    The first line names the source's SHA-256; every later line is one
+    operation (``box``, ``move``, ``del``, ``burn``, ``undo``,
+    ``redo``, ``checkpoint``, ``saved``) written and flushed as it happens,
+    so a crash loses at most the line being written. The file is only ever
+    appended to. Every ``CHECKPOINT_BURNS`` burns the burned pixels are
+    written to a numbered PNG on a worker thread, so reopening replays only
+    the operations after the newest checkpoint.
+    """
+    SUFFIX = ".redax-session"
+    CHECKPOINT_BURNS = 20
+    KEEP_CHECKPOINTS = 2
+    VERSION = 1
+
+    def __init__(self, source_path: str, digest: str):
+        self.source_path = source_path
+        self.path = self.path_for(source_path)
+        self.digest = digest
+        self._fh = None
+        self._ids: Dict[int, Tuple[int, PendingBox]] = {}  # id(box) -> (journal id, box)
+        self._next_id = 1
+        self._next_checkpoint = 1
+        self._burns_since_checkpoint = 0
+        self.burns = 0                                     # live burns, as a replay would count them
+        self.checkpoint_error: Optional[str] = None        # why the last background checkpoint failed
+        self._lock = threading.Lock()
+
+    @classmethod
+    def path_for(cls, source_path: str) -> str:
+        return source_path + cls.SUFFIX
+
+    def checkpoint_path(self, n: int) -> str:
+        return f"{self.source_path}.redax-ckpt-{n}.png"
+
+    # -- reading --
+    @classmethod
+    def read(cls, source_path: str) -> Tuple[Optional[dict], List[dict]]:
+        """Header and operations of the journal for ``source_path`` (``None, []`` if absent).
+
+        A torn last line (crash mid-write) is ignored.
+        """
+        path = cls.path_for(source_path)
+        if not os.path.exists(path):
+            return None, []
+        header, ops = None, []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                if header is None:
+                    header = rec
+                else:
+                    ops.append(rec)
+        return header, ops
+
+    @staticmethod
+    def has_work(ops: List[dict]) -> bool:
+        """True if anything happened after the last save."""
+        return bool(ops) and ops[-1].get("op") != "saved"
+
+    def discard(self) -> None:
+        """Delete the journal and its checkpoints (a fresh session starts on the next op)."""
+        self.close()
+        paths = [self.path] + [self.checkpoint_path(n) for n in range(1, self._scan_checkpoints() + 1)]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self._ids.clear()
+        self._next_id = self._next_checkpoint = 1
+        self._burns_since_checkpoint = self.burns = 0
+
+    def _scan_checkpoints(self) -> int:
+        folder = os.path.dirname(os.path.abspath(self.source_path))
+        prefix = os.path.basename(self.source_path) + ".redax-ckpt-"
+        numbers = [0]
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and name.endswith(".png"):
+                stem = name[len(prefix):-4]
+                if stem.isdigit():
+                    numbers.append(int(stem))
+        return max(numbers)
+
+    # -- replay --
+    @profiled("journal.replay", kind="op")
+    def replay(self, ops: List[dict], image, history: Optional[History] = None,
+               frames: Optional["FrameSequence"] = None) -> ReplayResult:
+        """Re-apply ``ops`` to the freshly opened ``image`` (or ``frames``) and adopt the result.
+
+        Starts from the newest checkpoint whose file exists and that no later
+        undo reaches past; otherwise from the source pixels. Afterwards new
+        operations continue the same journal.
+        """
+        start, pending, burns, checkpoint = 0, {}, 0, None
+        if frames is None and isinstance(image, Image.Image):
+            for k in range(len(ops) - 1, -1, -1):
+                rec = ops[k]
+                if rec.get("op") != "checkpoint":
+                    continue
+                path = self.checkpoint_path(rec["n"])
+                if os.path.exists(path) and self._undo_depth_ok(ops[k + 1:]):
+                    with Image.open(path) as ckpt:
+                        image = native_image(ckpt.copy())
+                    pending = {int(j): PendingBox(tuple(rect), mode) for j, rect, mode in rec["pending"]}
+                    burns, start, checkpoint = rec["burns"], k + 1, path
+                    break
+        for rec in ops[start:]:
+            burns += self._apply(rec, image, history, frames, pending)
+        # Carry on from here: new boxes get fresh ids, checkpoints fresh numbers
+        self._ids = {id(box): (j, box) for j, box in pending.items()}
+        ids = [int(rec.get("id", 0)) for rec in ops] + list(pending) + [0]
+        self._next_id = max(ids) + 1
+        self._next_checkpoint = max([rec.get("n", 0) for rec in ops if rec.get("op") == "checkpoint"] + [0]) + 1
+        self.burns = burns
+        return ReplayResult(image, pending, burns, len(ops) - start, checkpoint)
+
+    @staticmethod
+    def _undo_depth_ok(ops: List[dict]) -> bool:
+        """False if these ops undo further back than the point they start from."""
+        depth = 0
+        for rec in ops:
+            op = rec.get("op")
+            if op == "burn":
+                depth += 1
+            elif op == "undo":
+                if depth == 0:
+                    return False
+                depth -= 1
+            elif op == "redo":
+                depth += 1
+        return True
+
+    @staticmethod
+    def _apply(rec: dict, image, history: Optional[History], frames, pending: Dict[int, PendingBox]) -> int:
+        """Apply one operation; returns the change in live burns."""
+        op = rec.get("op")
+        if op == "box":
+            pending[int(rec["id"])] = PendingBox(tuple(rec["rect"]), rec["mode"])
+        elif op == "move" and int(rec["id"]) in pending:
+            pending[int(rec["id"])].rect = tuple(rec["rect"])
+        elif op == "del":
+            pending.pop(int(rec["id"]), None)
+        elif op == "burn":
+            boxes = list(pending.values())
+            pending.clear()
+            if frames is not None:
+                first, last = rec.get("frames", (0, frames.n_frames - 1))
+                frames.apply(boxes, rec["px"], first, last, rec.get("blur", BLUR_RADIUS))
+            else:
+                rects = affected_rects(boxes, image.size)
+                if history is not None:
+                    history.record(image, rects)
+                burn_boxes(image, boxes, rec["px"], rec.get("blur", BLUR_RADIUS))
+            return 1
+        elif op in ("undo", "redo"):
+            pending.clear()
+            log = frames if frames is not None else history
+            if log is None or not (log.can_undo if op == "undo" else log.can_redo):
+                return 0
+            if frames is not None:
+                frames.undo() if op == "undo" else frames.redo()
+            else:
+                history.undo(image) if op == "undo" else history.redo(image)
+            return -1 if op == "undo" else 1
+        return 0
+
+    # -- writing --
+    def _write(self, *records: dict) -> None:
+        with self._lock:
+            if self._fh is None:
+                fresh = not os.path.exists(self.path)
+                # Created on the first operation, so merely viewing an image leaves nothing behind
+                self._fh = open(self.path, "a", encoding="utf-8")
+                if fresh:
+                    self._fh.write(json.dumps({"redax_session": self.VERSION, "source": os.path.basename(self.source_path),
+                                               "sha256": self.digest}) + "\n")
+            for rec in records:
+                self._fh.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def _box_id(self, box: PendingBox) -> int:
+        entry = self._ids.get(id(box))
+        if entry is None:
+            entry = self._ids[id(box)] = (self._next_id, box)
+            self._next_id += 1
+        return entry[0]
+
+    def add_boxes(self, boxes: Iterable[PendingBox]) -> None:
+        self._write(*({"op": "box", "id": self._box_id(b), "rect": list(b.rect), "mode": b.mode} for b in boxes))
+
+    def move_box(self, box: PendingBox) -> None:
+        self._write({"op": "move", "id": self._box_id(box), "rect": list(box.rect)})
+
+    def delete_box(self, box: PendingBox) -> None:
+        entry = self._ids.pop(id(box), None)
+        if entry is not None:
+            self._write({"op": "del", "id": entry[0]})
+
+    def burn(self, pixel_size: int, frames: Optional[Tuple[int, int]] = None,
+             blur_radius: int = BLUR_RADIUS) -> None:
+        rec = {"op": "burn", "px": pixel_size, "blur": blur_radius}
+        if frames is not None:
+            rec["frames"] = list(frames)
+        self._ids.clear()
+        self._burns_since_checkpoint += 1
+        self.burns += 1
+        self._write(rec)
+
+    def undo(self) -> None:
+        self._ids.clear()
+        self.burns = max(0, self.burns - 1)
+        self._write({"op": "undo"})
+
+    def redo(self) -> None:
+        self._ids.clear()
+        self.burns += 1
+        self._write({"op": "redo"})
+
+    def saved(self, path: str) -> None:
+        self._write({"op": "saved", "path": os.path.basename(path)})
+
+    def maybe_checkpoint(self, image, executor=None) -> Optional[Future]:
+        """Every ``CHECKPOINT_BURNS`` burns, snapshot ``image`` for faster resume.
+
+        The record is appended now, at the point in the log it describes; the
+        PNG is written (temp file, then rename) on ``executor`` or inline. A
+        record whose file never appeared is skipped on replay. Disk-backed
+        images are never checkpointed.
+        """
+        if self._burns_since_checkpoint < self.CHECKPOINT_BURNS or not isinstance(image, Image.Image):
+            return None
+        self._burns_since_checkpoint = 0
+        n = self._next_checkpoint
+        self._next_checkpoint += 1
+        pending = [[j, list(box.rect), box.mode] for j, box in self._ids.values()]
+        snapshot = image.copy()
+        self._write({"op": "checkpoint", "n": n, "burns": self.burns, "pending": pending})
+        if executor is None:
+            self._write_checkpoint(snapshot, n)
+            return None
+        future = executor.submit(self._write_checkpoint, snapshot, n)
+        future.add_done_callback(lambda f, n=n: self._checkpoint_done(f, n))
+        return future
+
+    def _checkpoint_done(self, future: Future, n: int) -> None:
+        """Record (and report) a checkpoint that failed on the worker; nobody else
+        waits on its future. Replay skips the record, so only resume speed suffers."""
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            self.checkpoint_error = f"{os.path.basename(self.checkpoint_path(n))}: {error}"
+            print(f"[WARN] Session checkpoint failed: {self.checkpoint_error}", file=sys.stderr)
+
+    @profiled("journal.checkpoint")
+    def _write_checkpoint(self, snapshot: Image.Image, n: int) -> None:
+        path = self.checkpoint_path(n)
+        tmp = f"{path}.part"
+        try:
+            snapshot.save(tmp, format="PNG", compress_level=1)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.checkpoint_error = None
+        # Older checkpoints are superseded once this one is in place
+        for old in range(max(1, n - 10), n - self.KEEP_CHECKPOINTS + 1):
+            stale = self.checkpoint_path(old)
+            if os.path.exists(stale):
+                os.remove(stale)
+
+
+# ----------------------- Manifests ------------------------
+@dataclass
+class BatchJob:
+    src: str
+    dst: str
+    boxes: List[PendingBox] = field(default_factory=list)
+    pixel_size: int = 12
+    preset: str = "balanced"
+    blur_radius: int = BLUR_RADIUS
+
+
+@dataclass
+class BatchResult:
+    src: str
+    dst: str
+    megapixels: float = 0.0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def _parse_box(raw) -> PendingBox:
+    if isinstance(raw, dict):
+        rect, mode = raw.get("rect"), raw.get("mode", "black")
+    else:
+        rect, mode = raw, "black"
+    if not rect or len(rect) != 4:
+        raise ValueError(f"box needs a 4-value rect, got {rect!r}")
+    if mode not in MODES:
+        raise ValueError(f"unknown box mode {mode!r}")
+    x1, y1, x2, y2 = (int(v) for v in rect)
+    x1, x2 = sorted((x1, x2)); y1, y2 = sorted((y1, y2))
+    return PendingBox(rect=(x1, y1, x2, y2), mode=mode)
+
+
+def _load_document(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".yml", ".yaml")):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _iter_manifest_entries(path: str) -> Iterator[Tuple[dict, dict]]:
+    """Yield (defaults, entry) pairs. ``.jsonl`` manifests are streamed line by line."""
+    if path.lower().endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield {}, json.loads(line)
+        return
+
+    data = _load_document(path)
+    if isinstance(data, list):
+        data = {"files": data}
+    if not isinstance(data, dict):
+        raise ValueError("manifest must be a list of files or a mapping with 'files'")
+    defaults = {k: v for k, v in data.items() if k != "files"}
+    for entry in data.get("files") or []:
+        yield defaults, entry
+
+
+def load_manifest(path: str, output_dir: Optional[str] = None,
+                  pixel_size: Optional[int] = None, preset: Optional[str] = None,
+                  blur_radius: Optional[int] = None) -> Iterator[BatchJob]:
+    """Turn a JSON/YAML/JSONL manifest into :class:`BatchJob` objects lazily.
+
+    Each file entry looks like ``{"path": ..., "boxes": [{"rect": [x1, y1, x2, y2],
+    "mode": "black"}], "output": ...}``. Top-level ``output_dir``/``pixel``/``blur``/
+    ``preset`` keys act as defaults; relative paths are resolved against the
+    manifest's folder.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    for defaults, entry in _iter_manifest_entries(path):
+        src = os.path.join(base, entry["path"])
+        out_dir = output_dir or defaults.get("output_dir")
+        if entry.get("output"):
+            dst = os.path.join(base, entry["output"])
+        else:
+            folder = os.path.join(base, out_dir) if out_dir else os.path.dirname(src)
+            dst = os.path.join(folder, suggest_output_name(src))
+        px = pixel_size or entry.get("pixel") or defaults.get("pixel", 12)
+        blur = blur_radius or entry.get("blur") or defaults.get("blur", BLUR_RADIUS)
+        boxes = [_parse_box(b) for b in entry.get("boxes") or []]
+        job_preset = preset or entry.get("preset") or defaults.get("preset", "balanced")
+        if job_preset not in SAVE_PRESETS:
+            raise ValueError(f"unknown save preset {job_preset!r}")
+        yield BatchJob(src=src, dst=dst, boxes=boxes, pixel_size=int(px), preset=job_preset,
+                       blur_radius=int(blur))
+
+
+# ------------------------- Batch --------------------------
+def redact_file(job: BatchJob) -> BatchResult:
+    """Open, burn and save a single job. Runs inside worker processes."""
+    start = time.perf_counter()
+    try:
+        img = open_image(job.src)
+        burn_boxes(img, job.boxes, job.pixel_size, job.blur_radius)
+        os.makedirs(os.path.dirname(job.dst) or ".", exist_ok=True)
+        save_image(img, job.dst, job.preset)
+        mp = img.width * img.height / 1e6
+        return BatchResult(job.src, job.dst, mp, time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(job.src, job.dst, 0.0, time.perf_counter() - start, error=str(e))
+
+
+def run_batch(jobs: Iterable[BatchJob], workers: Optional[int] = None,
+              max_inflight: Optional[int] = None) -> Iterator[BatchResult]:
+    """Redact ``jobs`` on a process pool, yielding results as they finish.
+
+    At most ``max_inflight`` jobs are submitted at once, so memory stays flat
+    regardless of how many files the manifest lists.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # only the CLI pays for multiprocessing
+    workers = workers or os.cpu_count() or 1
+    limit = max_inflight or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        inflight = set()
+        for job in jobs:
+            inflight.add(pool.submit(redact_file, job))
+            if len(inflight) >= limit:
+                done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+        while inflight:
+            done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+
+
+def batch_main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="redax batch",
+                                     description="Redact many images from a JSON/YAML manifest.")
+    parser.add_argument("manifest", help="manifest file (.json, .jsonl, .yml/.yaml)")
+    parser.add_argument("-o", "--output-dir", help="write outputs here instead of next to the sources")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--pixel", type=int, default=None, help="override pixel size for pixelate boxes")
+    parser.add_argument("--blur", type=int, default=None, help="override radius for blur boxes")
+    parser.add_argument("--preset", choices=list(SAVE_PRESETS), default=None,
+                        help="encoder effort (default: balanced)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = failed = 0
+    megapixels = 0.0
+    try:
+        out_dir = os.path.abspath(args.output_dir) if args.output_dir else None
+        jobs = load_manifest(args.manifest, out_dir, args.pixel, args.preset, args.blur)
+        for res in run_batch(jobs, workers=args.workers):
+            count += 1
+            if res.error:
+                failed += 1
+                print(f"[FAIL] {res.src}: {res.error}", file=sys.stderr)
+                continue
+            megapixels += res.megapixels
+            if not args.quiet:
+                print(f"[OK] {res.src} -> {res.dst} ({res.seconds * 1000:.0f} ms)")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[ERROR] Bad manifest: {e}", file=sys.stderr)
+        return 2
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Processed {count} files ({failed} failed) in {elapsed:.2f}s | "
+          f"{count / elapsed:.1f} files/s | {megapixels / elapsed:.1f} MP/s")
+    return 1 if failed else 0
+
+
+# ------------------------- Watch --------------------------
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff", ".gif")
+# Names that download tools, editors and copy programs use while a file is incomplete
+_TEMP_SUFFIXES = (".part", ".tmp", ".crdownload", ".download", "~")
+
+
+@dataclass
+class WatchTemplate:
+    """Boxes applied to every file that arrives in a watched folder."""
+    boxes: List[PendingBox]
+    pixel_size: int = 12
+    preset: str = "balanced"
+    output_dir: Optional[str] = None
+    blur_radius: int = BLUR_RADIUS
+
+
+def load_watch_template(path: str) -> WatchTemplate:
+    """Read a JSON/YAML template: ``{"boxes": [...], "pixel": 12, "blur": 16, "preset": ..., "output_dir": ...}``.
+
+    Boxes use the manifest syntax (see :func:`load_manifest`).
+    """
+    data = _load_document(path)
+    if isinstance(data, list):
+        data = {"boxes": data}
+    if not isinstance(data, dict):
+        raise ValueError("template must be a list of boxes or a mapping with 'boxes'")
+    boxes = [_parse_box(b) for b in data.get("boxes") or []]
+    if not boxes:
+        raise ValueError("template has no boxes")
+    preset = data.get("preset", "balanced")
+    if preset not in SAVE_PRESETS:
+        raise ValueError(f"unknown save preset {preset!r}")
+    return WatchTemplate(boxes, int(data.get("pixel", 12)), preset, data.get("output_dir"),
+                         int(data.get("blur", BLUR_RADIUS)))
+
+
+def _warm_worker() -> None:
+    """Pool initializer: load PIL's plugins and run the codecs once, so the
+    first real file doesn't pay for imports and lazy initialisation."""
+    Image.init()
+    tiny = Image.new("RGB", (16, 16))
+    burn_boxes(tiny, [PendingBox((0, 0, 7, 7), "pixelate"), PendingBox((8, 0, 15, 7), "blur"),
+                      PendingBox((8, 8, 15, 15), "black")], 4, 2)
+    for fmt in ("PNG", "JPEG", "WEBP"):
+        try:
+            tiny.save(io.BytesIO(), fmt)
+        except (KeyError, OSError):
+            pass  # codec not built into this Pillow
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class _PollWatcher:
+    """Portable fallback: rescan the folder and report entries whose size or mtime changed, or that went away."""
+    name = "polling"
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._known: Dict[str, Tuple[int, int]] = {}
+
+    def poll(self, timeout: float) -> List[str]:
+        time.sleep(timeout)
+        return self.scan()
+
+    def scan(self) -> List[str]:
+        changed, known = [], {}
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError:
+            return changed
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            known[entry.path] = sig
+            if self._known.get(entry.path) != sig:
+                changed.append(entry.path)
+        changed.extend(path for path in self._known if path not in known)
+        self._known = known
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyWatcher:
+    """Linux inotify through ctypes: wake up only when something in the folder changes."""
+    name = "inotify"
+    IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_Q_OVERFLOW = 0x100, 0x200, 0x4000
+
+    def __init__(self, folder: str):
+        import ctypes
+        import ctypes.util
+        self.folder = folder
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+                | self.IN_CREATE | self.IN_DELETE)
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, f"inotify_add_watch failed for {folder}")
+
+    def poll(self, timeout: float) -> List[str]:
+        import select
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        paths, offset = [], 0
+        while offset < len(data):
+            _wd, mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+            offset += 16 + length
+            if mask & self.IN_Q_OVERFLOW:
+                return self.scan()  # events were dropped; look at everything
+            if name:
+                paths.append(os.path.join(self.folder, os.fsdecode(name)))
+        return paths
+
+    def scan(self) -> List[str]:
+        try:
+            return [entry.path for entry in os.scandir(self.folder)]
+        except OSError:
+            return []
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _make_watcher(folder: str, force_poll: bool = False):
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(folder)
+        except (OSError, AttributeError):
+            pass  # no inotify (old kernel, exotic libc, watch limit reached)
+    return _PollWatcher(folder)
+
+
+class LatencyStats:
+    """Per-file latency (arrival noticed -> output written), kept for the last ``window`` files."""
+
+    def __init__(self, window: int = 10_000):
+        self.samples: deque = deque(maxlen=window)
+        self.count = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.samples.append(seconds)
+
+    def summary(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        head = f"{self.count} files ({self.failed} failed) | {self.count / elapsed * 60:.1f} files/min"
+        if not self.samples:
+            return head
+        ms = np.array(self.samples) * 1000
+        return (f"{head} | latency p50 {np.percentile(ms, 50):.0f} ms, "
+                f"p95 {np.percentile(ms, 95):.0f} ms, max {ms.max():.0f} ms")
+
+
+class WatchDaemon:
+    """Redact every image that lands in ``folder`` with ``template``'s boxes.
+
+    A file is picked up once its size and mtime have stayed the same for
+    ``settle`` seconds, so half-copied files are never opened; a file that
+    changes again later is redacted again. At most ``max_inflight`` files are
+    handed to the (pre-started, pre-warmed) worker pool at a time; anything
+    beyond that waits as a path in the backlog, and once ``max_backlog`` paths
+    wait, settled files are left where they are until there is room. Files
+    whose output is already newer than the source are skipped, so a restart
+    doesn't redo old work. What is remembered about a file is dropped when it
+    is deleted or moved away.
+    """
+
+    def __init__(self, folder: str, template: WatchTemplate, workers: Optional[int] = None,
+                 max_inflight: Optional[int] = None, settle: float = 0.5, poll_interval: float = 1.0,
+                 force_poll: bool = False, stats_every: float = 60.0, max_backlog: int = 1000,
+                 log: Callable[[str], None] = print):
+        self.folder = os.path.abspath(folder)
+        self.template = template
+        out = template.output_dir or "redacted"
+        self.output_dir = out if os.path.isabs(out) else os.path.join(self.folder, out)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or self.workers * 2
+        self.max_backlog = max(1, max_backlog)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.force_poll = force_poll
+        self.stats_every = stats_every
+        self.log = log
+        self.stats = LatencyStats()
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        lower = name.lower()
+        return (not name.startswith(".") and not lower.endswith(_TEMP_SUFFIXES)
+                and lower.endswith(IMAGE_EXTS) and ".redacted." not in lower
+                and os.path.isfile(path))
+
+    def _output_for(self, src: str) -> str:
+        return os.path.join(self.output_dir, suggest_output_name(src))
+
+    def _up_to_date(self, src: str, sig: Tuple[int, int]) -> bool:
+        out = _signature(self._output_for(src))
+        return out is not None and out[1] >= sig[1]
+
+    def run(self, stop: threading.Event) -> LatencyStats:
+        """Watch until ``stop`` is set, then finish the files in flight and return the stats."""
+        from concurrent.futures import ProcessPoolExecutor
+        os.makedirs(self.output_dir, exist_ok=True)
+        watcher = _make_watcher(self.folder, self.force_poll)
+        done_sigs: Dict[str, Tuple[int, int]] = {}    # last signature redacted (or failed) per path
+        settling: Dict[str, Tuple[Tuple[int, int], float, float]] = {}  # sig, first seen, last change
+        backlog: deque = deque()                      # (path, sig, first seen), ready to go
+        queued: Dict[str, Tuple[int, int]] = {}       # backlog + in flight, by path
+        inflight: Dict[Future, Tuple[str, Tuple[int, int], float]] = {}
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker) as pool:
+            # Start every worker now rather than when the first file arrives
+            wait([pool.submit(os.getpid) for _ in range(self.workers)])
+            self.log(f"[WATCH] {self.folder} -> {self.output_dir} ({watcher.name}, "
+                     f"{self.workers} workers, {self.max_inflight} in flight)")
+            touched = watcher.scan()
+            next_stats = time.perf_counter() + self.stats_every
+            try:
+                while not stop.is_set():
+                    now = time.perf_counter()
+                    for path in set(touched):
+                        if not os.path.lexists(path):
+                            # Deleted or moved away: forget it (a new file of that name starts afresh)
+                            done_sigs.pop(path, None)
+                            settling.pop(path, None)
+                            continue
+                        if not self._wanted(path):
+                            continue
+                        sig = _signature(path)
+                        if sig is None or done_sigs.get(path) == sig or queued.get(path) == sig:
+                            continue
+                        prev = settling.get(path)
+                        if prev is None or prev[0] != sig:
+                            settling[path] = (sig, prev[1] if prev else now, now)
+
+                    for path, (sig, first, last) in list(settling.items()):
+                        if len(backlog) >= self.max_backlog:
+                            break  # push back: settled files wait on disk, not in memory
+                        if now - last < self.settle:
+                            continue
+                        current = _signature(path)
+                        if current != sig:
+                            # Still being written: start the quiet period again
+                            if current is None:
+                                del settling[path]
+                            else:
+                                settling[path] = (current, first, now)
+                            continue
+                        del settling[path]
+                        if self._up_to_date(path, sig):
+                            done_sigs[path] = sig
+                            continue
+                        backlog.append((path, sig, first))
+                        queued[path] = sig
+
+                    # Collect first, so slots freed since the last pass are refilled now
+                    # rather than after another poll
+                    self._collect(inflight, queued, done_sigs, block=False)
+                    while backlog and len(inflight) < self.max_inflight:
+                        path, sig, first = backlog.popleft()
+                        job = BatchJob(path, self._output_for(path), self.template.boxes,
+                                       self.template.pixel_size, self.template.preset,
+                                       self.template.blur_radius)
+                        inflight[pool.submit(redact_file, job)] = (path, sig, first)
+
+                    if now >= next_stats:
+                        # Catch paths whose removal was never reported (e.g. an inotify overflow)
+                        for path in [p for p in done_sigs if not os.path.lexists(p)]:
+                            del done_sigs[path]
+                        self.log(f"[STATS] {self.stats.summary()} | backlog {len(backlog)}")
+                        next_stats = now + self.stats_every
+                    timeout = self.poll_interval
+                    if settling:
+                        # Wake when the first settling file is due, not a whole settle period later
+                        due = min(last for _, _, last in settling.values()) + self.settle
+                        timeout = min(timeout, max(0.01, due - time.perf_counter()))
+                    if inflight or backlog:
+                        timeout = min(timeout, 0.05)  # keep collecting results and refilling promptly
+                    touched = watcher.poll(timeout)
+            finally:
+                watcher.close()
+                while inflight:
+                    self._collect(inflight, queued, done_sigs, block=True)
+        if backlog:
+            self.log(f"[WATCH] Stopped with {len(backlog)} file(s) not yet redacted")
+        return self.stats
+
+    def _collect(self, inflight, queued, done_sigs, block: bool) -> None:
+        if block:
+            wait(list(inflight), return_when=FIRST_COMPLETED)
+        for fut in [f for f in inflight if f.done()]:
+            path, sig, first = inflight.pop(fut)
+            queued.pop(path, None)
+            done_sigs[path] = sig
+            res = fut.result()
+            latency = time.perf_counter() - first
+            if res.error:
+                self.stats.failed += 1
+                self.log(f"[FAIL] {res.src}: {res.error}")
+                continue
+            self.stats.add(latency)
+            self.log(f"[OK] {os.path.basename(res.src)} -> {res.dst} | {latency * 1000:.0f} ms "
+                     f"(work {res.seconds * 1000:.0f} ms)")
+
+
+def watch_main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="redax watch",
+                                     description="Redact every image that arrives in a folder.")
+    parser.add_argument("folder", help="folder to watch (not recursive)")
+    parser.add_argument("-t", "--template", required=True, help="boxes to apply (.json, .yml/.yaml)")
+    parser.add_argument("-o", "--output-dir", help="where outputs go (default: <folder>/redacted)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-inflight", type=int, default=None,
+                        help="files handed to the workers at once (default: 2 per worker)")
+    parser.add_argument("--settle", type=float, default=0.5,
+                        help="seconds a file must stay unchanged before it is read (default 0.5)")
+    parser.add_argument("--poll", type=float, default=1.0, help="rescan interval when polling (default 1.0)")
+    parser.add_argument("--force-poll", action="store_true", help="poll even where inotify is available")
+    parser.add_argument("--stats-every", type=float, default=60.0, help="seconds between stats lines")
+    parser.add_argument("--max-backlog", type=int, default=1000,
+                        help="settled files waiting for a worker before new ones are held back (default 1000)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print failures and stats")
+    args = parser.parse_args(argv)
+
+    try:
+        template = load_watch_template(args.template)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[ERROR] Bad template: {e}", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        template.output_dir = os.path.abspath(args.output_dir)
+    if not os.path.isdir(args.folder):
+        print(f"[ERROR] Not a folder: {args.folder}", file=sys.stderr)
+        return 2
+
+    def log(msg: str) -> None:
+        if msg.startswith("[FAIL]"):
+            print(msg, file=sys.stderr)
+        elif not args.quiet or not msg.startswith("[OK]"):
+            print(msg, flush=True)
+
+    stop = threading.Event()
+    import signal
+    for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)):
+        if sig is not None:
+            signal.signal(sig, lambda *_: stop.set())
+    daemon = WatchDaemon(args.folder, template, workers=args.workers, max_inflight=args.max_inflight,
+                         settle=args.settle, poll_interval=args.poll, force_poll=args.force_poll,
+                         stats_every=args.stats_every, max_backlog=args.max_backlog, log=log)
+    stats = daemon.run(stop)
+    print(f"[STATS] {stats.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(batch_main())